@@ -0,0 +1,284 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+ACCESS_DRIVER = "{Microsoft Access Driver (*.mdb, *.accdb)}"
+
+# Requêtes partagées par toutes les fenêtres : une même chaîne SQL réutilisée
+# sur le même curseur évite à pyodbc de re-préparer la requête.
+QUERIES = {
+    "miroir_complet": "SELECT * FROM Donnees_Dossiers",
+    "miroir_modifies": """
+        SELECT *
+        FROM Donnees_Dossiers
+        WHERE id > ? OR date_modification > ?
+    """,
+    "resume_dossiers": """
+        SELECT COUNT(*) AS nb, MAX(id) AS max_id, MAX(date_modification) AS max_modif
+        FROM Donnees_Dossiers
+    """,
+    "ids_dossiers": "SELECT id FROM Donnees_Dossiers",
+    "num_dossiers": "SELECT Num_dossier FROM Donnees_Dossiers",
+    "fiche_dossier": """
+        SELECT *
+        FROM Donnees_Dossiers
+        WHERE id = ?
+    """,
+    "maj_etats_manuels": """
+        UPDATE Donnees_Dossiers
+        SET assainissement = ?, statut_dossier = ?, commentaires = ?
+        WHERE Num_dossier = ?
+    """,
+}
+
+# Nombre de tentatives quand la base est verrouillée ou a été déplacée
+MAX_RETRIES = 3
+RETRY_DELAY = 0.3
+
+
+class AccessDatabaseNotFound(Exception):
+    pass
+
+
+def _pyodbc():
+    # Import différé : le pilote ODBC n'est chargé qu'à la première connexion,
+    # pas au lancement de l'application
+    import pyodbc
+    return pyodbc
+
+
+class AccessStats:
+    """Compteurs de temps cumulés par opération (connexion, requête...)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+
+    def add(self, name, duration):
+        with self._lock:
+            count, total = self.counters.get(name, (0, 0.0))
+            self.counters[name] = (count + 1, total + duration)
+
+    @contextmanager
+    def measure(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                name: {"appels": count, "total_ms": total * 1000, "moyenne_ms": total * 1000 / count}
+                for name, (count, total) in self.counters.items()
+            }
+
+    def summary(self):
+        lines = []
+        for name, values in sorted(self.snapshot().items()):
+            lines.append(
+                f"{name:<20} {values['appels']:>6} appels  "
+                f"{values['total_ms']:>10.1f} ms  ({values['moyenne_ms']:.1f} ms/appel)"
+            )
+        return "\n".join(lines)
+
+
+class _PooledConnection:
+    def __init__(self, conn, file_id):
+        self.conn = conn
+        self.file_id = file_id
+        self.cursors = {}
+
+    def cursor(self, query_name):
+        # Un curseur par requête nommée pour garder la requête préparée
+        cursor = self.cursors.get(query_name)
+        if cursor is None:
+            cursor = self.cursors[query_name] = self.conn.cursor()
+        return cursor
+
+    def close(self):
+        try:
+            self.conn.close()
+        except Exception:
+            pass
+
+
+class AccessRepository:
+    """Pool de connexions chaudes vers la base LICIEL partagé par tous les modules."""
+
+    def __init__(self, db_path, pool_size=2, connect=None, errors=None):
+        self.db_path = db_path
+        self.pool_size = pool_size
+        self.stats = AccessStats()
+        self._connect = connect or self._connect_odbc
+        # Erreurs du pilote qui justifient une nouvelle tentative (pyodbc.Error par défaut)
+        self._errors = errors
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _connect_odbc(self):
+        conn_str = f"DRIVER={ACCESS_DRIVER};DBQ={self.db_path};"
+        return _pyodbc().connect(conn_str)
+
+    def _retry_errors(self):
+        return self._errors or _pyodbc().Error
+
+    def _file_id(self):
+        try:
+            st = os.stat(self.db_path)
+        except OSError:
+            raise AccessDatabaseNotFound(f"Fichier introuvable : {self.db_path}")
+        return (st.st_dev, st.st_ino)
+
+    def _open(self, file_id):
+        with self.stats.measure("connexion"):
+            return _PooledConnection(self._connect(), file_id)
+
+    def _acquire(self):
+        file_id = self._file_id()
+        with self._lock:
+            while self._idle:
+                pooled = self._idle.pop()
+                # Fichier remplacé ou déplacé depuis l'ouverture : on repart de zéro
+                if pooled.file_id == file_id:
+                    return pooled
+                pooled.close()
+        return self._open(file_id)
+
+    def _release(self, pooled):
+        with self._lock:
+            if len(self._idle) < self.pool_size:
+                self._idle.append(pooled)
+                return
+        pooled.close()
+
+    @contextmanager
+    def connection(self):
+        pooled = self._acquire()
+        try:
+            yield pooled
+        except BaseException:
+            # Connexion potentiellement cassée (base verrouillée, réseau coupé)
+            # ou lecture interrompue en cours de route
+            pooled.close()
+            raise
+        self._release(pooled)
+
+    def _run(self, query_name, action):
+        last_error = None
+        for attempt in range(MAX_RETRIES):
+            try:
+                with self.connection() as pooled:
+                    with self.stats.measure(query_name):
+                        return action(pooled)
+            except self._retry_errors() as e:
+                last_error = e
+                time.sleep(RETRY_DELAY * (attempt + 1))
+        raise last_error
+
+    @staticmethod
+    def _as_dicts(cursor, rows):
+        columns = [col[0] for col in cursor.description]
+        return [dict(zip(columns, row)) for row in rows]
+
+    def fetch_all(self, query_name, params=()):
+        def action(pooled):
+            cursor = pooled.cursor(query_name)
+            cursor.execute(QUERIES[query_name], params)
+            return self._as_dicts(cursor, cursor.fetchall())
+        return self._run(query_name, action)
+
+    def fetch_one(self, query_name, params=()):
+        def action(pooled):
+            cursor = pooled.cursor(query_name)
+            cursor.execute(QUERIES[query_name], params)
+            row = cursor.fetchone()
+            return self._as_dicts(cursor, [row])[0] if row else None
+        return self._run(query_name, action)
+
+    def iter_batches(self, query_name, params=(), batch_size=2000, first_batch_size=None):
+        """Lit le résultat par paquets (fetchmany) pour l'afficher au fil de l'eau.
+
+        Pas de nouvelle tentative ici : des paquets ont déjà pu être consommés.
+        """
+        with self.connection() as pooled:
+            start = time.perf_counter()
+            cursor = pooled.cursor(query_name)
+            cursor.execute(QUERIES[query_name], params)
+            size = first_batch_size or batch_size
+            while True:
+                rows = cursor.fetchmany(size)
+                if not rows:
+                    break
+                yield self._as_dicts(cursor, rows)
+                size = batch_size
+            self.stats.add(query_name, time.perf_counter() - start)
+
+    def execute_many(self, query_name, params_seq):
+        """Exécute la requête pour chaque jeu de paramètres, en une seule transaction."""
+        params_seq = list(params_seq)
+
+        def action(pooled):
+            cursor = pooled.cursor(query_name)
+            try:
+                cursor.executemany(QUERIES[query_name], params_seq)
+                pooled.conn.commit()
+            except Exception:
+                pooled.conn.rollback()
+                raise
+            return len(params_seq)
+        return self._run(query_name, action)
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for pooled in idle:
+            pooled.close()
+
+
+_repositories = {}
+_repositories_lock = threading.Lock()
+
+
+def get_repository(db_path):
+    """Renvoie le dépôt partagé pour ce fichier .mdb (créé au premier appel)."""
+    if not db_path or not os.path.exists(db_path):
+        raise AccessDatabaseNotFound(f"Fichier introuvable : {db_path}")
+    key = os.path.normcase(os.path.abspath(db_path))
+    with _repositories_lock:
+        repository = _repositories.get(key)
+        if repository is None:
+            repository = _repositories[key] = AccessRepository(db_path)
+        return repository
+
+
+def register_repository(repository):
+    """Installe ``repository`` pour son fichier : get_repository le renverra ensuite.
+
+    Sert à brancher un autre pilote (base SQLite de test du banc de mesure).
+    """
+    key = os.path.normcase(os.path.abspath(repository.db_path))
+    with _repositories_lock:
+        previous = _repositories.get(key)
+        _repositories[key] = repository
+    if previous is not None and previous is not repository:
+        previous.close()
+
+
+def stats_summary():
+    with _repositories_lock:
+        repositories = list(_repositories.values())
+    return "\n".join(
+        f"[{repository.db_path}]\n{repository.stats.summary()}" for repository in repositories
+    )
+
+
+def close_all():
+    with _repositories_lock:
+        repositories = list(_repositories.values())
+        _repositories.clear()
+    for repository in repositories:
+        repository.close()
@@ -0,0 +1,329 @@
+"""Banc de mesure de SuiviClientPro sur un jeu d'essai synthétique.
+
+    python benchmark.py [--tailles 1000 10000 100000] [--repetitions 3] [--sortie resultats.json]
+    python benchmark.py --comparer ancien.json [--sortie nouveau.json]
+
+Pour chaque taille, une base SQLite qui suit la structure LICIEL remplace la
+base Access (même AccessRepository, même requêtes) et une arborescence de
+dossiers clients est créée : tout tourne sous Linux, sans pilote ODBC ni
+compte Gmail. Les mesures portent sur le code appelé par refresh_data,
+apply_filters, l'ancien update_table (modèle du tableau, si PyQt5 est
+installé), verifier_ddt_local et actualiser_ddt_envoyes (partie locale : le
+dialogue avec Gmail n'est pas mesuré). Les résultats sont enregistrés en JSON
+pour comparer deux versions.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from ddt_index import DdtIndex
+from ddt_matching import match_attachments
+from dossier_store import DossierStore
+from filter_index import FilterIndex
+from gmail_scan_store import ScanStore
+from local_mirror import LocalMirror, new_mirror_refresher, sync_from_access
+from search_index import SearchIndex
+from services import dossiers_from_rows
+from synthetic_liciel import (
+    ASSAINISSEMENTS, STATUTS, create_database, create_folder_tree, gmail_messages, sqlite_repository, touch_rows
+)
+
+
+SIZES = (1000, 10000, 100000)
+REPETITIONS = 3
+RESULTS_PATH = "benchmark_resultats.json"
+# Part des dossiers modifiés entre deux synchronisations incrémentales
+TOUCH_FRACTION = 0.01
+# Paquet de messages enregistré à la fois par le scan Gmail
+SCAN_BATCH_SIZE = 100
+# Lignes dessinées par le tableau à l'écran
+SCREEN_ROWS = 40
+FILTERS = {
+    "recherche": ("dup", {}),
+    "type": ("", {"type": "Vente"}),
+    "type_paiement": ("", {"type": "Vente", "paiement": "Non payé"}),
+    "recherche_type_paiement": ("rennes", {"type": "Vente", "paiement": "Non payé"}),
+}
+
+# Application Qt des mesures du tableau, gardée jusqu'à la fin du processus
+_qt_app = None
+
+
+def log(message):
+    print(message, file=sys.stderr, flush=True)
+
+
+def measure(action, repetitions, setup=None):
+    """Durées de ``action`` en millisecondes ; ``setup`` est appelé avant chaque mesure, hors chrono."""
+    durations = []
+    for _ in range(repetitions):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        action()
+        durations.append((time.perf_counter() - start) * 1000)
+    return {
+        "min_ms": round(min(durations), 3),
+        "mediane_ms": round(statistics.median(durations), 3),
+        "max_ms": round(max(durations), 3),
+    }
+
+
+def synthetic_manual_states(noms, seed=0):
+    # Saisies du tableau sur un dossier sur cinq, comme dans manual_states.json
+    rng = random.Random(seed)
+    return {
+        nom: {
+            "assainissement": rng.choice(ASSAINISSEMENTS),
+            "dossier": rng.choice(STATUTS),
+            "commentaire": rng.choice(("", "relancer le notaire", "clés en agence", "Dupont rappelle")),
+        }
+        for nom in noms if rng.random() < 0.2
+    }
+
+
+def bench_refresh(workspace, db_path, manual_states, repetitions, results):
+    mirror = LocalMirror(os.path.join(workspace, "miroir.sqlite"))
+    refresher = new_mirror_refresher()
+
+    def full():
+        refresher.reset()
+        sync_from_access(mirror, refresher, db_path)
+        return dossiers_from_rows(mirror.list_rows())
+
+    results["refresh_data/complet"] = measure(full, repetitions)
+    results["refresh_data/sans_changement"] = measure(
+        lambda: sync_from_access(mirror, refresher, db_path), repetitions
+    )
+    touches = iter(range(repetitions))
+    results["refresh_data/1_pourcent_modifie"] = measure(
+        lambda: sync_from_access(mirror, refresher, db_path), repetitions,
+        setup=lambda: touch_rows(db_path, TOUCH_FRACTION, seed=next(touches)),
+    )
+
+    def from_mirror():
+        # Démarrage : état de synchronisation et tableau relus depuis le miroir
+        mirror.load_refresher(new_mirror_refresher(), db_path)
+        return DossierStore.from_dossiers(dossiers_from_rows(mirror.list_rows()), manual_states)
+
+    results["refresh_data/demarrage_miroir"] = measure(from_mirror, repetitions)
+    return from_mirror()
+
+
+def bench_filters(dossiers, repetitions, results):
+    search_index = SearchIndex()
+    # Mêmes colonnes que la fenêtre principale
+    filter_index = FilterIndex(("type", "paiement", "assainissement", "dossier"))
+
+    def rebuild():
+        search_index.rebuild(
+            (nom, f"{dossiers.get(i, 'recherche')} {dossiers.get(i, 'commentaire')}")
+            for i, nom in enumerate(dossiers.column("nom"))
+        )
+        filter_index.rebuild(dossiers)
+
+    results["apply_filters/index"] = measure(rebuild, repetitions)
+    selected = {}
+    for label, (query, criteria) in FILTERS.items():
+        # Comme current_filter : dossiers retenus et nombres des listes déroulantes
+        results[f"apply_filters/{label}"] = measure(
+            lambda: filter_index.filter(search_index.search(query), criteria), repetitions
+        )
+        selected[label] = filter_index.filter(search_index.search(query), criteria)[0]
+    return selected
+
+
+def bench_table(dossiers, manual_states, ddt_lookup, selected, repetitions, results):
+    try:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PyQt5.QtCore import Qt
+        from PyQt5.QtGui import QGuiApplication
+        from dossiers_model import DATE_COLUMN, DDT_COLUMN, HEADERS, DossiersTableModel
+    except ImportError:
+        results["update_table"] = {"ignore": "PyQt5 non installé"}
+        return
+    global _qt_app
+    _qt_app = QGuiApplication.instance() or QGuiApplication([])
+    model = DossiersTableModel(manual_states, ddt_lookup=ddt_lookup)
+    rows = selected["type_paiement"]
+
+    results["update_table/chargement"] = measure(lambda: model.set_dossiers(dossiers), repetitions)
+    results["update_table/filtre"] = measure(lambda: model.set_filter(lambda i: True, rows), repetitions)
+
+    def reset():
+        model.set_dossiers(dossiers, rows=None)
+        model.sort(-1)
+
+    results["update_table/tri_date"] = measure(lambda: model.sort(DATE_COLUMN), repetitions, setup=reset)
+    results["update_table/tri_ddt"] = measure(
+        lambda: model.sort(DDT_COLUMN, Qt.DescendingOrder), repetitions, setup=reset
+    )
+
+    def paint():
+        for row in range(min(SCREEN_ROWS, model.rowCount())):
+            for column in range(len(HEADERS)):
+                model.data(model.index(row, column))
+                model.data(model.index(row, column), Qt.ForegroundRole)
+
+    results["update_table/ecran"] = measure(paint, repetitions)
+
+
+def bench_ddt_local(workspace, base_path, noms, repetitions, results):
+    index_path = os.path.join(workspace, "ddt_index.json")
+
+    def remove_index():
+        if os.path.exists(index_path):
+            os.remove(index_path)
+
+    results["verifier_ddt_local/index_complet"] = measure(
+        lambda: DdtIndex(base_path, index_path).build(), repetitions, setup=remove_index
+    )
+    results["verifier_ddt_local/index_a_jour"] = measure(
+        lambda: DdtIndex(base_path, index_path).build(), repetitions
+    )
+    index = DdtIndex(base_path, index_path)
+    results["verifier_ddt_local/tous_les_dossiers"] = measure(
+        lambda: [index.has_report(nom) for nom in noms], repetitions
+    )
+    return index
+
+
+def bench_ddt_envoyes(workspace, noms, repetitions, results):
+    store_path = os.path.join(workspace, "historique_scan.sqlite")
+    messages = list(gmail_messages(noms).items())
+
+    def remove_store():
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(store_path + suffix):
+                os.remove(store_path + suffix)
+
+    def record():
+        store = ScanStore(store_path, legacy_path=None)
+        for start in range(0, len(messages), SCAN_BATCH_SIZE):
+            store.add_messages(dict(messages[start:start + SCAN_BATCH_SIZE]))
+        return store.all_files()
+
+    results["actualiser_ddt_envoyes/historique"] = measure(record, repetitions, setup=remove_store)
+    files = record()
+    results["actualiser_ddt_envoyes/rapprochement"] = measure(
+        lambda: match_attachments(noms, files), repetitions
+    )
+    return match_attachments(noms, files), len(files)
+
+
+def run_size(size, workspace, repetitions, seed):
+    os.makedirs(workspace, exist_ok=True)
+    db_path = os.path.join(workspace, "liciel_synthetique.sqlite")
+    base_path = os.path.join(workspace, "clients")
+    results = {}
+
+    log(f"[{size}] base synthétique…")
+    noms = create_database(db_path, size, base_path, seed)
+    sqlite_repository(db_path)
+    log(f"[{size}] dossiers clients…")
+    reports = create_folder_tree(base_path, db_path, seed=seed)
+    manual_states = synthetic_manual_states(noms, seed)
+
+    log(f"[{size}] refresh_data")
+    dossiers = bench_refresh(workspace, db_path, manual_states, repetitions, results)
+    log(f"[{size}] apply_filters")
+    selected = bench_filters(dossiers, repetitions, results)
+    log(f"[{size}] verifier_ddt_local")
+    index = bench_ddt_local(workspace, base_path, noms, repetitions, results)
+    log(f"[{size}] actualiser_ddt_envoyes")
+    envoyes, gmail_files = bench_ddt_envoyes(workspace, noms, repetitions, results)
+    log(f"[{size}] update_table")
+    bench_table(
+        dossiers, manual_states, lambda nom: nom in envoyes or index.has_report(nom),
+        selected, repetitions, results,
+    )
+    return {
+        "contexte": {
+            "dossiers": len(dossiers),
+            "etats_manuels": len(manual_states),
+            "rapports_locaux": reports,
+            "pdf_gmail": gmail_files,
+            "filtres": {label: len(rows) for label, rows in selected.items()},
+        },
+        "mesures": results,
+    }
+
+
+def code_version():
+    try:
+        found = subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True,
+        )
+        return found.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "inconnue"
+
+
+def compare(previous, current, out):
+    """Médianes de deux fichiers de résultats, mesure par mesure."""
+    out.write(f"{'mesure':<48} {'avant (ms)':>12} {'après (ms)':>12} {'rapport':>8}\n")
+    for size, data in current["tailles"].items():
+        old = previous.get("tailles", {}).get(size, {}).get("mesures", {})
+        for name, values in data["mesures"].items():
+            before = old.get(name, {}).get("mediane_ms")
+            after = values.get("mediane_ms")
+            if after is None:
+                continue
+            ratio = f"{after / before:8.2f}" if before else f"{'-':>8}"
+            before = f"{before:12.2f}" if before is not None else f"{'-':>12}"
+            out.write(f"{size + ' ' + name:<48} {before} {after:12.2f} {ratio}\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Banc de mesure de SuiviClientPro (jeu d'essai synthétique).")
+    parser.add_argument("--tailles", type=int, nargs="+", default=list(SIZES), help="nombres de dossiers")
+    parser.add_argument("--repetitions", type=int, default=REPETITIONS)
+    parser.add_argument("--graine", type=int, default=0, help="graine du générateur (jeu d'essai reproductible)")
+    parser.add_argument("--sortie", default=RESULTS_PATH, help="fichier JSON des résultats")
+    parser.add_argument("--comparer", help="résultats d'une version précédente à comparer")
+    parser.add_argument("--dossier-travail", help="emplacement du jeu d'essai (temporaire par défaut, supprimé à la fin)")
+    args = parser.parse_args(argv)
+
+    workspace = args.dossier_travail or tempfile.mkdtemp(prefix="suiviclientpro_bench_")
+    report = {
+        "version": code_version(),
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plateforme": platform.platform(),
+        "repetitions": args.repetitions,
+        "graine": args.graine,
+        "tailles": {},
+    }
+    try:
+        for size in args.tailles:
+            report["tailles"][str(size)] = run_size(
+                size, os.path.join(workspace, str(size)), args.repetitions, args.graine
+            )
+    finally:
+        if not args.dossier_travail:
+            shutil.rmtree(workspace, ignore_errors=True)
+
+    with open(args.sortie, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    log(f"Résultats enregistrés dans {args.sortie}")
+
+    if args.comparer:
+        with open(args.comparer, "r", encoding="utf-8") as f:
+            compare(json.load(f), report, sys.stdout)
+    else:
+        compare({}, report, sys.stdout)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,21 @@
+from PyQt5.QtCore import QObject, pyqtSignal
+
+
+class ConfigNotifier(QObject):
+    """Relaie les modifications du ConfigService sous forme de signal Qt.
+
+    Le signal est livré dans le thread de l'interface, même si la
+    modification a été détectée depuis un thread de fond.
+    """
+
+    # ensemble des clés modifiées
+    changed = pyqtSignal(object)
+
+    def __init__(self, service, parent=None):
+        super().__init__(parent)
+        self.service = service
+        self._listener = self.changed.emit
+        service.add_listener(self._listener)
+
+    def close(self):
+        self.service.remove_listener(self._listener)
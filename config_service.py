@@ -0,0 +1,119 @@
+import json
+import os
+import threading
+import time
+
+
+CONFIG_PATH = "config_suiviclientpro.json"
+# Intervalle minimal entre deux vérifications de la date du fichier
+CHECK_INTERVAL = 1.0
+
+
+class ConfigService:
+    """Paramétrage de l'application, lu une fois et gardé en mémoire.
+
+    Le fichier n'est relu que si sa date de modification a changé (vérifiée
+    au plus une fois par ``CHECK_INTERVAL`` secondes), et réécrit d'un bloc
+    (fichier temporaire puis remplacement). Les écouteurs reçoivent
+    l'ensemble des clés modifiées, que la modification vienne de
+    l'application ou d'une édition du fichier.
+    """
+
+    def __init__(self, path=CONFIG_PATH, check_interval=CHECK_INTERVAL):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.RLock()
+        self._listeners = []
+        self._config = {}
+        self._mtime = None
+        self._next_check = 0.0
+        self._reload()
+
+    def _file_mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _reload(self):
+        mtime = self._file_mtime()
+        config = {}
+        if mtime is not None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    config = json.load(f)
+            except (OSError, ValueError) as e:
+                # Fichier en cours d'écriture par un autre programme : l'ancienne valeur reste
+                print(f"[Paramétrage] Lecture impossible de {self.path} : {e}")
+                return set()
+        changed = {key for key in config.keys() | self._config.keys() if config.get(key) != self._config.get(key)}
+        self._config = config
+        self._mtime = mtime
+        return changed
+
+    def _refresh(self):
+        now = time.monotonic()
+        with self._lock:
+            if now < self._next_check:
+                return
+            self._next_check = now + self.check_interval
+            if self._file_mtime() == self._mtime:
+                return
+            changed = self._reload()
+        if changed:
+            self._notify(changed)
+
+    def exists(self):
+        self._refresh()
+        return self._mtime is not None
+
+    def get(self, key, default=None):
+        self._refresh()
+        with self._lock:
+            return self._config.get(key, default)
+
+    def snapshot(self):
+        """Copie du paramétrage complet (modifiable sans effet sur le cache)."""
+        self._refresh()
+        with self._lock:
+            return dict(self._config)
+
+    def update(self, changes):
+        """Fusionne ``changes`` dans le paramétrage et l'enregistre ; les autres clés sont conservées."""
+        with self._lock:
+            config = dict(self._config)
+            config.update(changes)
+            changed = {key for key in changes if self._config.get(key) != config[key]}
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(config, f, indent=4, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self._config = config
+            self._mtime = self._file_mtime()
+        if changed:
+            self._notify(changed)
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, changed):
+        for listener in list(self._listeners):
+            listener(changed)
+
+
+_services = {}
+_services_lock = threading.Lock()
+
+
+def get_config_service(path=CONFIG_PATH):
+    """Renvoie le service partagé pour ce fichier de paramétrage (créé au premier appel)."""
+    key = os.path.normcase(os.path.abspath(path))
+    with _services_lock:
+        service = _services.get(key)
+        if service is None:
+            service = _services[key] = ConfigService(path)
+        return service
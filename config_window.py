@@ -1,21 +1,15 @@
 from PyQt5.QtWidgets import (
-    QWidget, QLabel, QPushButton, QLineEdit, QFileDialog,
-    QVBoxLayout, QHBoxLayout, QDialog, QMessageBox, QTableWidget, QTableWidgetItem, QHeaderView
+    QLabel, QPushButton, QLineEdit, QFileDialog,
+    QVBoxLayout, QHBoxLayout, QDialog, QMessageBox
 )
 from PyQt5.QtCore import Qt
-import json
 import os
-import re
-import unicodedata
-import pyodbc
-from datetime import datetime
+from access_repository import get_repository
+from config_service import get_config_service
+from text_utils import normalize_folder_name
 
 
 
-
-CONFIG_FILE = "config_suiviclientpro.json"
-MANUAL_STATE_FILE = "manual_states.json"
-
 class ConfigWindow(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -100,12 +94,9 @@ class ConfigWindow(QDialog):
                 return "Base Access introuvable."
 
             access_names = []
-            conn_str = f"DRIVER={{Microsoft Access Driver (*.mdb, *.accdb)}};DBQ={access_path};"
             try:
-                with pyodbc.connect(conn_str) as conn:
-                    cursor = conn.cursor()
-                    cursor.execute("SELECT Num_dossier FROM Donnees_Dossiers")
-                    access_names = [normalize_folder_name(row[0]) for row in cursor.fetchall()]
+                rows = get_repository(access_path).fetch_all("num_dossiers")
+                access_names = [normalize_folder_name(row["Num_dossier"]) for row in rows]
             except Exception as e:
                 return f"Erreur lecture base Access : {e}"
 
@@ -116,13 +107,7 @@ class ConfigWindow(QDialog):
             return f"Erreur : {e}"
 
     def load_config(self):
-        if os.path.exists(CONFIG_FILE):
-            try:
-                with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-                    return json.load(f)
-            except Exception:
-                return {}
-        return {}
+        return get_config_service().snapshot()
 
     def save_config(self):
         data = {
@@ -133,94 +118,13 @@ class ConfigWindow(QDialog):
         }
 
         try:
-            with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=4)
+            # Seules ces clés sont remplacées : gmail_label, SMTP... sont conservés
+            get_config_service().update(data)
             QMessageBox.information(self, "Succès", "Paramétrage enregistré avec succès.")
             self.accept()
         except Exception as e:
             QMessageBox.critical(self, "Erreur", f"Échec lors de l'enregistrement : {e}")
 
-def normalize_folder_name(name: str) -> str:
-    name = name.replace("/", "_")
-    name = name.replace("\\", "_")
-    name = name.replace(":", "")
-    name = re.sub(r"\s+", "_", name)
-    name = unicodedata.normalize("NFD", name)
-    name = name.encode("ascii", "ignore").decode("utf-8")
-    name = re.sub(r"[^a-zA-Z0-9_]+", "", name)
-    return name.strip().lower()
-
-def load_clients_for_main_table():
-    if not os.path.exists(CONFIG_FILE):
-        return []
-    try:
-        with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-            config = json.load(f)
-
-        access_path = config.get("access_path", "")
-        client_ids = config.get("all_client_folders", [])
-        if not access_path or not os.path.exists(access_path):
-            return []
-
-        manual_states = {}
-        if os.path.exists(MANUAL_STATE_FILE):
-            with open(MANUAL_STATE_FILE, "r", encoding="utf-8") as f:
-                manual_states = json.load(f)
-
-        conn_str = f"DRIVER={{Microsoft Access Driver (*.mdb, *.accdb)}};DBQ={access_path};"
-        with pyodbc.connect(conn_str) as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT Num_dossier, type_de_dossier, rdv_date, dossier_etat_paie FROM Donnees_Dossiers")
-            rows = cursor.fetchall()
-
-        result = []
-        for row in rows:
-            norm = normalize_folder_name(row[0])
-            if norm in client_ids:
-                dossier = row[0]
-                mission = row[1] or ""
-                date = row[2].strftime("%Y-%m-%d") if isinstance(row[2], datetime) else ""
-                paiement = row[3] or ""
-                state = manual_states.get(norm, {})
-                commentaire = state.get("commentaires", "")
-                ddt_envoye = state.get("ddt_envoye", False)
-                result.append((dossier, mission, date, paiement, commentaire, "✅" if ddt_envoye else "❌"))
-
-        return result
-    except Exception as e:
-        print("Erreur chargement clients:", e)
-        return []
-
-class MainClientTable(QWidget):
-    def __init__(self):
-        super().__init__()
-        self.setWindowTitle("Tableau principal des dossiers SuiviClientPro")
-        self.setGeometry(100, 100, 1200, 600)
-
-        self.table = QTableWidget()
-        self.table.setColumnCount(6)
-        self.table.setHorizontalHeaderLabels([
-            "Nom du dossier", "Type de mission", "Date RDV",
-            "Statut Paiement", "Commentaires", "DDT Envoyé"
-        ])
-        self.table.horizontalHeader().setStretchLastSection(True)
-        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-
-        layout = QVBoxLayout()
-        layout.addWidget(self.table)
-        self.setLayout(layout)
-
-        self.load_data()
-
-    def load_data(self):
-        rows = load_clients_for_main_table()
-        self.table.setRowCount(len(rows))
-        for i, row in enumerate(rows):
-            for j, val in enumerate(row):
-                self.table.setItem(i, j, QTableWidgetItem(val))
-
-
-
 class GmailConfigDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -246,20 +150,11 @@ class GmailConfigDialog(QDialog):
         self.load_existing_label()
 
     def load_existing_label(self):
-        try:
-            with open("config_suiviclientpro.json", "r", encoding="utf-8") as f:
-                config = json.load(f)
-                self.label_input.setText(config.get("gmail_label", "SENT"))
-        except Exception:
-            pass
+        self.label_input.setText(get_config_service().get("gmail_label", "SENT"))
 
     def save_config(self):
         try:
-            with open("config_suiviclientpro.json", "r", encoding="utf-8") as f:
-                config = json.load(f)
-            config["gmail_label"] = self.label_input.text().strip()
-            with open("config_suiviclientpro.json", "w", encoding="utf-8") as f:
-                json.dump(config, f, indent=2, ensure_ascii=False)
+            get_config_service().update({"gmail_label": self.label_input.text().strip()})
             QMessageBox.information(self, "Succès", "Label Gmail enregistré.")
             self.accept()
         except Exception as e:
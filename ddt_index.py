@@ -0,0 +1,177 @@
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from text_utils import normalize_folder_name
+
+
+INDEX_PATH = "ddt_index.json"
+REPORT_KEYWORDS = ("dpe", "amiante", "ddt", "rapport")
+CONTAINER_PREFIX = "dossiers_"
+MAX_WORKERS = 8
+
+
+def is_report_file(filename):
+    name = filename.lower()
+    return name.endswith(".pdf") and any(mot in name for mot in REPORT_KEYWORDS)
+
+
+def _dir_mtime(entry):
+    try:
+        return entry.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def _scan_reports(path):
+    try:
+        with os.scandir(path) as entries:
+            return sorted(e.name for e in entries if e.is_file() and is_report_file(e.name))
+    except OSError:
+        return []
+
+
+class DdtIndex:
+    """Index des rapports PDF présents dans les dossiers clients.
+
+    Associe le nom normalisé de chaque dossier (voir ``normalize_folder_name``)
+    aux PDF de rapport qu'il contient. L'index est enregistré sur disque avec
+    le mtime de chaque répertoire : au démarrage suivant, seuls les dossiers
+    dont le mtime a changé sont relus.
+    """
+
+    def __init__(self, base_path, index_path=INDEX_PATH):
+        self.base_path = base_path
+        self.index_path = index_path
+        # chemin du dossier -> {"key", "mtime", "reports"}
+        self.folders = {}
+        # nom normalisé -> liste des PDF de rapport
+        self.reports_by_name = {}
+        # sous-dossiers dossiers_* du dossier parent
+        self.containers = []
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("base_path") != self.base_path:
+            return
+        self.folders = data.get("folders", {})
+        self.containers = data.get("containers", [])
+        self.reports_by_name = self._by_name(self.folders)
+
+    def save(self):
+        data = {"base_path": self.base_path, "containers": self.containers, "folders": self.folders}
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+
+    @staticmethod
+    def _by_name(folders):
+        by_name = {}
+        for info in folders.values():
+            if info["reports"]:
+                by_name.setdefault(info["key"], []).extend(info["reports"])
+        return by_name
+
+    def _dossier_folders(self):
+        """Liste (chemin, nom, mtime) des dossiers clients : sous-dossiers de
+        ``dossiers_*`` et sous-dossiers directs du dossier parent."""
+        found = []
+        containers = []
+        try:
+            with os.scandir(self.base_path) as entries:
+                for entry in entries:
+                    if not entry.is_dir():
+                        continue
+                    if entry.name.lower().startswith(CONTAINER_PREFIX):
+                        containers.append(entry.path)
+                    else:
+                        found.append((entry.path, entry.name, _dir_mtime(entry)))
+        except OSError:
+            return found
+        self.containers = containers
+
+        def list_container(path):
+            try:
+                with os.scandir(path) as entries:
+                    return [(e.path, e.name, _dir_mtime(e)) for e in entries if e.is_dir()]
+            except OSError:
+                return []
+
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+            for folders in pool.map(list_container, containers):
+                found.extend(folders)
+        return found
+
+    def build(self):
+        """Parcourt le dossier parent et relit en parallèle les dossiers modifiés.
+
+        Renvoie l'ensemble des noms normalisés qui ont gagné ou perdu leurs rapports.
+        """
+        if not self.base_path or not os.path.isdir(self.base_path):
+            return set()
+
+        folders = {}
+        to_scan = []
+        for path, name, mtime in self._dossier_folders():
+            cached = self.folders.get(path)
+            if cached and mtime is not None and cached["mtime"] == mtime:
+                folders[path] = cached
+            else:
+                folders[path] = {"key": normalize_folder_name(name), "mtime": mtime, "reports": []}
+                to_scan.append(path)
+
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+            for path, reports in zip(to_scan, pool.map(_scan_reports, to_scan)):
+                folders[path]["reports"] = reports
+
+        # Remplacement d'un bloc : les lectures concurrentes voient l'ancien ou le nouvel index
+        by_name = self._by_name(folders)
+        with self._lock:
+            previous = self.reports_by_name
+            self.folders = folders
+            self.reports_by_name = by_name
+        self.save()
+        return {
+            key for key in previous.keys() | by_name.keys()
+            if bool(previous.get(key)) != bool(by_name.get(key))
+        }
+
+    def rescan_folder(self, path):
+        """Relit un seul dossier client ; renvoie son nom normalisé s'il a gagné
+        ou perdu ses rapports, None sinon."""
+        key = normalize_folder_name(os.path.basename(os.path.normpath(path)))
+        try:
+            info = {"key": key, "mtime": os.stat(path).st_mtime_ns, "reports": _scan_reports(path)}
+        except OSError:
+            info = None
+        with self._lock:
+            folders = dict(self.folders)
+            if info is None:
+                folders.pop(path, None)
+            else:
+                folders[path] = info
+            self.folders = folders
+            had_report = bool(self.reports_by_name.get(key))
+            self.reports_by_name = self._by_name(folders)
+        return key if bool(self.reports_by_name.get(key)) != had_report else None
+
+    def recent_folders(self, limit):
+        """Les ``limit`` dossiers clients modifiés le plus récemment."""
+        folders = sorted(self.folders.items(), key=lambda item: item[1]["mtime"] or 0, reverse=True)
+        return [path for path, _ in folders[:limit]]
+
+    def reports(self, nom_dossier):
+        return self.reports_by_name.get(normalize_folder_name(nom_dossier), [])
+
+    def has_report(self, nom_dossier):
+        return bool(self.reports(nom_dossier))
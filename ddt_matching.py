@@ -0,0 +1,54 @@
+import os
+import re
+
+from text_utils import normalize_folder_name
+
+
+def _tokens(name):
+    # Tirets et points séparent des mots : normalize_folder_name les supprimerait
+    name = re.sub(r"[^\w]+", " ", name)
+    return [token for token in normalize_folder_name(name).split("_") if token]
+
+
+class AttachmentMatcher:
+    """Retrouve les dossiers cités dans des noms de fichiers.
+
+    Dossiers et fichiers sont normalisés de la même façon
+    (``normalize_folder_name`` : « 24/RENAULT/0063 » et « 24_renault_0063 »
+    donnent les mêmes mots). Un fichier correspond à un dossier quand les mots
+    du dossier s'y suivent ; la recherche se fait par table de hachage sur les
+    suites de mots du fichier, sans comparer chaque fichier à chaque dossier.
+    """
+
+    def __init__(self, noms):
+        # suite de mots normalisée -> noms de dossiers
+        self.keys = {}
+        for nom in noms:
+            tokens = _tokens(nom)
+            if tokens:
+                self.keys.setdefault(tuple(tokens), []).append(nom)
+        self.lengths = sorted({len(key) for key in self.keys})
+
+    def dossiers_for(self, filename):
+        tokens = _tokens(os.path.splitext(filename)[0])
+        found = []
+        for start in range(len(tokens)):
+            for length in self.lengths:
+                if start + length > len(tokens):
+                    break
+                found.extend(self.keys.get(tuple(tokens[start:start + length]), ()))
+        return found
+
+    def match(self, filenames):
+        """Renvoie {nom du dossier: [fichiers qui le citent]}."""
+        matches = {}
+        for filename in filenames:
+            for nom in self.dossiers_for(filename):
+                files = matches.setdefault(nom, [])
+                if filename not in files:
+                    files.append(filename)
+        return matches
+
+
+def match_attachments(noms, filenames):
+    return AttachmentMatcher(noms).match(filenames)
@@ -0,0 +1,117 @@
+import os
+
+from PyQt5.QtCore import QFileSystemWatcher, QObject, QTimer, pyqtSignal
+
+from workers import run_in_background
+
+
+# Nombre de dossiers clients surveillés individuellement (les plus récents) :
+# au-delà, le sondage périodique prend le relais.
+MAX_WATCHED_FOLDERS = 500
+DEBOUNCE_MS = 800
+POLL_INTERVAL_MS = 2 * 60 * 1000
+
+
+class DdtWatcher(QObject):
+    """Surveille clients_parent_folder et met à jour l'index DDT dossier par dossier.
+
+    QFileSystemWatcher (inotify sous Linux, notifications Windows) signale les
+    changements ; les rafales d'événements (copie d'un dossier entier de PDF)
+    sont regroupées par une temporisation avant la relecture. Un sondage
+    périodique rattrape ce que les partages réseau ne notifient pas.
+    """
+
+    ddt_changed = pyqtSignal(str)
+    # Relecture impossible (partage réseau déconnecté...) : message pour la barre d'état
+    failed = pyqtSignal(str)
+
+    def __init__(self, ddt_index, parent=None):
+        super().__init__(parent)
+        self.index = ddt_index
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.on_directory_changed)
+        self.pending = set()
+        self.busy = False
+        # Arrêté : les relectures encore en cours sont ignorées à leur retour
+        self.stopped = False
+
+        self.debounce_timer = QTimer(self)
+        self.debounce_timer.setSingleShot(True)
+        self.debounce_timer.setInterval(DEBOUNCE_MS)
+        self.debounce_timer.timeout.connect(self.flush)
+
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setInterval(POLL_INTERVAL_MS)
+        self.poll_timer.timeout.connect(self.poll)
+
+    def start(self):
+        self.watch_folders()
+        self.poll_timer.start()
+
+    def stop(self):
+        self.stopped = True
+        self.poll_timer.stop()
+        self.debounce_timer.stop()
+        if self.watcher.directories():
+            self.watcher.removePaths(self.watcher.directories())
+
+    def watch_folders(self):
+        if self.watcher.directories():
+            self.watcher.removePaths(self.watcher.directories())
+        paths = [self.index.base_path] + self.index.containers + self.index.recent_folders(MAX_WATCHED_FOLDERS)
+        paths = [path for path in paths if path and os.path.isdir(path)]
+        if paths:
+            self.watcher.addPaths(paths)
+
+    def on_directory_changed(self, path):
+        self.pending.add(path)
+        # Chaque nouvel événement repousse la relecture
+        self.debounce_timer.start()
+
+    def flush(self):
+        if self.stopped:
+            return
+        if self.busy:
+            self.debounce_timer.start()
+            return
+        paths, self.pending = self.pending, set()
+        if paths:
+            self.busy = True
+            run_in_background(self.rescan, paths, on_finished=self.on_rescanned, on_failed=self.on_failed)
+
+    def poll(self):
+        if not self.stopped and not self.busy:
+            self.busy = True
+            run_in_background(self.rescan, None, on_finished=self.on_rescanned, on_failed=self.on_failed)
+
+    def rescan(self, paths):
+        # Thread de fond. Un changement dans le dossier parent ou un dossiers_*
+        # (dossier client ajouté, renommé) demande un parcours complet, qui ne
+        # relit que les dossiers dont le mtime a changé.
+        structural = paths is None or any(
+            path == self.index.base_path or path in self.index.containers or path not in self.index.folders
+            for path in paths
+        )
+        if structural:
+            return self.index.build(), True
+        keys = {self.index.rescan_folder(path) for path in paths}
+        keys.discard(None)
+        self.index.save()
+        return keys, False
+
+    def on_rescanned(self, result):
+        self.busy = False
+        if self.stopped:
+            return
+        keys, structural = result
+        for key in keys:
+            self.ddt_changed.emit(key)
+        if structural:
+            self.watch_folders()
+        if self.pending:
+            self.debounce_timer.start()
+
+    def on_failed(self, message):
+        self.busy = False
+        if not self.stopped:
+            self.failed.emit(message)
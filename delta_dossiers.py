@@ -0,0 +1,131 @@
+import hashlib
+import os
+from datetime import datetime
+
+
+NO_DATE = datetime(1900, 1, 1)
+
+# Premier paquet réduit : de quoi remplir l'écran avant la fin de la lecture
+FIRST_BATCH_SIZE = 100
+
+
+def file_signature(db_path):
+    try:
+        st = os.stat(db_path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def row_fingerprint(row):
+    """Empreinte stable (indépendante du processus) de toutes les colonnes d'une ligne."""
+    data = "\x1f".join(repr(row.get(col)) for col in sorted(row))
+    return hashlib.blake2b(data.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class DossiersDelta:
+    def __init__(self, added=None, modified=None, removed=None, full=False):
+        self.added = added or []
+        self.modified = modified or []
+        # ids Access des lignes retirées
+        self.removed = removed or []
+        # True quand tout a été relu (premier chargement ou base remplacée)
+        self.full = full
+
+    def is_empty(self):
+        return not (self.added or self.modified or self.removed)
+
+    def __repr__(self):
+        return (
+            f"DossiersDelta(ajoutés={len(self.added)}, modifiés={len(self.modified)}, "
+            f"supprimés={len(self.removed)}, complet={self.full})"
+        )
+
+
+class DeltaRefresher:
+    """Détecte ce qui a changé dans Donnees_Dossiers depuis la dernière lecture.
+
+    Étapes, de la moins chère à la plus chère : signature du fichier
+    (mtime/taille), résumé de la table (nombre de lignes, id max, date de
+    modification max), puis lecture des seules lignes nouvelles ou modifiées
+    dont l'empreinte a réellement changé.
+    """
+
+    def __init__(self, full_query, delta_query):
+        self.full_query = full_query
+        self.delta_query = delta_query
+        self.reset()
+
+    def reset(self):
+        self.db_path = None
+        self.signature = None
+        self.summary = None
+        # id -> (Num_dossier, empreinte)
+        self.known = {}
+
+    def _read_summary(self, repository):
+        row = repository.fetch_one("resume_dossiers")
+        return (row["nb"], row["max_id"], row["max_modif"])
+
+    def full_load(self, repository, db_path, on_batch=None):
+        """Relit toute la table ; ``on_batch(lignes, lues, total)`` est appelé à chaque paquet."""
+        signature = file_signature(db_path)
+        summary = self._read_summary(repository)
+        rows = []
+        for batch in repository.iter_batches(self.full_query, first_batch_size=FIRST_BATCH_SIZE):
+            rows.extend(batch)
+            if on_batch:
+                on_batch(batch, len(rows), summary[0])
+        self.db_path = db_path
+        self.signature = signature
+        self.summary = summary
+        self.known = {row["id"]: (row["Num_dossier"], row_fingerprint(row)) for row in rows}
+        return DossiersDelta(added=rows, full=True)
+
+    def refresh(self, repository, db_path, on_batch=None):
+        if self.db_path != db_path or self.summary is None:
+            return self.full_load(repository, db_path, on_batch)
+
+        signature = file_signature(db_path)
+        if signature == self.signature:
+            return DossiersDelta()
+
+        summary = self._read_summary(repository)
+        if summary == self.summary:
+            self.signature = signature
+            return DossiersDelta()
+
+        count, max_id, max_modif = self.summary
+        rows = repository.fetch_all(
+            self.delta_query, (max_id or 0, max_modif or NO_DATE)
+        )
+
+        # Copie de travail : l'état n'avance que si tout le delta a pu être lu
+        known = dict(self.known)
+        delta = DossiersDelta()
+        for row in rows:
+            fingerprint = row_fingerprint(row)
+            previous = known.get(row["id"])
+            if previous is None:
+                delta.added.append(row)
+            elif previous[1] != fingerprint:
+                if previous[0] != row["Num_dossier"]:
+                    # Dossier renommé : la ligne quitte le tableau sous l'ancien nom
+                    delta.removed.append(row["id"])
+                    delta.added.append(row)
+                else:
+                    delta.modified.append(row)
+            known[row["id"]] = (row["Num_dossier"], fingerprint)
+
+        # Moins de lignes qu'attendu : des dossiers ont été supprimés
+        if summary[0] != count + sum(1 for row in rows if row["id"] > (max_id or 0)):
+            current_ids = {row["id"] for row in repository.fetch_all("ids_dossiers")}
+            for dossier_id in list(known):
+                if dossier_id not in current_ids:
+                    del known[dossier_id]
+                    delta.removed.append(dossier_id)
+
+        self.known = known
+        self.summary = summary
+        self.signature = signature
+        return delta
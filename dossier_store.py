@@ -0,0 +1,168 @@
+import sys
+from array import array
+
+
+# Champs d'un dossier du tableau (voir services.dossier_from_row) et saisies manuelles
+TEXT_FIELDS = ("nom", "date", "photo", "chemin", "recherche", "commentaire")
+# Colonnes à peu de valeurs distinctes : un numéro par dossier, la valeur est partagée
+CATEGORY_FIELDS = ("type", "paiement", "assainissement", "dossier")
+STATE_FIELDS = ("assainissement", "dossier", "commentaire")
+FIELDS = TEXT_FIELDS + CATEGORY_FIELDS + ("horodatage",)
+# Rendez-vous sans date dans la colonne horodatage
+NO_TIMESTAMP = -1
+
+
+class Categories:
+    """Valeurs distinctes d'une colonne, numérotées dans l'ordre d'apparition."""
+
+    def __init__(self):
+        self.values = []
+        self._codes = {}
+
+    def code(self, value):
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(sys.intern(value))
+        return code
+
+
+class DossierStore:
+    """Dossiers du tableau principal, rangés par colonnes.
+
+    Les champs texte sont des listes ; type, paiement, assainissement et
+    statut ne gardent qu'un numéro par dossier (``array``), chaque valeur
+    n'existant qu'une fois. Les saisies manuelles sont jointes à l'ajout du
+    dossier : l'affichage n'a plus à consulter ``manual_states``. Un dossier
+    est désigné par sa position ; filtres et tris sont des tableaux de positions.
+    Les lignes venues d'Access se retrouvent par leur ``id`` (le nom peut être
+    en double).
+    """
+
+    def __init__(self):
+        self.text = {field: [] for field in TEXT_FIELDS}
+        self.categories = {field: Categories() for field in CATEGORY_FIELDS}
+        self.codes = {field: array("I") for field in CATEGORY_FIELDS}
+        # minutes depuis l'an 1 (clé de tri de la date), NO_TIMESTAMP sans date
+        self.horodatage = array("q")
+        # id de la ligne dans Access, et id -> position
+        self.ids = array("q")
+        self.rows_by_id = {}
+        # nom du dossier -> position (la première s'il est en double dans la base)
+        self.positions = {}
+        # noms présents plusieurs fois -> toutes leurs positions
+        self.duplicates = {}
+
+    @classmethod
+    def from_dossiers(cls, dossiers, manual_states=None):
+        store = cls()
+        store.append(dossiers, manual_states)
+        return store
+
+    def __len__(self):
+        return len(self.horodatage)
+
+    def append(self, dossiers, manual_states=None):
+        """Ajoute des dossiers (dicts de dossier_from_row) avec leurs saisies manuelles."""
+        manual_states = manual_states or {}
+        text = self.text
+        for dossier in dossiers:
+            nom = dossier["nom"]
+            state = manual_states.get(nom, {})
+            i = len(self.horodatage)
+            first = self.positions.setdefault(nom, i)
+            if first != i:
+                self.duplicates.setdefault(nom, [first]).append(i)
+            for field in TEXT_FIELDS:
+                text[field].append(state.get(field, "") if field in STATE_FIELDS else dossier[field])
+            for field in CATEGORY_FIELDS:
+                value = state.get(field, "") if field in STATE_FIELDS else dossier[field]
+                self.codes[field].append(self.categories[field].code(value))
+            horodatage = dossier["horodatage"]
+            self.horodatage.append(NO_TIMESTAMP if horodatage is None else horodatage)
+            self.ids.append(dossier["id"])
+            self.rows_by_id[dossier["id"]] = i
+
+    def position(self, nom):
+        return self.positions.get(nom)
+
+    def positions_of(self, nom):
+        """Toutes les positions du dossier (plusieurs si le nom est en double)."""
+        found = self.duplicates.get(nom)
+        if found is not None:
+            return found
+        i = self.positions.get(nom)
+        return () if i is None else (i,)
+
+    def position_of_id(self, dossier_id):
+        return self.rows_by_id.get(dossier_id)
+
+    def nom(self, i):
+        return self.text["nom"][i]
+
+    def get(self, i, field):
+        codes = self.codes.get(field)
+        if codes is not None:
+            return self.categories[field].values[codes[i]]
+        if field == "horodatage":
+            horodatage = self.horodatage[i]
+            return None if horodatage == NO_TIMESTAMP else horodatage
+        return self.text[field][i]
+
+    def record(self, i):
+        """Le dossier en dict, pour les fenêtres qui en ont besoin."""
+        record = {field: self.get(i, field) for field in FIELDS}
+        record["id"] = self.ids[i]
+        return record
+
+    def column(self, field):
+        """Valeurs d'une colonne texte ou de catégorie, dans l'ordre des positions (ne pas modifier)."""
+        codes = self.codes.get(field)
+        if codes is None:
+            return self.text[field]
+        values = self.categories[field].values
+        return [values[code] for code in codes]
+
+    def set(self, i, field, value):
+        if field in self.codes:
+            self.codes[field][i] = self.categories[field].code(value)
+        elif field == "horodatage":
+            self.horodatage[i] = NO_TIMESTAMP if value is None else value
+        else:
+            self.text[field][i] = value
+
+    def set_state(self, i, field, value):
+        """Saisie manuelle d'un dossier ; renvoie False si la valeur ne change pas."""
+        if self.get(i, field) == value:
+            return False
+        self.set(i, field, value)
+        return True
+
+    def update(self, i, dossier):
+        """Nouvelles valeurs lues dans la base pour le dossier ``i`` (saisies manuelles conservées)."""
+        for field in FIELDS:
+            if field not in STATE_FIELDS:
+                self.set(i, field, dossier[field])
+
+    def remove(self, ids):
+        """Retire des lignes d'après leur id Access ; les positions des suivantes sont décalées.
+
+        Une ligne en double garde sa place si seule l'autre est retirée.
+        """
+        removed = {self.rows_by_id[dossier_id] for dossier_id in ids if dossier_id in self.rows_by_id}
+        if not removed:
+            return
+        keep = [i for i in range(len(self)) if i not in removed]
+        for field, values in self.text.items():
+            self.text[field] = [values[i] for i in keep]
+        for field, codes in self.codes.items():
+            self.codes[field] = array("I", (codes[i] for i in keep))
+        self.horodatage = array("q", (self.horodatage[i] for i in keep))
+        self.ids = array("q", (self.ids[i] for i in keep))
+        self.rows_by_id = {dossier_id: i for i, dossier_id in enumerate(self.ids)}
+        self.positions = {}
+        self.duplicates = {}
+        for i, nom in enumerate(self.text["nom"]):
+            first = self.positions.setdefault(nom, i)
+            if first != i:
+                self.duplicates.setdefault(nom, [first]).append(i)
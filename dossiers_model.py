@@ -0,0 +1,315 @@
+from array import array
+
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt, pyqtSignal
+from PyQt5.QtGui import QBrush, QColor
+
+from dossier_store import NO_TIMESTAMP, DossierStore
+from text_utils import normalize_folder_name
+
+
+HEADERS = [
+    "Nom du dossier", "Type de mission", "Date & Heure", "Statut paiement",
+    "Assainissement", "Dossier", "Commentaires", "DDT envoyé", "Photo"
+]
+
+# Colonnes issues de la base Access (champ du DossierStore)
+DOSSIER_FIELDS = {0: "nom", 1: "type", 2: "date", 3: "paiement"}
+# Colonnes saisies à la main (champ du DossierStore et clé dans manual_states)
+MANUAL_FIELDS = {4: "assainissement", 5: "dossier", 6: "commentaire"}
+FIELDS = {**DOSSIER_FIELDS, **MANUAL_FIELDS}
+DDT_COLUMN = 7
+PHOTO_COLUMN = 8
+DATE_COLUMN = 2
+
+# Tri sur plusieurs colonnes : la dernière cliquée d'abord, puis les précédentes
+MAX_SORT_COLUMNS = 3
+# Dossiers sans date de rendez-vous : en fin de liste en tri croissant
+NO_DATE = float("inf")
+
+GREEN = QBrush(QColor("green"))
+RED = QBrush(QColor("red"))
+# Fond des cellules saisies pas encore écrites dans Access / en échec
+PENDING_BACKGROUND = QBrush(QColor("#fff4cc"))
+FAILED_BACKGROUND = QBrush(QColor("#ffd6d6"))
+WRITE_STATUS_TIPS = {
+    "pending": "Enregistrement dans la base Access en attente…",
+    "failed": "Échec de l'écriture dans la base Access : nouvel essai automatique.",
+}
+
+
+class DossiersTableModel(QAbstractTableModel):
+    """Modèle du tableau principal.
+
+    Les dossiers sont ceux d'un DossierStore, désignés par leur position : le
+    filtre et le tri produisent un tableau de positions (la « vue »), et la
+    vue Qt ne demande que les cellules visibles.
+    """
+
+    manual_state_changed = pyqtSignal(str, str, str)
+
+    def __init__(self, manual_states, ddt_lookup=None, photo_lookup=None, parent=None):
+        super().__init__(parent)
+        self.dossiers = DossierStore()
+        # Saisies enregistrées ici aussi : c'est ce que manual_states_store écrit sur le disque
+        self.manual_states = manual_states
+        self.ddt_lookup = ddt_lookup
+        # (nom, photo, chemin) -> miniature (QPixmap) ou None si elle n'est pas encore prête
+        self.photo_lookup = photo_lookup
+        # position -> bool, critère des dossiers ajoutés au fil d'un chargement
+        self.accepts = None
+        # Indices des dossiers retenus, s'ils ont été calculés par FilterIndex
+        self.filter_rows = None
+        # [(colonne, ordre)], colonne principale en premier
+        self.sort_columns = []
+        # colonne -> clé de tri de chaque dossier (même ordre que self.dossiers)
+        self._sort_keys = {}
+        self._view = array("I")
+        # position -> ligne affichée, -1 si le dossier est masqué par le filtre
+        self._view_rows = array("i")
+        # statut DDT par nom normalisé, nom -> nom normalisé déjà calculés et l'inverse
+        self._ddt_cache = {}
+        self._ddt_keys = {}
+        self._ddt_noms = {}
+        # nom du dossier -> "pending" / "failed" tant que la saisie n'est pas dans Access
+        self.write_status = {}
+
+    # --- Vue filtrée / triée ---
+
+    def set_dossiers(self, dossiers, accepts=None, rows=None):
+        self.dossiers = dossiers
+        if accepts is not None:
+            self.accepts = accepts
+        self.filter_rows = rows
+        self._ddt_cache = {}
+        self._sort_keys = {}
+        self._rebuild_view()
+
+    def set_filter(self, accepts, rows=None):
+        """``rows`` : dossiers retenus par ``accepts``, déjà calculés (évite de la rappeler)."""
+        self.accepts = accepts
+        self.filter_rows = rows
+        self._rebuild_view()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        if column < 0:
+            self.sort_columns = []
+        else:
+            previous = [(c, o) for c, o in self.sort_columns if c != column]
+            self.sort_columns = [(column, order)] + previous[:MAX_SORT_COLUMNS - 1]
+        self._rebuild_view()
+
+    def _new_sort_keys(self, column, start):
+        """Clés de tri de la colonne pour les dossiers à partir de la position ``start``."""
+        store = self.dossiers
+        if column == DATE_COLUMN:
+            return [NO_DATE if horodatage == NO_TIMESTAMP else horodatage for horodatage in store.horodatage[start:]]
+        if column == PHOTO_COLUMN:
+            return [bool(photo) for photo in store.text["photo"][start:]]
+        if column == DDT_COLUMN:
+            return [self.ddt_status(nom) for nom in store.text["nom"][start:]]
+        field = FIELDS[column]
+        codes = store.codes.get(field)
+        if codes is not None:
+            # Une clé par valeur distincte, partagée par tous les dossiers qui l'ont
+            folded = [value.casefold() for value in store.categories[field].values]
+            return [folded[code] for code in codes[start:]]
+        return [value.casefold() for value in store.text[field][start:]]
+
+    def _column_keys(self, column):
+        """Clés de tri d'une colonne, calculées une fois puis gardées jusqu'au prochain chargement."""
+        if column == DDT_COLUMN:
+            # Statut DDT : change avec les dossiers clients et le scan Gmail
+            return self._new_sort_keys(column, 0)
+        keys = self._sort_keys.setdefault(column, [])
+        if len(keys) < len(self.dossiers):
+            # Chargement au fil de l'eau : seuls les nouveaux dossiers sont calculés
+            keys.extend(self._new_sort_keys(column, len(keys)))
+        return keys
+
+    def _sort_view(self, view):
+        # Tris stables successifs, de la colonne la moins prioritaire à la principale
+        for column, order in reversed(self.sort_columns):
+            view.sort(key=self._column_keys(column).__getitem__, reverse=order == Qt.DescendingOrder)
+
+    def _rebuild_view(self):
+        self.beginResetModel()
+        if self.filter_rows is not None:
+            view = list(self.filter_rows)
+        elif self.accepts is None:
+            view = list(range(len(self.dossiers)))
+        else:
+            view = [i for i in range(len(self.dossiers)) if self.accepts(i)]
+        self._sort_view(view)
+        self._view = array("I", view)
+        view_rows = array("i", [-1]) * len(self.dossiers)
+        for row, i in enumerate(view):
+            view_rows[i] = row
+        self._view_rows = view_rows
+        self.endResetModel()
+
+    def append_dossiers(self, dossiers):
+        """Ajoute des dossiers (dicts de dossier_from_row) pendant un chargement au fil de l'eau."""
+        start = len(self.dossiers)
+        self.dossiers.append(dossiers, self.manual_states)
+        self.filter_rows = None
+        if self.sort_columns:
+            # Timsort fusionne la partie déjà triée et le nouveau paquet en temps linéaire
+            self._rebuild_view()
+            return
+        self._view_rows.extend([-1] * (len(self.dossiers) - start))
+        new_rows = [
+            i for i in range(start, len(self.dossiers))
+            if self.accepts is None or self.accepts(i)
+        ]
+        if not new_rows:
+            return
+        first = len(self._view)
+        self.beginInsertRows(QModelIndex(), first, first + len(new_rows) - 1)
+        self._view.extend(new_rows)
+        for row, i in enumerate(new_rows, first):
+            self._view_rows[i] = row
+        self.endInsertRows()
+
+    def refresh_dossiers(self, positions):
+        """Signale des dossiers modifiés en place : mise à jour ligne par ligne si possible."""
+        self._sort_keys = {}
+        for i in positions:
+            visible = self._view_rows[i] >= 0
+            if self.sort_columns or (self.accepts is not None and visible != self.accepts(i)):
+                # L'ordre ou l'appartenance au filtre change : on recalcule la vue
+                self.filter_rows = None
+                self._rebuild_view()
+                return
+        for i in positions:
+            self._refresh_position(i)
+
+    def _refresh_position(self, i):
+        row = self._view_rows[i] if i < len(self._view_rows) else -1
+        if row >= 0:
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(HEADERS) - 1))
+
+    def refresh_row(self, nom):
+        for i in self.dossiers.positions_of(nom):
+            self._refresh_position(i)
+
+    def position_at(self, row):
+        return self._view[row]
+
+    def nom_at(self, row):
+        return self.dossiers.nom(self._view[row])
+
+    def id_at(self, row):
+        return self.dossiers.ids[self._view[row]]
+
+    def visible_ids(self):
+        ids = self.dossiers.ids
+        return [ids[i] for i in self._view]
+
+    # --- Colonne DDT ---
+
+    def _ddt_key(self, nom):
+        key = self._ddt_keys.get(nom)
+        if key is None:
+            key = self._ddt_keys[nom] = normalize_folder_name(nom)
+            self._ddt_noms.setdefault(key, set()).add(nom)
+        return key
+
+    def ddt_status(self, nom):
+        key = self._ddt_key(nom)
+        status = self._ddt_cache.get(key)
+        if status is None:
+            status = bool(self.ddt_lookup(nom)) if self.ddt_lookup else False
+            self._ddt_cache[key] = status
+        return status
+
+    def refresh_ddt_key(self, key):
+        """Le contenu d'un dossier client a changé : seules ses lignes sont redessinées."""
+        self._ddt_cache.pop(key, None)
+        for nom in self._ddt_noms.get(key, ()):
+            self.refresh_row(nom)
+
+    def reset_ddt_statuses(self):
+        self._ddt_cache = {}
+        if self._view:
+            self.dataChanged.emit(
+                self.index(0, DDT_COLUMN), self.index(len(self._view) - 1, DDT_COLUMN)
+            )
+
+    # --- Écritures Access en attente ---
+
+    def set_write_status(self, nom, status):
+        if status:
+            self.write_status[nom] = status
+        elif self.write_status.pop(nom, None) is None:
+            return
+        self.refresh_row(nom)
+
+    # --- API QAbstractTableModel ---
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._view)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return HEADERS[section]
+        return None
+
+    def flags(self, index):
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        if index.column() in MANUAL_FIELDS:
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        column = index.column()
+        store = self.dossiers
+        i = self._view[index.row()]
+
+        if column == PHOTO_COLUMN:
+            photo = store.text["photo"][i]
+            if role == Qt.DecorationRole and self.photo_lookup and photo:
+                return self.photo_lookup(store.nom(i), photo, store.text["chemin"][i])
+            return None
+
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            if column in FIELDS:
+                return store.get(i, FIELDS[column])
+            return "Oui" if self.ddt_status(store.nom(i)) else "Non"
+
+        if role == Qt.ForegroundRole and column == DDT_COLUMN:
+            return GREEN if self.ddt_status(store.nom(i)) else RED
+
+        if column in MANUAL_FIELDS and role in (Qt.BackgroundRole, Qt.ToolTipRole):
+            status = self.write_status.get(store.nom(i))
+            if status and role == Qt.ToolTipRole:
+                return WRITE_STATUS_TIPS[status]
+            if status:
+                return FAILED_BACKGROUND if status == "failed" else PENDING_BACKGROUND
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.EditRole or index.column() not in MANUAL_FIELDS:
+            return False
+        i = self._view[index.row()]
+        nom = self.dossiers.nom(i)
+        field = MANUAL_FIELDS[index.column()]
+        value = str(value)
+        if not self.dossiers.set_state(i, field, value):
+            return False
+        self.manual_states.setdefault(nom, {})[field] = value
+        keys = self._sort_keys.get(index.column())
+        # Saisie par nom : les autres lignes d'un dossier en double la reçoivent aussi
+        for j in self.dossiers.positions_of(nom):
+            self.dossiers.set_state(j, field, value)
+            if keys is not None and j < len(keys):
+                keys[j] = value.casefold()
+            if j != i:
+                self._refresh_position(j)
+        self.dataChanged.emit(index, index)
+        self.manual_state_changed.emit(nom, field, value)
+        return True
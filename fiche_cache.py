@@ -0,0 +1,56 @@
+import threading
+from collections import OrderedDict
+
+
+FICHE_CACHE_SIZE = 200
+
+
+class FicheCache:
+    """Lignes complètes des dossiers déjà lues pour la fiche client (LRU borné, par id Access).
+
+    Chaque dossier a un numéro de version, incrémenté à chaque invalidation :
+    une lecture en arrière-plan commencée avant une modification ne peut pas
+    remettre l'ancienne ligne dans le cache.
+    """
+
+    def __init__(self, capacity=FICHE_CACHE_SIZE):
+        self.capacity = capacity
+        self._rows = OrderedDict()
+        self._versions = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, dossier_id):
+        with self._lock:
+            row = self._rows.get(dossier_id)
+            if row is not None:
+                self._rows.move_to_end(dossier_id)
+            return row
+
+    def __contains__(self, dossier_id):
+        with self._lock:
+            return dossier_id in self._rows
+
+    def version(self, dossier_id):
+        with self._lock:
+            return self._generation, self._versions.get(dossier_id, 0)
+
+    def put(self, dossier_id, row, version):
+        with self._lock:
+            if version != (self._generation, self._versions.get(dossier_id, 0)):
+                return
+            self._rows[dossier_id] = row
+            self._rows.move_to_end(dossier_id)
+            while len(self._rows) > self.capacity:
+                self._rows.popitem(last=False)
+
+    def invalidate(self, dossier_id):
+        with self._lock:
+            self._rows.pop(dossier_id, None)
+            self._versions[dossier_id] = self._versions.get(dossier_id, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._rows.clear()
+            self._versions.clear()
+            self._generation += 1
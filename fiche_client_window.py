@@ -1,27 +1,19 @@
-import sys
 import os
-import json
-import pyodbc
-from datetime import datetime
 from PyQt5.QtWidgets import (
-    QApplication, QMainWindow, QWidget, QPushButton, QVBoxLayout,
-    QHBoxLayout, QLabel, QTableWidget, QTableWidgetItem,
-    QHeaderView, QAbstractItemView, QSplitter, QMessageBox, QLineEdit, QComboBox, QFileDialog, QDialog, QTextEdit, QTabWidget, QGroupBox, QFormLayout
+    QWidget, QPushButton, QVBoxLayout, QLabel, QMessageBox, QFileDialog, QDialog, QTabWidget, QGroupBox, QFormLayout
 )
-from PyQt5.QtGui import QIcon, QPixmap
+from PyQt5.QtGui import QPixmap
 from PyQt5.QtCore import Qt
-from config_window import ConfigWindow
+from pdf_export import fiche_filename, write_fiche_pdf
+from photos import THUMBNAILS_DIR, pdf_photo
 
 
+# Taille de la photo de présentation dans la fiche
+PHOTO_SIZE = 120
 
 
-
-
-CONFIG_PATH = "config_suiviclientpro.json"
-MANUAL_STATES_PATH = "manual_states.json"
-
 class FicheClientWindow(QDialog):
-    def __init__(self, dossier_data, parent=None):
+    def __init__(self, dossier_data, parent=None, thumbnails=None):
         super().__init__(parent)
         self.setWindowTitle("Fiche client")
         self.setMinimumSize(1000, 600)
@@ -42,6 +34,7 @@ class FicheClientWindow(QDialog):
         form_dossier.addRow("Statut de paiement:", QLabel(dossier_data.get('statut_paiement', '')))
         form_dossier.addRow("Assainissement:", QLabel(dossier_data.get('assainissement', '')))
         form_dossier.addRow("Statut dossier:", QLabel(dossier_data.get('dossier', '')))
+        form_dossier.addRow("Rapports DDT:", QLabel("\n".join(dossier_data.get('rapports', [])) or "Aucun"))
         box_dossier.setLayout(form_dossier)
 
         # Encadré Informations client
@@ -78,12 +71,22 @@ class FicheClientWindow(QDialog):
         form_facturation.addRow("Reste à payer:", QLabel(dossier_data.get('reste_a_payer', '')))
         box_facturation.setLayout(form_facturation)
 
-        # Photo si présente
-        if dossier_data.get("photo") and os.path.exists(dossier_data["photo"]):
-            pixmap = QPixmap(dossier_data["photo"]).scaled(120, 120, Qt.KeepAspectRatio)
-            image_label = QLabel()
-            image_label.setPixmap(pixmap)
-            general_layout.addWidget(image_label)
+        # Photo si présente : miniature du cache, affichée dès qu'elle est prête
+        self.dossier_data = dossier_data
+        self.thumbnails = thumbnails
+        self.photo_path = dossier_data.get("photo", "")
+        self.image_label = QLabel()
+        self.image_label.setFixedSize(PHOTO_SIZE, PHOTO_SIZE)
+        if self.photo_path and thumbnails is not None:
+            pixmap = thumbnails.get(self.photo_path, PHOTO_SIZE)
+            if pixmap is not None:
+                self.image_label.setPixmap(pixmap)
+            else:
+                thumbnails.thumbnail_ready.connect(self.on_thumbnail_ready)
+            general_layout.addWidget(self.image_label)
+        elif self.photo_path and os.path.exists(self.photo_path):
+            self.image_label.setPixmap(QPixmap(self.photo_path).scaled(PHOTO_SIZE, PHOTO_SIZE, Qt.KeepAspectRatio))
+            general_layout.addWidget(self.image_label)
 
         general_layout.addWidget(box_dossier)
         general_layout.addWidget(box_client)
@@ -101,7 +104,7 @@ class FicheClientWindow(QDialog):
         general_layout.addWidget(open_email_btn)
 
         export_pdf_btn = QPushButton("📄 Exporter la fiche en PDF")
-        export_pdf_btn.clicked.connect(self.export_pdf_placeholder)
+        export_pdf_btn.clicked.connect(self.export_pdf)
         general_layout.addWidget(export_pdf_btn)
 
         general_tab.setLayout(general_layout)
@@ -110,231 +113,25 @@ class FicheClientWindow(QDialog):
         layout.addWidget(tabs)
         self.setLayout(layout)
 
-    def export_pdf_placeholder(self):
-        QMessageBox.information(self, "Export PDF", "Fonction à implémenter pour exporter la fiche client en PDF.")
-
-
-
-
-class SuiviClientPro(QMainWindow):
-    def __init__(self):
-        super().__init__()
-        self.setWindowTitle("SuiviClientPro - Diagnostic Immobilier")
-        self.setMinimumSize(1200, 700)
-        self.setWindowIcon(QIcon("icons/app_icon.png"))
-
-        self.manual_states = {}
-        self.dossiers = []
-        self.filtered_dossiers = []
-        self.load_manual_states()
-        self.init_ui()
-
-    def init_ui(self):
-        central_widget = QWidget()
-        self.setCentralWidget(central_widget)
-
-        self.btn_param = QPushButton("⚙️ Paramétrage")
-        self.btn_actualiser = QPushButton("🔄 Actualiser")
-        self.btn_statistiques = QPushButton("📊 Statistiques")
-        self.btn_relances = QPushButton("📧 Relances")
-
-        self.btn_param.clicked.connect(self.open_config)
-        self.btn_actualiser.clicked.connect(self.refresh_data)
-
-        self.search_input = QLineEdit()
-        self.search_input.setPlaceholderText("🔍 Rechercher par nom...")
-        self.search_input.textChanged.connect(self.apply_filters)
-
-        self.combo_type = QComboBox()
-        self.combo_type.addItem("Tous les types")
-        self.combo_type.currentTextChanged.connect(self.apply_filters)
-
-        self.combo_paiement = QComboBox()
-        self.combo_paiement.addItem("Tous les paiements")
-        self.combo_paiement.addItems(["Payé", "En attente"])
-        self.combo_paiement.currentTextChanged.connect(self.apply_filters)
-
-        filter_layout = QVBoxLayout()
-        filter_layout.addWidget(self.search_input)
-        filter_layout.addWidget(QLabel("Type de mission"))
-        filter_layout.addWidget(self.combo_type)
-        filter_layout.addWidget(QLabel("Statut paiement"))
-        filter_layout.addWidget(self.combo_paiement)
-
-        left_layout = QVBoxLayout()
-        left_layout.addWidget(QLabel("📁 Menu"))
-        left_layout.addWidget(self.btn_param)
-        left_layout.addWidget(self.btn_actualiser)
-        left_layout.addWidget(self.btn_statistiques)
-        left_layout.addWidget(self.btn_relances)
-        left_layout.addStretch()
-        left_layout.addLayout(filter_layout)
-
-        menu_widget = QWidget()
-        menu_widget.setLayout(left_layout)
-
-        self.table = QTableWidget()
-        self.table.setColumnCount(7)
-        self.table.setHorizontalHeaderLabels([
-            "Nom du dossier", "Type de mission", "Date & Heure", "Statut paiement",
-            "Assainissement", "Dossier", "Commentaires"])
-        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
-        self.table.setEditTriggers(QTableWidget.AllEditTriggers)
-        self.table.itemChanged.connect(self.save_manual_states)
-        self.table.itemDoubleClicked.connect(self.open_fiche_client)
-
-        split = QSplitter()
-        split.addWidget(menu_widget)
-        split.addWidget(self.table)
-        split.setSizes([300, 900])
-
-        layout = QHBoxLayout()
-        layout.addWidget(split)
-        central_widget.setLayout(layout)
-
-        self.refresh_data()
-
-    def open_fiche_client(self, item):
-        if item.column() != 0:  # Colonne 0 = "Nom du dossier"
+    def on_thumbnail_ready(self, path, size):
+        if path == self.photo_path and size == PHOTO_SIZE:
+            pixmap = self.thumbnails.get(path, size)
+            if pixmap is not None:
+                self.image_label.setPixmap(pixmap)
+
+    def export_pdf(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Exporter la fiche en PDF", fiche_filename(self.dossier_data), "PDF (*.pdf)"
+        )
+        if not path:
             return
-        row = item.row()
-        dossier_data = self.get_dossier_data_from_row(row)
-        if dossier_data:
-            fiche_window = FicheClientWindow(dossier_data, self)
-            fiche_window.exec_()
-
-
-    def load_manual_states(self):
-        if os.path.exists(MANUAL_STATES_PATH):
-            with open(MANUAL_STATES_PATH, 'r', encoding='utf-8') as f:
-                self.manual_states = json.load(f)
-
-    def load_config(self):
-        if os.path.exists(CONFIG_PATH):
-            with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {}
-
-    def get_dossiers_from_access(self):
-        config = self.load_config()
-        db_path = config.get("access_path", "")
-        dossiers = []
-
-        if not os.path.exists(db_path):
-            QMessageBox.critical(self, "Erreur", f"Fichier introuvable : {db_path}")
-            return dossiers
-
+        fiche = dict(self.dossier_data)
+        if self.photo_path:
+            cache_dir = self.thumbnails.cache_dir if self.thumbnails is not None else THUMBNAILS_DIR
+            fiche["photo_pdf"] = pdf_photo(self.photo_path, PHOTO_SIZE, cache_dir)
         try:
-            conn_str = (
-                r"DRIVER={Microsoft Access Driver (*.mdb, *.accdb)};"
-                f"DBQ={db_path};"
-            )
-            with pyodbc.connect(conn_str) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT Num_dossier, type_de_dossier, Date_RDV, dossier_etat_paie, photo_de_presentation, dossier_Acces
-                    FROM Donnees_Dossiers
-                """)
-                for row in cursor.fetchall():
-                    try:
-                        raw_date = row.Date_RDV
-                        if isinstance(raw_date, datetime):
-                            date_str = raw_date.strftime("%d/%m/%Y")
-                        elif isinstance(raw_date, str):
-                            date_str = raw_date
-                        elif isinstance(raw_date, int):
-                            try:
-                                date_str = datetime.strptime(str(raw_date), "%Y%m%d").strftime("%d/%m/%Y")
-                            except:
-                                date_str = str(raw_date)
-                        else:
-                            date_str = ""
-
-                        dossiers.append({
-                            "nom": str(row.Num_dossier),
-                            "type": str(row.type_de_dossier or ""),
-                            "date": date_str,
-                            "paiement": str(row.dossier_etat_paie or ""),
-                            "photo": str(row.photo_de_presentation or ""),
-                            "chemin": str(row.dossier_Acces or "")
-                        })
-                    except Exception as e:
-                        print(f"[Erreur ligne] {row}: {e}")
-        except Exception as e:
-            QMessageBox.critical(self, "Erreur Base Access", str(e))
-
-        return dossiers
-
-    def refresh_data(self):
-        self.dossiers = self.get_dossiers_from_access()
-        self.update_filter_options()
-        self.apply_filters()
-
-    def apply_filters(self):
-        search_text = self.search_input.text().lower()
-        selected_type = self.combo_type.currentText()
-        selected_paiement = self.combo_paiement.currentText()
-
-        self.filtered_dossiers = []
-        for dossier in self.dossiers:
-            if search_text and search_text not in dossier["nom"].lower():
-                continue
-            if selected_type != "Tous les types" and dossier["type"] != selected_type:
-                continue
-            if selected_paiement != "Tous les paiements" and dossier["paiement"] != selected_paiement:
-                continue
-            self.filtered_dossiers.append(dossier)
-
-        self.update_table()
-
-    def update_filter_options(self):
-        types = sorted(set(d["type"] for d in self.dossiers if d["type"]))
-        self.combo_type.clear()
-        self.combo_type.addItem("Tous les types")
-        self.combo_type.addItems(types)
-
-    def update_table(self):
-        self.table.setRowCount(len(self.filtered_dossiers))
-
-        for row, dossier in enumerate(self.filtered_dossiers):
-            self.table.setItem(row, 0, QTableWidgetItem(dossier["nom"]))
-            self.table.setItem(row, 1, QTableWidgetItem(dossier["type"]))
-            self.table.setItem(row, 2, QTableWidgetItem(dossier["date"]))
-            self.table.setItem(row, 3, QTableWidgetItem(dossier["paiement"]))
-
-            assainissement = self.manual_states.get(dossier["nom"], {}).get("assainissement", "")
-            dossier_statut = self.manual_states.get(dossier["nom"], {}).get("dossier", "")
-            commentaire = self.manual_states.get(dossier["nom"], {}).get("commentaire", "")
-
-            self.table.setItem(row, 4, QTableWidgetItem(assainissement))
-            self.table.setItem(row, 5, QTableWidgetItem(dossier_statut))
-            self.table.setItem(row, 6, QTableWidgetItem(commentaire))
-
-    def save_manual_states(self, item):
-        row = item.row()
-        col = item.column()
-        if col >= 4:
-            dossier = self.table.item(row, 0).text()
-            if dossier not in self.manual_states:
-                self.manual_states[dossier] = {}
-            if col == 4:
-                self.manual_states[dossier]["assainissement"] = item.text()
-            elif col == 5:
-                self.manual_states[dossier]["dossier"] = item.text()
-            elif col == 6:
-                self.manual_states[dossier]["commentaire"] = item.text()
-
-            with open(MANUAL_STATES_PATH, 'w', encoding='utf-8') as f:
-                json.dump(self.manual_states, f, indent=2, ensure_ascii=False)
-
-    def open_config(self):
-        config_dialog = ConfigWindow(self)
-        if config_dialog.exec_():
-            self.refresh_data()
-
-if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    window = SuiviClientPro()
-    window.show()
-    sys.exit(app.exec_())
+            write_fiche_pdf(fiche, path)
+        except OSError as e:
+            QMessageBox.critical(self, "Export PDF", f"Échec de l'export : {e}")
+            return
+        QMessageBox.information(self, "Export PDF", f"Fiche exportée dans {path}")
@@ -0,0 +1,117 @@
+import re
+
+
+_ONE = re.compile("1")
+
+
+def rows_of(mask):
+    """Positions des bits à 1, dans l'ordre croissant."""
+    return [m.start() for m in _ONE.finditer(format(mask, "b")[::-1])] if mask else []
+
+
+def _bitmap(positions, size):
+    # Construit l'entier en une fois : des « |= 1 << i » successifs seraient quadratiques
+    data = bytearray((size + 7) // 8)
+    for i in positions:
+        data[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(data, "little")
+
+
+class FilterIndex:
+    """Index par colonne pour les filtres du tableau.
+
+    Pour chaque colonne filtrable, chaque valeur a un masque de bits (un
+    entier Python) : le bit i est à 1 si le dossier i a cette valeur.
+    Combiner des filtres revient à quelques ET sur ces entiers, et le nombre
+    de dossiers par valeur (affiché dans les listes déroulantes) à compter
+    les bits d'un ET.
+    """
+
+    def __init__(self, columns):
+        # colonnes de catégorie du DossierStore
+        self.columns = columns
+        self.size = 0
+        self.all = 0
+        # nom -> positions du dossier (DossierStore.positions_of)
+        self.positions_of = lambda nom: ()
+        self.bitmaps = {name: {} for name in columns}
+
+    def rebuild(self, store):
+        self.size = len(store)
+        self.all = (1 << self.size) - 1
+        # Lu dans le store, qui peut grandir pendant un chargement : positions >= size ignorées
+        self.positions_of = store.positions_of
+        for name in self.columns:
+            # Regroupement sur les numéros de valeur du store, sans relire les chaînes
+            by_code = {}
+            for i, code in enumerate(store.codes[name]):
+                by_code.setdefault(code, []).append(i)
+            values = store.categories[name].values
+            self.bitmaps[name] = {values[code]: _bitmap(rows, self.size) for code, rows in by_code.items()}
+
+    def is_current(self, store):
+        return self.size == len(store)
+
+    def update(self, nom, name, value):
+        """Un dossier change de valeur dans une colonne (saisie manuelle)."""
+        bitmaps = self.bitmaps[name]
+        # Toutes les lignes du nom : la saisie vaut pour chacune
+        for i in self.positions_of(nom):
+            if i >= self.size:
+                continue
+            bit = 1 << i
+            # Peu de valeurs par colonne : l'ancienne se retrouve dans les masques
+            old = next((old for old, bitmap in bitmaps.items() if bitmap & bit), None)
+            if old == value:
+                continue
+            if old is not None:
+                bitmaps[old] &= ~bit
+                if not bitmaps[old]:
+                    del bitmaps[old]
+            bitmaps[value] = bitmaps.get(value, 0) | bit
+
+    def mask(self, name, value):
+        return self.bitmaps[name].get(value, 0)
+
+    def mask_of_names(self, noms):
+        size = self.size
+        return _bitmap((i for nom in noms for i in self.positions_of(nom) if i < size), size)
+
+    def mask_of_positions(self, positions):
+        size = self.size
+        return _bitmap((i for i in positions if i < size), size)
+
+    def counts(self, name, within=None):
+        """Nombre de dossiers par valeur de la colonne, parmi ``within`` (masque)."""
+        if within is None:
+            within = self.all
+        return {value: (bitmap & within).bit_count() for value, bitmap in self.bitmaps[name].items()}
+
+    def masks(self, found, criteria):
+        """Masque de chaque critère actif : ``found`` (positions trouvées par
+        la recherche, None sans recherche) et ``criteria`` (colonne -> valeur,
+        None pour « tous »)."""
+        masks = {}
+        if found is not None:
+            masks["recherche"] = self.mask_of_positions(found)
+        for name, value in criteria.items():
+            if value is not None:
+                masks[name] = self.mask(name, value)
+        return masks
+
+    def combine(self, masks, skip=None):
+        """ET des masques, sauf celui de la colonne ``skip``."""
+        result = self.all
+        for name, mask in masks.items():
+            if name != skip:
+                result &= mask
+        return result
+
+    def column_counts(self, masks):
+        """Nombre de dossiers par valeur de chaque colonne, compte tenu des autres critères."""
+        return {name: self.counts(name, self.combine(masks, skip=name)) for name in self.columns}
+
+    def filter(self, found, criteria):
+        """Renvoie (positions des dossiers retenus, nombres par valeur de chaque colonne)."""
+        masks = self.masks(found, criteria)
+        return rows_of(self.combine(masks)), self.column_counts(masks)
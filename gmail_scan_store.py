@@ -0,0 +1,102 @@
+import json
+import os
+import sqlite3
+import threading
+
+
+SCAN_STORE_PATH = "historique_scan.sqlite"
+# Ancien format : deux listes JSON, reprises une fois à l'ouverture du nouvel historique
+LEGACY_HISTORIQUE_PATH = "historique_scan.json"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id TEXT PRIMARY KEY
+);
+
+CREATE TABLE IF NOT EXISTS fichiers (
+    filename TEXT PRIMARY KEY,
+    message_id TEXT
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class ScanStore:
+    """Historique des scans Gmail : messages déjà lus, PDF trouvés et dernier historyId.
+
+    Les identifiants sont gardés en mémoire dans des ensembles (test en O(1)) ;
+    chaque paquet de messages lus est ajouté à la base SQLite sans réécrire
+    le reste de l'historique.
+    """
+
+    def __init__(self, path=SCAN_STORE_PATH, legacy_path=LEGACY_HISTORIQUE_PATH):
+        self.path = path
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+        self.messages = {row[0] for row in self._conn().execute("SELECT id FROM messages")}
+        self.fichiers = {row[0] for row in self._conn().execute("SELECT filename FROM fichiers")}
+        if not self.messages and legacy_path and os.path.exists(legacy_path):
+            self._import_legacy(legacy_path)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _import_legacy(self, legacy_path):
+        try:
+            with open(legacy_path, "r", encoding="utf-8") as f:
+                historique = json.load(f)
+        except (OSError, ValueError):
+            return
+        # L'ancien format ne dit pas quel message portait quel fichier
+        self.add_messages({message_id: [] for message_id in historique.get("messages", [])})
+        new_files = set(historique.get("fichiers", [])) - self.fichiers
+        with self._conn() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO fichiers (filename, message_id) VALUES (?, NULL)",
+                ((filename,) for filename in new_files),
+            )
+        self.fichiers |= new_files
+
+    def is_known(self, message_id):
+        return message_id in self.messages
+
+    def add_messages(self, found):
+        """Enregistre un paquet {id du message: [noms de PDF]} ; renvoie les fichiers nouveaux."""
+        new_files = []
+        for message_id, noms in found.items():
+            for filename in noms:
+                if filename not in self.fichiers:
+                    self.fichiers.add(filename)
+                    new_files.append((filename, message_id))
+        with self._conn() as conn:
+            conn.executemany("INSERT OR IGNORE INTO messages (id) VALUES (?)", ((mid,) for mid in found))
+            conn.executemany("INSERT OR IGNORE INTO fichiers (filename, message_id) VALUES (?, ?)", new_files)
+        self.messages.update(found)
+        return [filename for filename, _ in new_files]
+
+    def all_files(self):
+        return sorted(self.fichiers)
+
+    def history_id(self, label_id):
+        """Dernier historyId synchronisé pour ce label (None : scan complet à faire)."""
+        found = self._conn().execute("SELECT value FROM meta WHERE key = 'history'").fetchone()
+        if not found:
+            return None
+        state = json.loads(found[0])
+        return state["history_id"] if state.get("label_id") == label_id else None
+
+    def set_history_id(self, label_id, history_id):
+        state = json.dumps({"label_id": label_id, "history_id": str(history_id)})
+        with self._conn() as conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('history', ?)", (state,))
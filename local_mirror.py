@@ -0,0 +1,269 @@
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from decimal import Decimal
+
+from access_repository import get_repository
+from delta_dossiers import DeltaRefresher
+
+
+MIRROR_PATH = "suiviclientpro_cache.sqlite"
+
+# Colonnes du tableau principal, recopiées telles quelles pour être indexées ;
+# la ligne complète (fiche client) est conservée en JSON dans "data".
+MIRROR_COLUMNS = (
+    "id", "Num_dossier", "type_de_dossier", "rdv_date", "rdv_heure",
+    "dossier_etat_paie", "photo_de_presentation", "dossier_Acces",
+)
+
+# Champs de la ligne complète repris pour la recherche plein texte. Les noms
+# client_* / donneur_ordre sont ceux de la fiche ; proprietaire_*, bien_ville
+# et dordre_nom sont leurs équivalents dans la table LICIEL.
+SEARCH_COLUMNS = (
+    "client_nom", "client_prenom", "client_ville", "bien_adresse", "donneur_ordre",
+    "proprietaire_nom", "proprietaire_ville", "bien_ville", "dordre_nom",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dossiers (
+    id INTEGER PRIMARY KEY,
+    Num_dossier TEXT NOT NULL,
+    type_de_dossier TEXT,
+    rdv_date TEXT,
+    rdv_heure TEXT,
+    dossier_etat_paie TEXT,
+    photo_de_presentation TEXT,
+    dossier_Acces TEXT,
+    fingerprint TEXT,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_dossiers_num ON dossiers (Num_dossier);
+CREATE INDEX IF NOT EXISTS idx_dossiers_type ON dossiers (type_de_dossier);
+CREATE INDEX IF NOT EXISTS idx_dossiers_paie ON dossiers (dossier_etat_paie);
+CREATE INDEX IF NOT EXISTS idx_dossiers_rdv ON dossiers (rdv_date);
+-- Index sur expression : la sélection des relances ne parcourt que les dossiers avec un reste à payer
+CREATE INDEX IF NOT EXISTS idx_dossiers_restante ON dossiers (json_extract(data, '$.facturation_restante'));
+
+CREATE TABLE IF NOT EXISTS manual_states (
+    Num_dossier TEXT PRIMARY KEY,
+    assainissement TEXT,
+    dossier TEXT,
+    commentaire TEXT
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, Decimal):
+        return float(value)
+    # Champs binaires (objets OLE) : inutiles pour l'affichage
+    return None
+
+
+def _json_object_hook(obj):
+    if "__datetime__" in obj:
+        return datetime.fromisoformat(obj["__datetime__"])
+    return obj
+
+
+def _dumps(value):
+    return json.dumps(value, default=_json_default, ensure_ascii=False)
+
+
+def _loads(text):
+    return json.loads(text, object_hook=_json_object_hook)
+
+
+def _json_fields(columns):
+    # Dates de la ligne JSON ({"__datetime__": ...}) renvoyées en texte ISO
+    return ", ".join(
+        f"COALESCE(json_extract(data, '$.\"{col}\".__datetime__'), json_extract(data, '$.\"{col}\"')) AS \"{col}\""
+        for col in columns
+    )
+
+
+def _to_sqlite(value):
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    if value is None or isinstance(value, (int, float, str)):
+        return value
+    return str(value)
+
+
+class LocalMirror:
+    """Copie SQLite locale de Donnees_Dossiers et des états manuels.
+
+    Le tableau se dessine depuis ce miroir au démarrage ; la synchronisation
+    avec la base Access se fait ensuite en arrière-plan.
+    """
+
+    def __init__(self, path=MIRROR_PATH):
+        self.path = path
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+
+    def _conn(self):
+        # Une connexion par thread : sqlite3 ne partage pas ses connexions
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def list_rows(self):
+        columns = ", ".join(
+            MIRROR_COLUMNS + tuple(f"json_extract(data, '$.{col}') AS {col}" for col in SEARCH_COLUMNS)
+        )
+        rows = []
+        for row in self._conn().execute(f"SELECT {columns} FROM dossiers ORDER BY id"):
+            row = dict(row)
+            if row["rdv_date"]:
+                try:
+                    row["rdv_date"] = datetime.fromisoformat(row["rdv_date"])
+                except ValueError:
+                    # Date saisie en texte libre dans LICIEL : gardée telle quelle
+                    pass
+            rows.append(row)
+        return rows
+
+    def list_columns(self, columns):
+        """Quelques champs de chaque ligne complète, extraits par SQLite sans décoder le JSON en Python.
+
+        Les dates sont renvoyées en texte ISO.
+        """
+        return [dict(row) for row in self._conn().execute(f"SELECT {_json_fields(columns)} FROM dossiers")]
+
+    def list_unpaid(self, columns):
+        """Comme list_columns, pour les seuls dossiers qui ont un reste à payer."""
+        # Même expression que l'index idx_dossiers_restante, sinon SQLite ne l'utilise pas
+        return [
+            dict(row) for row in self._conn().execute(
+                f"SELECT {_json_fields(columns)} FROM dossiers "
+                "WHERE json_extract(data, '$.facturation_restante') > 0"
+            )
+        ]
+
+    def get_row(self, dossier_id):
+        found = self._conn().execute(
+            "SELECT data FROM dossiers WHERE id = ?", (dossier_id,)
+        ).fetchone()
+        return _loads(found["data"]) if found else None
+
+    def get_rows(self, ids):
+        """Lignes complètes de plusieurs dossiers en une requête : {id: ligne}."""
+        ids = list(ids)
+        if not ids:
+            return {}
+        placeholders = ", ".join("?" for _ in ids)
+        return {
+            found["id"]: _loads(found["data"])
+            for found in self._conn().execute(
+                f"SELECT id, data FROM dossiers WHERE id IN ({placeholders})", ids
+            )
+        }
+
+    def _upsert_rows(self, conn, rows, refresher):
+        placeholders = ", ".join("?" for _ in MIRROR_COLUMNS)
+        conn.executemany(
+            f"INSERT OR REPLACE INTO dossiers ({', '.join(MIRROR_COLUMNS)}, fingerprint, data) "
+            f"VALUES ({placeholders}, ?, ?)",
+            (
+                tuple(_to_sqlite(row.get(col)) for col in MIRROR_COLUMNS)
+                + (refresher.known[row["id"]][1], _dumps(row))
+                for row in rows
+            ),
+        )
+
+    def apply_delta(self, delta, refresher):
+        with self._conn() as conn:
+            if delta.full:
+                conn.execute("DELETE FROM dossiers")
+            elif delta.removed:
+                conn.executemany(
+                    "DELETE FROM dossiers WHERE id = ?", ((dossier_id,) for dossier_id in delta.removed)
+                )
+            self._upsert_rows(conn, delta.added + delta.modified, refresher)
+            self._save_refresher_state(conn, refresher)
+
+    def _save_refresher_state(self, conn, refresher):
+        state = {
+            "db_path": refresher.db_path,
+            "signature": refresher.signature,
+            "summary": refresher.summary,
+        }
+        conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('refresher', ?)", (_dumps(state),)
+        )
+
+    def load_refresher(self, refresher, db_path):
+        """Recharge l'état de synchronisation pour ne relire que le delta au prochain démarrage."""
+        found = self._conn().execute("SELECT value FROM meta WHERE key = 'refresher'").fetchone()
+        if not found:
+            return False
+        state = _loads(found["value"])
+        if state.get("db_path") != db_path or not state.get("summary"):
+            return False
+        refresher.db_path = db_path
+        refresher.signature = tuple(state["signature"]) if state["signature"] else None
+        refresher.summary = tuple(state["summary"])
+        refresher.known = {
+            row["id"]: (row["Num_dossier"], row["fingerprint"])
+            for row in self._conn().execute("SELECT id, Num_dossier, fingerprint FROM dossiers")
+        }
+        return True
+
+    def replace_manual_states(self, manual_states):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM manual_states")
+            conn.executemany(
+                "INSERT INTO manual_states (Num_dossier, assainissement, dossier, commentaire) VALUES (?, ?, ?, ?)",
+                (
+                    (nom, state.get("assainissement", ""), state.get("dossier", ""), state.get("commentaire", ""))
+                    for nom, state in manual_states.items()
+                ),
+            )
+
+    def save_manual_state(self, num_dossier, state):
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO manual_states (Num_dossier, assainissement, dossier, commentaire) VALUES (?, ?, ?, ?)",
+                (num_dossier, state.get("assainissement", ""), state.get("dossier", ""), state.get("commentaire", "")),
+            )
+
+
+def new_mirror_refresher():
+    # Le miroir garde la ligne complète : l'empreinte porte sur toutes les colonnes
+    return DeltaRefresher(full_query="miroir_complet", delta_query="miroir_modifies")
+
+
+def sync_from_access(mirror, refresher, db_path, control=None):
+    """Met le miroir à jour depuis Access et renvoie le delta appliqué (thread de fond).
+
+    ``control`` (voir workers.Task) reçoit les paquets d'une relecture complète
+    au fil de l'eau et permet de l'annuler entre deux paquets.
+    """
+    on_batch = None
+    if control is not None:
+        def on_batch(rows, done, total):
+            control.check_cancelled()
+            control.emit_batch(rows)
+            control.emit_progress(done, total)
+
+    delta = refresher.refresh(get_repository(db_path), db_path, on_batch)
+    if control is not None:
+        control.check_cancelled()
+    if delta.full or not delta.is_empty():
+        mirror.apply_delta(delta, refresher)
+    return delta
@@ -0,0 +1,158 @@
+import json
+import os
+import re
+import shutil
+import threading
+
+
+MANUAL_STATES_PATH = "manual_states.json"
+JOURNAL_SUFFIX = ".journal"
+# Au-delà, le journal est fusionné dans l'instantané (en arrière-plan)
+COMPACT_THRESHOLD = 500
+
+_ENTRY_START = re.compile(r'"((?:[^"\\]|\\.)*)"\s*:\s*\{')
+
+
+def _salvage_entries(text):
+    """Relit un instantané tronqué ou abîmé : garde chaque entrée encore lisible."""
+    decoder = json.JSONDecoder()
+    states = {}
+    pos = 0
+    while True:
+        match = _ENTRY_START.search(text, pos)
+        if not match:
+            return states
+        try:
+            state, end = decoder.raw_decode(text, match.end() - 1)
+        except ValueError:
+            pos = match.end()
+            continue
+        if isinstance(state, dict):
+            states[json.loads(f'"{match.group(1)}"')] = state
+        pos = end
+
+
+class ManualStatesStore:
+    """États manuels (assainissement, dossier, commentaire) enregistrés par journal.
+
+    Chaque modification ajoute une ligne JSON au journal (une écriture de
+    quelques octets, synchronisée sur disque). L'instantané
+    ``manual_states.json`` n'est réécrit qu'à la compaction, dans un fichier
+    temporaire remplacé d'un bloc : une coupure ne laisse jamais de fichier
+    à moitié écrit. Au chargement, le journal est rejoué sur l'instantané.
+    """
+
+    def __init__(self, path=MANUAL_STATES_PATH):
+        self.path = path
+        self.journal_path = path + JOURNAL_SUFFIX
+        self.journal_entries = 0
+        # Entrées récupérées d'un instantané abîmé (None : fichier sain)
+        self.recovered = None
+        self._lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+        self._journal = None
+        # Position dans le flux du journal depuis l'ouverture : octets déjà
+        # retirés par les compactions, et fin de la dernière compaction
+        self._journal_start = 0
+        self._compacted = 0
+
+    def load(self):
+        states = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                text = f.read()
+            try:
+                states = json.loads(text) if text.strip() else {}
+            except ValueError:
+                states = _salvage_entries(text)
+                self.recovered = len(states)
+                # Copie de l'original avant que la compaction ne le remplace
+                shutil.copyfile(self.path, self.path + ".corrompu")
+
+        self.journal_entries = 0
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Dernière ligne interrompue par une coupure : ignorée
+                        continue
+                    if not isinstance(entry, dict) or not {"nom", "field", "value"} <= entry.keys():
+                        # Ligne lisible mais incomplète : ignorée comme une ligne interrompue
+                        continue
+                    states.setdefault(entry["nom"], {})[entry["field"]] = entry["value"]
+                    self.journal_entries += 1
+        return states
+
+    def _open_journal(self):
+        if self._journal is None:
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+        return self._journal
+
+    def record(self, nom, field, value):
+        line = json.dumps({"nom": nom, "field": field, "value": value}, ensure_ascii=False)
+        with self._lock:
+            journal = self._open_journal()
+            journal.write(line + "\n")
+            journal.flush()
+            os.fsync(journal.fileno())
+            self.journal_entries += 1
+
+    def needs_compaction(self):
+        return self.journal_entries >= COMPACT_THRESHOLD or self.recovered is not None
+
+    def journal_offset(self):
+        """Position de fin du journal, à lire en même temps que la copie des états passée à ``compact``."""
+        with self._lock:
+            if self._journal is not None:
+                self._journal.flush()
+            size = os.path.getsize(self.journal_path) if os.path.exists(self.journal_path) else 0
+            return self._journal_start + size
+
+    def compact(self, states, offset):
+        """Écrit ``states`` comme nouvel instantané et retire du journal les lignes avant ``offset``.
+
+        ``states`` et ``offset`` sont pris ensemble (``journal_offset``) : les
+        lignes ajoutées au journal après la copie des états sont conservées.
+        Une copie plus ancienne que la dernière compaction est ignorée.
+        """
+        with self._compact_lock:
+            if offset < self._compacted:
+                return
+            self._compact(states, offset)
+
+    def _compact(self, states, offset):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(states, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+        # Un rejeu en trop est sans effet (chaque ligne fixe une valeur) :
+        # une coupure entre ces deux étapes ne perd rien
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            tail = b""
+            if os.path.exists(self.journal_path):
+                with open(self.journal_path, "rb") as f:
+                    f.seek(offset - self._journal_start)
+                    tail = f.read()
+            tmp_journal = self.journal_path + ".tmp"
+            with open(tmp_journal, "wb") as f:
+                f.write(tail)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_journal, self.journal_path)
+            self.journal_entries = tail.count(b"\n")
+            self._journal_start = self._compacted = offset
+            self.recovered = None
+
+    def close(self):
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
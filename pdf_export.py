@@ -0,0 +1,297 @@
+import os
+import re
+import textwrap
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+
+# Format A4 en points PDF
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+MARGIN = 50
+LINE_HEIGHT = 15
+VALUE_X = 210
+PHOTO_SIZE = 120
+# En dessous, les fiches sont écrites dans le processus courant : lancer
+# des processus coûterait plus cher que l'export lui-même
+PROCESS_THRESHOLD = 20
+CHUNK_SIZE = 16
+
+# Sections de la fiche : (titre, [(libellé, clé dans les données de la fiche)])
+FICHE_SECTIONS = (
+    ("Données du dossier", (
+        ("Nom du dossier", "nom_du_dossier"),
+        ("Type de mission", "type_de_mission"),
+        ("Date & Heure", "date_&_heure"),
+        ("Statut de paiement", "statut_paiement"),
+        ("Assainissement", "assainissement"),
+        ("Statut dossier", "dossier"),
+    )),
+    ("Informations du client", (
+        ("Nom", "client_nom"),
+        ("Prénom", "client_prenom"),
+        ("Adresse", "client_adresse"),
+        ("Code postal", "client_cp"),
+        ("Ville", "client_ville"),
+        ("Email", "client_email"),
+        ("Téléphone", "client_tel"),
+    )),
+    ("Adresse du bien", (
+        ("Adresse", "bien_adresse"),
+        ("Code postal", "bien_cp"),
+        ("Ville", "bien_ville"),
+    )),
+    ("Donneur d'ordre", (
+        ("Nom donneur d'ordre", "donneur_ordre"),
+    )),
+    ("Facturation", (
+        ("Montant TTC", "montant_ttc"),
+        ("Montant payé", "montant_paye"),
+        ("Reste à payer", "reste_a_payer"),
+    )),
+)
+
+# Objets communs à toutes les fiches : 1 catalogue, 2 arbre des pages, 3 et 4 polices
+CATALOG_ID, PAGES_ID, FONT_ID, BOLD_FONT_ID = 1, 2, 3, 4
+FIRST_FREE_ID = 5
+
+
+def _pdf_text(value):
+    # Polices standard en WinAnsiEncoding : cp1252 couvre les accents français
+    data = str(value).encode("cp1252", "replace")
+    return b"(" + data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+def _text(x, y, value, font=b"F1", size=10):
+    return b"BT /%s %d Tf %d %d Td %s Tj ET\n" % (font, size, x, y, _pdf_text(value))
+
+
+@lru_cache(maxsize=None)
+def fiche_template():
+    """Partie fixe de la fiche (titres, libellés, filets) et position de chaque valeur.
+
+    Calculée une fois par processus ; chaque fiche n'ajoute que ses valeurs.
+    """
+    parts = []
+    positions = []
+    # Sous le titre et la photo
+    y = PAGE_HEIGHT - MARGIN - 30 - PHOTO_SIZE
+    for title, rows in FICHE_SECTIONS:
+        y -= LINE_HEIGHT
+        parts.append(_text(MARGIN, y, title, b"F2", 12))
+        parts.append(b"0.6 G %d %d m %d %d l S 0 G\n" % (MARGIN, y - 4, PAGE_WIDTH - MARGIN, y - 4))
+        y -= LINE_HEIGHT + 4
+        for label, key in rows:
+            parts.append(_text(MARGIN + 10, y, f"{label} :"))
+            positions.append((key, y))
+            y -= LINE_HEIGHT
+        y -= 6
+    return b"".join(parts), tuple(positions), y
+
+
+@lru_cache(maxsize=None)
+def _common_objects():
+    return (
+        (CATALOG_ID, b"<< /Type /Catalog /Pages %d 0 R >>" % PAGES_ID),
+        (FONT_ID, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"),
+        (BOLD_FONT_ID, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>"),
+    )
+
+
+def jpeg_info(data):
+    """(largeur, hauteur, composantes) d'un JPEG, ou None si ce n'en est pas un."""
+    if data[:2] != b"\xff\xd8":
+        return None
+    i = 2
+    while i + 9 < len(data):
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            i += 2
+            continue
+        length = int.from_bytes(data[i + 2:i + 4], "big")
+        # Marqueurs SOF (début d'image), sauf DHT / JPG / DAC qui partagent la plage
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            height = int.from_bytes(data[i + 5:i + 7], "big")
+            width = int.from_bytes(data[i + 7:i + 9], "big")
+            return width, height, data[i + 9]
+        i += 2 + length
+    return None
+
+
+class PdfWriter:
+    """Écrit un PDF objet par objet directement dans le fichier : rien n'est gardé en mémoire
+    à part la position de chaque objet pour la table de références."""
+
+    def __init__(self, f):
+        self.f = f
+        self.offsets = {}
+        self.next_id = FIRST_FREE_ID
+        self.page_ids = []
+        self.f.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def new_id(self):
+        obj_id = self.next_id
+        self.next_id += 1
+        return obj_id
+
+    def write_object(self, obj_id, body):
+        self.offsets[obj_id] = self.f.tell()
+        self.f.write(b"%d 0 obj\n" % obj_id + body + b"\nendobj\n")
+
+    def write_stream(self, obj_id, data, extra=b""):
+        self.write_object(obj_id, b"<< /Length %d %s>>\nstream\n" % (len(data), extra) + data + b"\nendstream")
+
+    def add_page(self, content, images=()):
+        """``images`` : [(nom, id de l'objet image)]."""
+        page_id, content_id = self.new_id(), self.new_id()
+        self.write_stream(content_id, content)
+        xobjects = b"".join(b"/%s %d 0 R " % (name, image_id) for name, image_id in images)
+        self.write_object(page_id, (
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] /Contents %d 0 R "
+            b"/Resources << /Font << /F1 %d 0 R /F2 %d 0 R >> /XObject << %s>> >> >>"
+        ) % (PAGES_ID, PAGE_WIDTH, PAGE_HEIGHT, content_id, FONT_ID, BOLD_FONT_ID, xobjects))
+        self.page_ids.append(page_id)
+
+    def add_jpeg(self, data):
+        """Image JPEG intégrée telle quelle (DCTDecode), sans la décoder ; renvoie (id, largeur, hauteur)."""
+        info = jpeg_info(data)
+        if info is None:
+            return None
+        width, height, components = info
+        colorspace = {1: b"/DeviceGray", 4: b"/DeviceCMYK"}.get(components, b"/DeviceRGB")
+        image_id = self.new_id()
+        self.write_stream(image_id, data, (
+            b"/Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace %s "
+            b"/BitsPerComponent 8 /Filter /DCTDecode "
+        ) % (width, height, colorspace))
+        return image_id, width, height
+
+    def close(self):
+        for obj_id, body in _common_objects():
+            self.write_object(obj_id, body)
+        kids = b" ".join(b"%d 0 R" % page_id for page_id in self.page_ids)
+        self.write_object(PAGES_ID, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self.page_ids)))
+        xref = self.f.tell()
+        size = self.next_id
+        self.f.write(b"xref\n0 %d\n0000000000 65535 f \n" % size)
+        for obj_id in range(1, size):
+            self.f.write(b"%010d 00000 n \n" % self.offsets.get(obj_id, 0))
+        self.f.write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, CATALOG_ID, xref))
+
+
+def _read_photo(path):
+    if not path:
+        return None
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _write_fiche(writer, fiche):
+    static, positions, y = fiche_template()
+    parts = [_text(MARGIN, PAGE_HEIGHT - MARGIN - 10, f"Fiche client - {fiche.get('nom_du_dossier', '')}", b"F2", 16), static]
+    for key, value_y in positions:
+        value = fiche.get(key) or ""
+        if value:
+            parts.append(_text(VALUE_X, value_y, value))
+
+    images = []
+    # Miniature de la fiche si c'est un JPEG (cache des miniatures ou photo d'origine)
+    photo = _read_photo(fiche.get("photo_pdf"))
+    image = writer.add_jpeg(photo) if photo else None
+    if image is not None:
+        image_id, width, height = image
+        scale = PHOTO_SIZE / max(width, height)
+        w, h = width * scale, height * scale
+        x, top = PAGE_WIDTH - MARGIN - PHOTO_SIZE, PAGE_HEIGHT - MARGIN - 20
+        parts.append(b"q %.2f 0 0 %.2f %.2f %.2f cm /Im1 Do Q\n" % (w, h, x, top - h))
+        images.append((b"Im1", image_id))
+
+    # Blocs de longueur variable à la suite de la partie fixe, sur d'autres pages au besoin
+    lines = []
+    rapports = fiche.get("rapports") or []
+    lines.append(("Rapports DDT", [str(r) for r in rapports] or ["Aucun"]))
+    commentaires = str(fiche.get("commentaires") or "")
+    if commentaires:
+        lines.append(("Commentaires", [
+            wrapped for paragraph in commentaires.splitlines() for wrapped in (textwrap.wrap(paragraph, 90) or [""])
+        ]))
+    for title, block in lines:
+        if y < MARGIN + 3 * LINE_HEIGHT:
+            writer.add_page(b"".join(parts), images)
+            parts, images, y = [], [], PAGE_HEIGHT - MARGIN
+        y -= LINE_HEIGHT
+        parts.append(_text(MARGIN, y, title, b"F2", 12))
+        parts.append(b"0.6 G %d %d m %d %d l S 0 G\n" % (MARGIN, y - 4, PAGE_WIDTH - MARGIN, y - 4))
+        y -= LINE_HEIGHT + 4
+        for line in block:
+            if y < MARGIN:
+                writer.add_page(b"".join(parts), images)
+                parts, images, y = [], [], PAGE_HEIGHT - MARGIN - LINE_HEIGHT
+            parts.append(_text(MARGIN + 10, y, line))
+            y -= LINE_HEIGHT
+        y -= 6
+    writer.add_page(b"".join(parts), images)
+
+
+def fiche_filename(fiche):
+    name = re.sub(r"[^\w.-]+", "_", str(fiche.get("nom_du_dossier") or "")) or "dossier"
+    return f"fiche_{name}.pdf"
+
+
+def write_fiche_pdf(fiche, path):
+    """Écrit la fiche dans ``path`` (fichier temporaire puis remplacement)."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        writer = PdfWriter(f)
+        _write_fiche(writer, fiche)
+        writer.close()
+    os.replace(tmp_path, path)
+    return path
+
+
+def _export_one(job):
+    # Exécuté dans un processus de travail : renvoie (dossier, erreur ou None)
+    fiche, folder = job
+    try:
+        write_fiche_pdf(fiche, os.path.join(folder, fiche_filename(fiche)))
+        return fiche.get("nom_du_dossier", ""), None
+    except Exception as e:
+        return fiche.get("nom_du_dossier", ""), str(e)
+
+
+def export_fiches(fiches, folder, control=None, processes=None):
+    """Un PDF par fiche dans ``folder`` (thread de fond) ; renvoie (nombre écrit, erreurs).
+
+    Au-delà de quelques fiches, le travail est réparti sur un pool de processus.
+    """
+    os.makedirs(folder, exist_ok=True)
+    jobs = [(fiche, folder) for fiche in fiches]
+    done = 0
+    errors = []
+
+    def collect(results):
+        nonlocal done
+        for i, (nom, error) in enumerate(results, 1):
+            if error is None:
+                done += 1
+            else:
+                errors.append(f"{nom} : {error}")
+            if control is not None:
+                control.check_cancelled()
+                control.emit_progress(i, len(jobs))
+
+    if len(jobs) <= PROCESS_THRESHOLD:
+        collect(map(_export_one, jobs))
+        return done, errors
+    pool = ProcessPoolExecutor(processes)
+    try:
+        collect(pool.map(_export_one, jobs, chunksize=CHUNK_SIZE))
+    finally:
+        # Annulation : les paquets pas encore commencés sont abandonnés
+        pool.shutdown(cancel_futures=True)
+    return done, errors
@@ -0,0 +1,30 @@
+import hashlib
+import os
+
+
+THUMBNAILS_DIR = "miniatures"
+
+
+def resolve_photo_path(photo, folder=""):
+    """Chemin de la photo de présentation : relatif au dossier du client s'il n'est pas absolu."""
+    if not photo:
+        return ""
+    if not os.path.isabs(photo) and folder:
+        return os.path.join(folder, photo)
+    return photo
+
+
+def thumbnail_path(path, size, cache_dir=THUMBNAILS_DIR):
+    """Fichier de la miniature sur disque : change dès que la photo est modifiée."""
+    st = os.stat(path)
+    key = f"{os.path.normcase(os.path.abspath(path))}|{st.st_mtime_ns}|{st.st_size}|{size}"
+    return os.path.join(cache_dir, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".jpg")
+
+
+def pdf_photo(path, size, cache_dir=THUMBNAILS_DIR):
+    """JPEG à intégrer dans une fiche PDF : la miniature si elle est déjà en cache, sinon la photo."""
+    try:
+        cached = thumbnail_path(path, size, cache_dir)
+    except OSError:
+        return ""
+    return cached if os.path.exists(cached) else path
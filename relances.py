@@ -0,0 +1,289 @@
+import os
+import re
+import smtplib
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from email.message import EmailMessage
+from email.utils import formatdate, make_msgid
+from string import Template
+
+from statistiques import parse_amount
+
+
+RELANCES_DIR = "relances"
+RELANCES_STORE_PATH = "historique_relances.sqlite"
+# Threads de préparation des messages (mise en forme et écriture des .eml)
+RENDER_THREADS = 4
+# Délai minimal entre deux envois SMTP : les fournisseurs limitent le débit
+DEFAULT_SEND_INTERVAL = 0.5
+# Nombre d'envois enregistrés ensemble dans l'historique
+HISTORY_BATCH_SIZE = 50
+
+MODE_EML = "eml"
+MODE_SMTP = "smtp"
+
+# Champs de la ligne complète utiles aux relances. Le client s'appelle
+# client_* dans la fiche et proprietaire_* dans LICIEL, le donneur d'ordre
+# donneur_ordre / dordre_*.
+RELANCE_COLUMNS = (
+    "Num_dossier", "type_de_dossier", "rdv_date", "dossier_etat_paie",
+    "facturation_ttc", "facturation_paye", "facturation_restante",
+    "client_nom", "client_prenom", "client_email",
+    "proprietaire_nom", "proprietaire_mail",
+    "donneur_ordre", "dordre_nom", "dordre_mail",
+)
+
+DEFAULT_SUBJECT = "Relance - dossier $dossier : reste à payer $reste"
+DEFAULT_BODY = """Bonjour $client,
+
+Sauf erreur de notre part, la facture du dossier $dossier ($mission du $date_rdv) présente un reste à payer de $reste sur un montant total de $ttc.
+
+Nous vous remercions de bien vouloir procéder à son règlement dans les meilleurs délais. Si celui-ci a été effectué entre-temps, merci de ne pas tenir compte de ce message.
+
+Cordialement,
+$expediteur
+"""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS relances (
+    Num_dossier TEXT NOT NULL,
+    envoye_le TEXT NOT NULL,
+    mode TEXT,
+    destinataire TEXT,
+    reste REAL
+);
+CREATE INDEX IF NOT EXISTS idx_relances_dossier ON relances (Num_dossier, envoye_le);
+"""
+
+
+def _euros(value):
+    return f"{value:,.2f} €".replace(",", " ").replace(".", ",")
+
+
+def _date_fr(value):
+    if not value:
+        return ""
+    try:
+        return datetime.fromisoformat(str(value)).strftime("%d/%m/%Y")
+    except ValueError:
+        # Date saisie en texte libre dans LICIEL
+        return str(value)
+
+
+def relance_fields(row):
+    """Valeurs disponibles dans les modèles ($dossier, $client, $reste...)."""
+    nom = row.get("client_nom") or row.get("proprietaire_nom") or ""
+    prenom = row.get("client_prenom") or ""
+    return {
+        "dossier": str(row.get("Num_dossier") or ""),
+        "client": f"{prenom} {nom}".strip(),
+        "email": str(row.get("client_email") or row.get("proprietaire_mail") or row.get("dordre_mail") or "").strip(),
+        "donneur_ordre": str(row.get("donneur_ordre") or row.get("dordre_nom") or ""),
+        "mission": str(row.get("type_de_dossier") or ""),
+        "date_rdv": _date_fr(row.get("rdv_date")),
+        "etat_paie": str(row.get("dossier_etat_paie") or ""),
+        "ttc": _euros(parse_amount(row.get("facturation_ttc"))),
+        "paye": _euros(parse_amount(row.get("facturation_paye"))),
+        "reste": _euros(parse_amount(row.get("facturation_restante"))),
+        "montant_reste": parse_amount(row.get("facturation_restante")),
+    }
+
+
+def select_relances(mirror):
+    """Dossiers impayés ou partiellement payés, du plus gros reste au plus petit."""
+    candidates = [relance_fields(row) for row in mirror.list_unpaid(RELANCE_COLUMNS)]
+    # Reste saisi en texte dans LICIEL : SQLite le compare mal, on revérifie ici
+    candidates = [fields for fields in candidates if fields["montant_reste"] > 0]
+    candidates.sort(key=lambda fields: fields["montant_reste"], reverse=True)
+    return candidates
+
+
+def render_relance(fields, subject, body, sender=""):
+    """Message de relance d'un dossier ; ``subject`` et ``body`` sont des string.Template."""
+    values = dict(fields, expediteur=sender)
+    message = EmailMessage()
+    message["Subject"] = subject.safe_substitute(values)
+    if sender:
+        message["From"] = sender
+    if fields["email"]:
+        message["To"] = fields["email"]
+    message["Date"] = formatdate(localtime=True)
+    message["Message-ID"] = make_msgid()
+    message.set_content(body.safe_substitute(values))
+    return message
+
+
+class RelanceHistory:
+    """Historique des relances : une ligne par message produit (brouillon ou envoi)."""
+
+    def __init__(self, path=RELANCES_STORE_PATH):
+        self.path = path
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def last_sent(self):
+        """{dossier: date ISO de la dernière relance}."""
+        return dict(self._conn().execute("SELECT Num_dossier, MAX(envoye_le) FROM relances GROUP BY Num_dossier"))
+
+    def record(self, entries):
+        """``entries`` : (dossier, date ISO, mode, destinataire, reste)."""
+        with self._conn() as conn:
+            conn.executemany(
+                "INSERT INTO relances (Num_dossier, envoye_le, mode, destinataire, reste) VALUES (?, ?, ?, ?, ?)",
+                entries,
+            )
+
+
+class EmlWriter:
+    """Brouillons .eml, à ouvrir et envoyer depuis le logiciel de messagerie."""
+
+    mode = MODE_EML
+    # Écriture de fichiers indépendants : faite par les threads de préparation
+    parallel = True
+
+    def __init__(self, folder=RELANCES_DIR):
+        self.folder = folder
+
+    def __enter__(self):
+        os.makedirs(self.folder, exist_ok=True)
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def deliver(self, message, fields):
+        name = re.sub(r"[^\w.-]+", "_", fields["dossier"]) or "dossier"
+        # Ouvert par Outlook comme un message à envoyer, pas comme un message reçu
+        message["X-Unsent"] = "1"
+        path = os.path.join(self.folder, f"relance_{name}_{datetime.now():%Y%m%d}.eml")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(message.as_bytes())
+        os.replace(tmp_path, path)
+        return path
+
+
+class SmtpSender:
+    """Envoi par SMTP sur une seule connexion, avec un délai minimal entre deux messages.
+
+    ``smtp_factory`` permet de remplacer smtplib.SMTP (serveur local de test).
+    """
+
+    mode = MODE_SMTP
+    parallel = False
+
+    def __init__(self, host, port=587, user="", password="", starttls=True,
+                 interval=DEFAULT_SEND_INTERVAL, smtp_factory=smtplib.SMTP):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.starttls = starttls
+        self.interval = interval
+        self.smtp_factory = smtp_factory
+        self._smtp = None
+        self._last_send = 0.0
+
+    def __enter__(self):
+        self._smtp = self.smtp_factory(self.host, self.port, timeout=30)
+        if self.starttls:
+            self._smtp.starttls()
+        if self.user:
+            self._smtp.login(self.user, self.password)
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            self._smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+        self._smtp = None
+        return False
+
+    def deliver(self, message, fields):
+        if not fields["email"]:
+            raise ValueError("aucune adresse e-mail")
+        wait = self._last_send + self.interval - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        self._smtp.send_message(message)
+        self._last_send = time.monotonic()
+        return fields["email"]
+
+
+def output_from_config(config, mode):
+    if mode == MODE_SMTP:
+        if not config.get("smtp_host"):
+            raise ValueError("Serveur SMTP non paramétré (smtp_host dans config_suiviclientpro.json).")
+        return SmtpSender(
+            config["smtp_host"],
+            int(config.get("smtp_port", 587)),
+            config.get("smtp_user", ""),
+            config.get("smtp_password", ""),
+            bool(config.get("smtp_starttls", True)),
+            float(config.get("relance_intervalle", DEFAULT_SEND_INTERVAL)),
+        )
+    return EmlWriter(config.get("relances_dossier") or RELANCES_DIR)
+
+
+def generer_relances(candidates, subject, body, sender, output, history, control=None):
+    """Produit une relance par dossier (thread de fond) ; renvoie (nombre produit, erreurs).
+
+    Les messages sont préparés en parallèle ; les envois SMTP partent ensuite
+    un par un sur la même connexion. L'historique est complété par paquets,
+    une annulation garde donc la trace de ce qui est déjà parti.
+    """
+    subject, body = Template(subject), Template(body)
+
+    def prepare(fields):
+        try:
+            message = render_relance(fields, subject, body, sender)
+            destination = output.deliver(message, fields) if output.parallel else None
+            return fields, message, destination, None
+        except Exception as e:
+            return fields, None, None, str(e)
+
+    done = 0
+    errors = []
+    entries = []
+    pool = ThreadPoolExecutor(RENDER_THREADS)
+    try:
+        with output:
+            for i, (fields, message, destination, error) in enumerate(pool.map(prepare, candidates), 1):
+                if control is not None:
+                    control.check_cancelled()
+                if error is None and not output.parallel:
+                    try:
+                        destination = output.deliver(message, fields)
+                    except (smtplib.SMTPException, OSError, ValueError) as e:
+                        error = str(e)
+                if error is None:
+                    done += 1
+                    entries.append((fields["dossier"], datetime.now().isoformat(timespec="seconds"),
+                                    output.mode, destination, fields["montant_reste"]))
+                else:
+                    errors.append(f"{fields['dossier']} : {error}")
+                if len(entries) >= HISTORY_BATCH_SIZE:
+                    history.record(entries)
+                    entries = []
+                if control is not None:
+                    control.emit_progress(i, len(candidates))
+    finally:
+        # Annulation : les messages pas encore préparés sont abandonnés, et ceux
+        # déjà partis figurent quand même dans l'historique
+        pool.shutdown(cancel_futures=True)
+        history.record(entries)
+    return done, errors
@@ -0,0 +1,190 @@
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QTextEdit, QComboBox, QPushButton,
+    QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView, QProgressBar, QMessageBox
+)
+from PyQt5.QtCore import Qt
+
+from relances import (
+    DEFAULT_BODY, DEFAULT_SUBJECT, MODE_EML, MODE_SMTP,
+    RelanceHistory, generer_relances, output_from_config, select_relances
+)
+from workers import run_in_background
+
+
+HEADERS = ["", "Dossier", "Client", "E-mail", "Reste à payer", "Statut paiement", "Dernière relance"]
+CHECK_COLUMN = 0
+LAST_COLUMN = 6
+
+
+def load_candidates(mirror, history):
+    """Thread de fond : dossiers à relancer et date de leur dernière relance."""
+    return select_relances(mirror), history.last_sent()
+
+
+class RelancesWindow(QDialog):
+    def __init__(self, mirror, config, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Relances des impayés")
+        self.setMinimumSize(1000, 650)
+        self.mirror = mirror
+        self.config = config
+        self.history = RelanceHistory()
+        self.candidates = []
+        self.task = None
+
+        layout = QVBoxLayout()
+        self.summary_label = QLabel("Recherche des dossiers impayés…")
+        layout.addWidget(self.summary_label)
+
+        self.table = QTableWidget(0, len(HEADERS))
+        self.table.setHorizontalHeaderLabels(HEADERS)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table.horizontalHeader().setSectionResizeMode(CHECK_COLUMN, QHeaderView.ResizeToContents)
+        layout.addWidget(self.table)
+
+        check_layout = QHBoxLayout()
+        btn_all = QPushButton("Tout cocher")
+        btn_all.clicked.connect(lambda: self.set_all_checked(True))
+        btn_none = QPushButton("Tout décocher")
+        btn_none.clicked.connect(lambda: self.set_all_checked(False))
+        check_layout.addWidget(btn_all)
+        check_layout.addWidget(btn_none)
+        check_layout.addStretch()
+        layout.addLayout(check_layout)
+
+        # Modèle du message : $dossier, $client, $mission, $date_rdv, $ttc, $paye, $reste, $expediteur
+        layout.addWidget(QLabel("Objet :"))
+        self.subject_input = QLineEdit(config.get("relance_sujet") or DEFAULT_SUBJECT)
+        layout.addWidget(self.subject_input)
+        layout.addWidget(QLabel("Message ($dossier, $client, $mission, $date_rdv, $ttc, $paye, $reste, $expediteur) :"))
+        self.body_input = QTextEdit()
+        self.body_input.setPlainText(config.get("relance_modele") or DEFAULT_BODY)
+        layout.addWidget(self.body_input)
+
+        action_layout = QHBoxLayout()
+        self.combo_mode = QComboBox()
+        self.combo_mode.addItem("Brouillons .eml", MODE_EML)
+        self.combo_mode.addItem("Envoi SMTP", MODE_SMTP)
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setVisible(False)
+        self.btn_generer = QPushButton("📧 Générer les relances")
+        self.btn_generer.setEnabled(False)
+        self.btn_generer.clicked.connect(self.generer)
+        self.btn_annuler = QPushButton("Annuler")
+        self.btn_annuler.setVisible(False)
+        self.btn_annuler.clicked.connect(self.annuler)
+        action_layout.addWidget(self.combo_mode)
+        action_layout.addWidget(self.progress_bar)
+        action_layout.addStretch()
+        action_layout.addWidget(self.btn_annuler)
+        action_layout.addWidget(self.btn_generer)
+        layout.addLayout(action_layout)
+        self.setLayout(layout)
+
+        run_in_background(
+            load_candidates, mirror, self.history,
+            on_finished=self.on_candidates_loaded,
+            on_failed=lambda message: self.summary_label.setText(f"Erreur : {message}"),
+        )
+
+    def on_candidates_loaded(self, result):
+        self.candidates, last_sent = result
+        self.table.setRowCount(len(self.candidates))
+        total = 0.0
+        for i, fields in enumerate(self.candidates):
+            total += fields["montant_reste"]
+            check = QTableWidgetItem()
+            check.setFlags(Qt.ItemIsUserCheckable | Qt.ItemIsEnabled)
+            check.setCheckState(Qt.Checked if fields["email"] else Qt.Unchecked)
+            self.table.setItem(i, CHECK_COLUMN, check)
+            values = (
+                fields["dossier"], fields["client"], fields["email"] or "(aucune adresse)",
+                fields["reste"], fields["etat_paie"], last_sent.get(fields["dossier"], "") or "",
+            )
+            for j, value in enumerate(values, 1):
+                self.table.setItem(i, j, QTableWidgetItem(value))
+        self.summary_label.setText(
+            f"{len(self.candidates)} dossier(s) avec un reste à payer — total {total:,.2f} €".replace(",", " ")
+        )
+        self.btn_generer.setEnabled(bool(self.candidates))
+
+    def set_all_checked(self, checked):
+        for i in range(self.table.rowCount()):
+            self.table.item(i, CHECK_COLUMN).setCheckState(Qt.Checked if checked else Qt.Unchecked)
+
+    def selected(self):
+        return [
+            fields for i, fields in enumerate(self.candidates)
+            if self.table.item(i, CHECK_COLUMN).checkState() == Qt.Checked
+        ]
+
+    def generer(self):
+        selected = self.selected()
+        if not selected:
+            QMessageBox.information(self, "Relances", "Aucun dossier coché.")
+            return
+        try:
+            output = output_from_config(self.config, self.combo_mode.currentData())
+        except ValueError as e:
+            QMessageBox.warning(self, "Relances", str(e))
+            return
+        self.btn_generer.setEnabled(False)
+        self.btn_annuler.setVisible(True)
+        self.progress_bar.setRange(0, len(selected))
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
+        self.task = run_in_background(
+            generer_relances, selected,
+            self.subject_input.text(), self.body_input.toPlainText(),
+            self.config.get("email_address", ""), output, self.history,
+            on_finished=self.on_generated,
+            on_failed=self.on_failed,
+            on_cancelled=self.on_cancelled,
+            on_progress=lambda done, total: self.progress_bar.setValue(done),
+        )
+
+    def annuler(self):
+        if self.task is not None:
+            self.task.cancel()
+
+    def end_task(self):
+        self.task = None
+        self.btn_generer.setEnabled(True)
+        self.btn_annuler.setVisible(False)
+        self.progress_bar.setVisible(False)
+        self.refresh_last_sent()
+
+    def refresh_last_sent(self):
+        last_sent = self.history.last_sent()
+        for i, fields in enumerate(self.candidates):
+            self.table.item(i, LAST_COLUMN).setText(last_sent.get(fields["dossier"], "") or "")
+
+    def on_generated(self, result):
+        self.end_task()
+        done, errors = result
+        message = f"{done} relance(s) produite(s)."
+        if errors:
+            message += f"\n\n{len(errors)} échec(s) :\n" + "\n".join(errors[:20])
+            if len(errors) > 20:
+                message += "\n…"
+        QMessageBox.information(self, "Relances", message)
+
+    def on_failed(self, message):
+        self.end_task()
+        QMessageBox.critical(self, "Relances", f"Erreur lors de la génération des relances : {message}")
+
+    def on_cancelled(self):
+        self.end_task()
+        QMessageBox.information(self, "Relances", "Génération annulée ; les relances déjà produites sont enregistrées.")
+
+    def reject(self):
+        # Échap ferme la boîte sans passer par closeEvent
+        self.annuler()
+        super().reject()
+
+    def closeEvent(self, event):
+        self.annuler()
+        super().closeEvent(event)
@@ -1,19 +1,30 @@
 import os
-import base64
-import mimetypes
+import time
 from google.auth.transport.requests import Request
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build
-import json
-from PyQt5.QtWidgets import QDialog, QVBoxLayout, QLabel, QProgressBar
-from PyQt5.QtCore import Qt, QTimer
+from googleapiclient.errors import HttpError
+
+from config_service import get_config_service
+from gmail_scan_store import ScanStore
 
 SCOPES = ["https://www.googleapis.com/auth/gmail.readonly"]
 TOKEN_PATH = "token.json"
 CREDENTIALS_PATH = "credentials.json"
 ATTACHMENTS_DIR = "gmail_ddt_pieces_jointes"
 
+DEFAULT_LABEL = "SENT"
+SCAN_QUERY = "has:attachment filename:pdf"
+# messages().list renvoie au plus 500 identifiants par page
+PAGE_SIZE = 500
+# Gmail déconseille plus de 50 appels par requête groupée
+BATCH_SIZE = 50
+MAX_RETRIES = 4
+# Seuls les noms des pièces jointes sont demandés : ni corps, ni en-têtes
+MESSAGE_FIELDS = "id,payload(filename,parts(filename,parts(filename,parts(filename))))"
+
+
 def authentifier_gmail():
     creds = None
     if os.path.exists(TOKEN_PATH):
@@ -28,65 +39,153 @@ def authentifier_gmail():
             token.write(creds.to_json())
     return build("gmail", "v1", credentials=creds)
 
-class ProgressDialog(QDialog):
-    def __init__(self, total_steps, parent=None):
-        super().__init__(parent)
-        self.setWindowTitle("Scan en cours")
-        self.setWindowModality(Qt.ApplicationModal)
-        self.setMinimumWidth(300)
 
-        layout = QVBoxLayout(self)
-        self.label = QLabel("Analyse des messages Gmail en cours…")
-        self.progress = QProgressBar()
-        self.progress.setMaximum(total_steps)
-        self.progress.setValue(0)
-
-        layout.addWidget(self.label)
-        layout.addWidget(self.progress)
-
-        self.setLayout(layout)
+def label_configure():
+    return get_config_service().get("gmail_label") or DEFAULT_LABEL
+
+
+def resolve_label_id(service, label):
+    """Les labels système (SENT, INBOX…) sont leur propre identifiant ; les
+    labels créés par l'utilisateur (« DDT », « Envoyés »…) doivent être résolus."""
+    labels = service.users().labels().list(userId="me", fields="labels(id,name)").execute()
+    for item in labels.get("labels", []):
+        if label in (item["id"], item["name"]) or label.lower() == item["name"].lower():
+            return item["id"]
+    raise ValueError(f"Label Gmail introuvable : {label}")
+
+
+def list_message_ids(service, label_id, query=SCAN_QUERY, control=None):
+    """Tous les identifiants de messages du label, page par page."""
+    ids = []
+    page_token = None
+    while True:
+        if control is not None:
+            control.check_cancelled()
+        response = service.users().messages().list(
+            userId="me", labelIds=[label_id], q=query, maxResults=PAGE_SIZE,
+            pageToken=page_token, fields="messages/id,nextPageToken",
+        ).execute()
+        ids.extend(msg["id"] for msg in response.get("messages", []))
+        page_token = response.get("nextPageToken")
+        if not page_token:
+            return ids
+
+
+def list_history_message_ids(service, label_id, start_history_id, control=None):
+    """Messages ajoutés au label depuis ``start_history_id``, avec le nouvel historyId.
+
+    Lève HttpError 404 si Gmail n'a plus l'historique demandé (environ une
+    semaine) : il faut alors refaire un scan complet.
+    """
+    ids = []
+    page_token = None
+    while True:
+        if control is not None:
+            control.check_cancelled()
+        response = service.users().history().list(
+            userId="me", startHistoryId=start_history_id, labelId=label_id,
+            historyTypes=["messageAdded"], maxResults=PAGE_SIZE, pageToken=page_token,
+            fields="history/messagesAdded/message/id,historyId,nextPageToken",
+        ).execute()
+        for record in response.get("history", []):
+            ids.extend(added["message"]["id"] for added in record.get("messagesAdded", []))
+        page_token = response.get("nextPageToken")
+        if not page_token:
+            return ids, response.get("historyId", start_history_id)
+
+
+def changed_message_ids(service, store, label_id, control=None):
+    """Identifiants à examiner et historyId à enregistrer une fois le scan terminé."""
+    history_id = store.history_id(label_id)
+    if history_id:
+        try:
+            return list_history_message_ids(service, label_id, history_id, control)
+        except HttpError as e:
+            if e.resp.status != 404:
+                raise
+    # Premier scan ou historique expiré : historyId relevé avant la liste
+    # complète, pour ne rien perdre de ce qui arrive pendant le parcours
+    history_id = service.users().getProfile(userId="me", fields="historyId").execute()["historyId"]
+    return list_message_ids(service, label_id, control=control), history_id
+
+
+def pdf_filenames(payload):
+    noms = []
+    stack = [payload or {}]
+    while stack:
+        part = stack.pop()
+        filename = part.get("filename")
+        if filename and filename.lower().endswith(".pdf"):
+            noms.append(filename)
+        stack.extend(part.get("parts", []))
+    return noms
+
+
+def iter_attachment_names(service, message_ids, control=None):
+    """Noms des PDF joints à chaque message, par requêtes groupées de BATCH_SIZE.
+
+    Produit un dict {id du message: [noms de fichiers]} par requête groupée.
+    Les appels refusés pour dépassement de quota (429) sont rejoués avec une
+    attente croissante.
+    """
+    for start in range(0, len(message_ids), BATCH_SIZE):
+        todo = message_ids[start:start + BATCH_SIZE]
+        found = {}
+        for attempt in range(MAX_RETRIES):
+            if control is not None:
+                control.check_cancelled()
+            retry = []
+
+            def callback(request_id, response, exception):
+                if exception is None:
+                    found[request_id] = pdf_filenames(response.get("payload"))
+                elif isinstance(exception, HttpError) and exception.resp.status == 404:
+                    # Message supprimé entre la liste et la lecture
+                    found[request_id] = []
+                elif isinstance(exception, HttpError) and exception.resp.status in (429, 500, 503):
+                    retry.append(request_id)
+                else:
+                    raise exception
+
+            batch = service.new_batch_http_request(callback=callback)
+            for message_id in todo:
+                batch.add(
+                    service.users().messages().get(userId="me", id=message_id, format="full", fields=MESSAGE_FIELDS),
+                    request_id=message_id,
+                )
+            batch.execute()
+            if not retry:
+                break
+            todo = retry
+            time.sleep(0.5 * 2 ** attempt)
+        else:
+            raise RuntimeError(f"Quota Gmail dépassé : {len(todo)} message(s) non lus")
+        yield found
+        if control is not None:
+            control.emit_progress(min(start + BATCH_SIZE, len(message_ids)), len(message_ids))
 
-    def update_progress(self, value):
-        self.progress.setValue(value)
 
+def telecharger_pieces_jointes(label=None, control=None, store=None):
+    """Examine les messages du label Gmail arrivés depuis le dernier scan et
+    renvoie les nouveaux PDF envoyés.
 
-def telecharger_pieces_jointes(parent=None):
+    Sans interface : peut tourner dans un thread de fond. ``control`` (voir
+    workers.Task) reçoit la progression et permet l'annulation entre deux
+    requêtes groupées.
+    """
+    store = store or ScanStore()
     service = authentifier_gmail()
-    results = service.users().messages().list(userId='me', labelIds=["SENT"], q="has:attachment filename:pdf").execute()
-    messages = results.get("messages", [])
+    label_id = resolve_label_id(service, label or label_configure())
+    message_ids, history_id = changed_message_ids(service, store, label_id, control)
 
-    historique_path = "historique_scan.json"
-    if os.path.exists(historique_path):
-        with open(historique_path, "r", encoding="utf-8") as f:
-            historique = json.load(f)
-    else:
-        historique = {"messages": [], "fichiers": []}
+    # L'historique peut signaler un message plusieurs fois
+    nouveaux = list(dict.fromkeys(mid for mid in message_ids if not store.is_known(mid)))
+    if control is not None:
+        control.emit_progress(0, len(nouveaux))
 
     fichiers_trouves = []
-    total = len(messages)
-    dialog = ProgressDialog(total_steps=total, parent=parent)
-    dialog.show()
-
-    for i, msg in enumerate(messages):
-        QApplication.processEvents()
-        if msg["id"] in historique["messages"]:
-            dialog.update_progress(i + 1)
-            continue
-
-        message = service.users().messages().get(userId='me', id=msg['id']).execute()
-        parts = message['payload'].get('parts', [])
-        for part in parts:
-            filename = part.get("filename")
-            if filename and filename.lower().endswith(".pdf"):
-                if filename not in historique["fichiers"]:
-                    fichiers_trouves.append(filename)
-                    historique["fichiers"].append(filename)
-
-        historique["messages"].append(msg["id"])
-        dialog.update_progress(i + 1)
-
-    with open(historique_path, "w", encoding="utf-8") as f:
-        json.dump(historique, f, indent=2, ensure_ascii=False)
-
-    QTimer.singleShot(300, dialog.close)
+    # Chaque paquet est enregistré dès sa lecture : un scan annulé reprend où il s'est arrêté
+    for found in iter_attachment_names(service, nouveaux, control):
+        fichiers_trouves.extend(store.add_messages(found))
+    store.set_history_id(label_id, history_id)
     return fichiers_trouves
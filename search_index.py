@@ -0,0 +1,122 @@
+import bisect
+import re
+import unicodedata
+
+
+_WORD = re.compile(r"[a-z0-9]+")
+# Nombre de préfixes déjà résolus gardés entre deux frappes
+PREFIX_CACHE_SIZE = 256
+
+
+def _fold(text):
+    text = unicodedata.normalize("NFD", text or "")
+    return text.encode("ascii", "ignore").decode("ascii").lower()
+
+
+def normalize_words(text):
+    """Mots en minuscules et sans accents : « Éric Dupré » -> ["eric", "dupre"]."""
+    return _WORD.findall(_fold(text))
+
+
+def text_matches(query, nom, text):
+    """Même règle que SearchIndex.search, pour un seul dossier qui n'est pas (encore) indexé."""
+    words = normalize_words(text)
+    nom = _fold(nom)
+    return all(term in nom or any(word.startswith(term) for word in words) for term in normalize_words(query))
+
+
+class SearchIndex:
+    """Index inversé mot -> dossiers pour la recherche du tableau principal.
+
+    Chaque terme de la recherche est un préfixe de mot : « dup ren » trouve
+    « Dupont » à « Rennes ». Les mots connus sont gardés triés, un préfixe
+    correspond donc à une tranche trouvée par dichotomie. Un terme trouve
+    aussi les Num_dossier qui le contiennent n'importe où (« ault » trouve
+    « 24/RENAULT/000063 »), comme l'ancienne recherche du tableau. Les
+    dossiers sont désignés par leur position dans le DossierStore : deux
+    lignes au même Num_dossier ont chacune leur entrée.
+    """
+
+    def __init__(self):
+        self._postings = {}
+        self._words_by_doc = {}
+        # Num_dossier de chaque position, en minuscules et sans accents
+        self._noms = []
+        self._vocabulary = []
+        self._prefix_cache = {}
+
+    def __len__(self):
+        return len(self._noms)
+
+    def rebuild(self, documents):
+        """``documents`` : itérable de (Num_dossier, texte à indexer), dans l'ordre des positions."""
+        self._postings = {}
+        self._words_by_doc = {}
+        self._noms = []
+        for i, (nom, text) in enumerate(documents):
+            words = set(normalize_words(text))
+            self._words_by_doc[i] = words
+            self._noms.append(_fold(nom))
+            for word in words:
+                self._postings.setdefault(word, set()).add(i)
+        self._vocabulary = sorted(self._postings)
+        self._prefix_cache = {}
+
+    def update(self, i, nom, text):
+        """Nouveau texte de la position ``i`` (ou ligne ajoutée à la fin)."""
+        while len(self._noms) <= i:
+            self._noms.append("")
+        self._noms[i] = _fold(nom)
+        self._prefix_cache = {}
+        words = set(normalize_words(text))
+        old_words = self._words_by_doc.get(i, set())
+        if words == old_words:
+            return
+        self._unlink(i, old_words - words)
+        for word in words - old_words:
+            docs = self._postings.get(word)
+            if docs is None:
+                docs = self._postings[word] = set()
+                bisect.insort(self._vocabulary, word)
+            docs.add(i)
+        self._words_by_doc[i] = words
+
+    def _unlink(self, i, words):
+        for word in words:
+            docs = self._postings.get(word)
+            if docs is None:
+                continue
+            docs.discard(i)
+            if not docs:
+                del self._postings[word]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, word)]
+
+    def _term_matches(self, prefix):
+        # Préfixe d'un mot indexé, ou partie quelconque du Num_dossier
+        found = self._prefix_cache.get(prefix)
+        if found is not None:
+            return found
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        end = bisect.bisect_left(self._vocabulary, prefix + "\x7f")
+        words = self._vocabulary[start:end]
+        found = {i for i, nom in enumerate(self._noms) if prefix in nom}
+        found.update(*(self._postings[word] for word in words))
+        if len(self._prefix_cache) >= PREFIX_CACHE_SIZE:
+            self._prefix_cache.clear()
+        self._prefix_cache[prefix] = found
+        return found
+
+    def search(self, query):
+        """Positions des dossiers qui contiennent tous les termes, ou None si la recherche est vide."""
+        terms = normalize_words(query)
+        if not terms:
+            return None
+        # Les termes les plus longs sont les plus sélectifs : on commence par eux
+        terms.sort(key=len, reverse=True)
+        result = None
+        for term in terms:
+            docs = self._term_matches(term)
+            result = set(docs) if result is None else result & docs
+            if not result:
+                break
+        return result
@@ -0,0 +1,229 @@
+import os
+import re
+from datetime import datetime
+
+from local_mirror import SEARCH_COLUMNS, LocalMirror, new_mirror_refresher, sync_from_access
+from manual_states_store import ManualStatesStore
+from photos import pdf_photo, resolve_photo_path
+from access_repository import AccessDatabaseNotFound
+from config_service import get_config_service
+from pdf_export import export_fiches
+
+
+# Logique sans interface graphique : utilisée par la fenêtre principale
+# et par la ligne de commande (suiviclientpro_cli.py).
+
+MANUAL_STATES_PATH = "manual_states.json"
+# Taille de la photo des fiches (miniature en cache, reprise par l'export PDF)
+FICHE_THUMBNAIL_SIZE = 120
+# Lignes lues ensemble dans le miroir pour l'export PDF
+EXPORT_READ_CHUNK = 500
+RDV_HEURE = re.compile(r"(\d{1,2})\s*[hH:]\s*(\d{2})?")
+
+
+def load_config():
+    return get_config_service().snapshot()
+
+
+def parse_rdv(raw_date, raw_time):
+    """Date et heure du rendez-vous en minutes depuis l'an 1 (None si pas de date).
+
+    L'heure est saisie en texte dans LICIEL (« 09 h 00 », « 9h30 », « 14:15 »).
+    """
+    if isinstance(raw_date, datetime):
+        day = raw_date
+    elif isinstance(raw_date, str) and raw_date.strip():
+        try:
+            day = datetime.strptime(raw_date.strip()[:10], "%d/%m/%Y")
+        except ValueError:
+            return None
+    else:
+        return None
+    minutes = day.hour * 60 + day.minute
+    match = RDV_HEURE.search(str(raw_time or ""))
+    if match:
+        minutes = int(match.group(1)) * 60 + int(match.group(2) or 0)
+    return day.toordinal() * 1440 + minutes
+
+
+def dossier_from_row(row):
+    raw_date = row["rdv_date"]
+    raw_time = row["rdv_heure"]
+
+    # Traitement de la date
+    if isinstance(raw_date, datetime):
+        date_str = raw_date.strftime("%d/%m/%Y")
+    elif isinstance(raw_date, str):
+        date_str = raw_date
+    else:
+        date_str = ""
+
+    # Traitement de l'heure (déjà en texte normalement)
+    heure_str = str(raw_time or "")
+
+    # Combinaison propre : "31/03/2021 09 h 00"
+    date_heure = f"{date_str} {heure_str}".strip()
+
+    return {
+        # Clé de la ligne dans Access : un même Num_dossier peut y figurer plusieurs fois
+        "id": row["id"],
+        "nom": str(row["Num_dossier"]),
+        "type": str(row["type_de_dossier"] or ""),
+        "date": date_heure,
+        # Clé de tri de la colonne « Date & Heure », calculée une fois au chargement
+        "horodatage": parse_rdv(raw_date, raw_time),
+        "paiement": str(row["dossier_etat_paie"] or ""),
+        "photo": str(row["photo_de_presentation"] or ""),
+        "chemin": str(row["dossier_Acces"] or ""),
+        # Texte indexé par la recherche (nom du dossier, client, adresses)
+        "recherche": " ".join(
+            [str(row["Num_dossier"])] + [str(row[col]) for col in SEARCH_COLUMNS if row.get(col)]
+        ),
+    }
+
+
+def dossiers_from_rows(rows):
+    dossiers = []
+    for row in rows:
+        try:
+            dossiers.append(dossier_from_row(row))
+        except Exception as e:
+            print(f"[Erreur ligne] {row}: {e}")
+    return dossiers
+
+
+def fiche_data_from_row(row):
+    # Construction du dictionnaire de données
+    date_part = row.get("rdv_date")
+    heure_part = row.get("rdv_heure", "")
+    date_str = date_part.strftime("%d/%m/%Y") if isinstance(date_part, datetime) else ""
+    date_heure = f"{date_str} {heure_part}".strip()
+
+    dossier_data = {
+        "nom_du_dossier": row.get("Num_dossier", ""),
+        "type_de_mission": row.get("type_de_dossier", ""),
+        "date_&_heure": date_heure,
+        "statut_paiement": row.get("dossier_etat_paie", ""),
+        "assainissement": row.get("assainissement", ""),
+        "dossier": row.get("statut_dossier", ""),
+        "commentaires": row.get("commentaires", ""),
+        "montant_ttc": f"{row.get('facturation_ttc', 0):.2f} €" if row.get('facturation_ttc') else "",
+        "montant_paye": f"{row.get('facturation_paye', 0):.2f} €" if row.get('facturation_paye') else "",
+        "reste_a_payer": f"{row.get('facturation_restante', 0):.2f} €" if row.get('facturation_restante') else "",
+        "client_nom": row.get("client_nom", ""),
+        "client_prenom": row.get("client_prenom", ""),
+        "client_adresse": row.get("client_adresse", ""),
+        "client_cp": row.get("client_cp", ""),
+        "client_ville": row.get("client_ville", ""),
+        "client_email": row.get("client_email", ""),
+        "client_tel": row.get("client_tel", ""),
+        "bien_adresse": row.get("bien_adresse", ""),
+        "bien_cp": row.get("bien_cp", ""),
+        "bien_ville": row.get("bien_ville", ""),
+        "donneur_ordre": row.get("donneur_ordre", ""),
+        "chemin": row.get("chemin_dossier", ""),
+        "photo": resolve_photo_path(row.get("photo_de_presentation") or "", row.get("dossier_Acces") or ""),
+    }
+
+    return dossier_data
+
+
+def fiche_data(row, state=None, rapports=()):
+    """Données de la fiche client : ligne complète, saisies du tableau et rapports DDT."""
+    dossier_data = fiche_data_from_row(row)
+    # Saisies du tableau pas encore relues depuis Access : elles priment
+    state = state or {}
+    for field, key in (("assainissement", "assainissement"), ("dossier", "dossier"), ("commentaire", "commentaires")):
+        if state.get(field):
+            dossier_data[key] = state[field]
+    dossier_data["rapports"] = list(rapports)
+    return dossier_data
+
+
+def load_manual_states(path=MANUAL_STATES_PATH):
+    store = ManualStatesStore(path)
+    try:
+        return store.load()
+    finally:
+        store.close()
+
+
+def ddt_base_path(config):
+    return config.get("clients_parent_folder") or config.get("dossiers_path", "")
+
+
+def sync_mirror(config, mirror=None, full=False, control=None):
+    """Met le miroir local à jour depuis Access ; renvoie le delta appliqué."""
+    db_path = config.get("access_path", "")
+    if not os.path.exists(db_path):
+        raise AccessDatabaseNotFound(f"Fichier introuvable : {db_path}")
+    mirror = mirror or LocalMirror()
+    refresher = new_mirror_refresher()
+    if not full:
+        mirror.load_refresher(refresher, db_path)
+    return sync_from_access(mirror, refresher, db_path, control)
+
+
+def scan_ddt(config, control=None):
+    """Nouveaux PDF envoyés depuis le dernier scan Gmail."""
+    # Import différé : les bibliothèques Google ne sont chargées que pour le scan
+    from scan_ddt_envoyes import telecharger_pieces_jointes
+    return telecharger_pieces_jointes(config.get("gmail_label"), control)
+
+
+def ddt_reconciliation(config, dossiers, fichiers_envoyes):
+    """Pour chaque dossier : rapports présents dans le dossier client et PDF envoyés par Gmail."""
+    from ddt_index import DdtIndex
+    from ddt_matching import match_attachments
+
+    index = DdtIndex(ddt_base_path(config))
+    index.build()
+    envoyes = match_attachments((d["nom"] for d in dossiers), fichiers_envoyes)
+    return [
+        {
+            "dossier": dossier["nom"],
+            "type": dossier["type"],
+            "date": dossier["date"],
+            "paiement": dossier["paiement"],
+            "rapports_locaux": len(index.reports(dossier["nom"])),
+            "ddt_envoye": dossier["nom"] in envoyes,
+            "fichiers_envoyes": "; ".join(envoyes.get(dossier["nom"], [])),
+        }
+        for dossier in dossiers
+    ]
+
+
+def select_dossiers(dossiers, type_=None, paiement=None, depuis=None, jusqu_a=None):
+    """Dossiers d'un type / statut de paiement, avec un rendez-vous entre deux dates (incluses)."""
+    start = depuis.toordinal() * 1440 if depuis else None
+    end = (jusqu_a.toordinal() + 1) * 1440 if jusqu_a else None
+    selected = []
+    for dossier in dossiers:
+        if type_ is not None and dossier["type"] != type_:
+            continue
+        if paiement is not None and dossier["paiement"] != paiement:
+            continue
+        if start is not None or end is not None:
+            horodatage = dossier["horodatage"]
+            if horodatage is None or (start is not None and horodatage < start) or (end is not None and horodatage >= end):
+                continue
+        selected.append(dossier)
+    return selected
+
+
+def export_fiches_pdf(mirror, ids, folder, manual_states, rapports=lambda nom: [], control=None):
+    """Un PDF par dossier (ids Access) ; renvoie (nombre écrit, erreurs, dossiers absents du miroir).
+
+    Les lignes sont lues par paquets dans le miroir, les PDF écrits par un pool de processus.
+    """
+    fiches = []
+    for start in range(0, len(ids), EXPORT_READ_CHUNK):
+        if control is not None:
+            control.check_cancelled()
+        for row in mirror.get_rows(ids[start:start + EXPORT_READ_CHUNK]).values():
+            nom = str(row["Num_dossier"])
+            fiche = fiche_data(row, manual_states.get(nom), rapports(nom))
+            fiche["photo_pdf"] = pdf_photo(fiche["photo"], FICHE_THUMBNAIL_SIZE) if fiche["photo"] else ""
+            fiches.append(fiche)
+    done, errors = export_fiches(fiches, folder, control)
+    return done, errors, len(ids) - len(fiches)
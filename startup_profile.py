@@ -0,0 +1,66 @@
+import builtins
+import sys
+import time
+
+
+class StartupProfile:
+    """Mesure du démarrage (option --profile-startup) : imports puis étapes d'initialisation.
+
+    Inactif, il ne fait rien : ``mark`` et ``report`` sont gratuits. Le
+    bilan n'est écrit qu'une fois, au premier des chemins qui l'appelle.
+    """
+
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self.start = time.perf_counter()
+        self.steps = []
+        self.reported = False
+        # module importé -> durée (ms), imports de premier niveau seulement
+        self.imports = {}
+        self._original_import = None
+        self._depth = 0
+        self._last = self.start
+
+    def track_imports(self):
+        if not self.enabled or self._original_import is not None:
+            return
+        self._original_import = original = builtins.__import__
+
+        def timed_import(name, *args, **kwargs):
+            if self._depth or name in sys.modules:
+                return original(name, *args, **kwargs)
+            # Le temps des sous-modules est compté avec le module importé par l'application
+            self._depth += 1
+            start = time.perf_counter()
+            try:
+                return original(name, *args, **kwargs)
+            finally:
+                self._depth -= 1
+                self.imports[name] = self.imports.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+        builtins.__import__ = timed_import
+
+    def stop_imports(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def mark(self, label):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.steps.append((label, (now - self._last) * 1000, (now - self.start) * 1000))
+        self._last = now
+
+    def report(self, out=None):
+        if not self.enabled or self.reported:
+            return
+        self.reported = True
+        out = out or sys.stderr
+        out.write("=== Démarrage ===\n")
+        for name, ms in sorted(self.imports.items(), key=lambda item: item[1], reverse=True):
+            if ms >= 1:
+                out.write(f"  import {name:<32} {ms:8.1f} ms\n")
+        for label, ms, total in self.steps:
+            out.write(f"{label:<40} {ms:8.1f} ms  (total {total:.1f} ms)\n")
+        out.flush()
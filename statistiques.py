@@ -0,0 +1,157 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+
+# Champs de Donnees_Dossiers utilisés par les statistiques. Le donneur
+# d'ordre s'appelle donneur_ordre dans la fiche et dordre_nom dans LICIEL.
+STAT_COLUMNS = (
+    "id", "Num_dossier", "type_de_dossier", "rdv_date",
+    "facturation_ttc", "facturation_paye", "facturation_restante",
+    "donneur_ordre", "dordre_nom",
+)
+
+# Ancienneté des créances, en jours depuis le rendez-vous
+AGEING_BUCKETS = ((30, "0 - 30 jours"), (60, "31 - 60 jours"), (90, "61 - 90 jours"), (None, "Plus de 90 jours"))
+NO_DATE_LABEL = "Sans date"
+
+
+def parse_amount(value):
+    if value is None or value == "":
+        return 0.0
+    if isinstance(value, (int, float, Decimal)):
+        return float(value)
+    try:
+        return float(str(value).replace("€", "").replace(" ", "").replace(",", "."))
+    except ValueError:
+        return 0.0
+
+
+def _day(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str) and value.strip():
+        text = value.strip()
+        for fmt, size in (("%Y-%m-%d", 10), ("%d/%m/%Y", 10)):
+            try:
+                return datetime.strptime(text[:size], fmt).date()
+            except ValueError:
+                continue
+    return None
+
+
+def stat_record(row):
+    """Ce que les statistiques retiennent d'une ligne : un tuple de valeurs typées."""
+    day = _day(row.get("rdv_date"))
+    return (
+        str(row.get("type_de_dossier") or ""),
+        str(row.get("donneur_ordre") or row.get("dordre_nom") or ""),
+        day.toordinal() if day else None,
+        parse_amount(row.get("facturation_ttc")),
+        parse_amount(row.get("facturation_paye")),
+        parse_amount(row.get("facturation_restante")),
+    )
+
+
+def _bump(table, key, values, sign):
+    current = table.get(key)
+    if current is None:
+        current = table[key] = [0] * len(values)
+    for i, value in enumerate(values):
+        current[i] += sign * value
+    if current[0] == 0:
+        # Plus aucun dossier pour cette clé
+        del table[key]
+
+
+class StatistiquesEngine:
+    """Agrégats de chiffre d'affaires et d'activité, tenus à jour dossier par dossier.
+
+    Chaque dossier apporte sa contribution (nombre, TTC, payé, reste) à
+    quelques tables indexées par mois, type, donneur d'ordre et jour de
+    rendez-vous. Un delta de synchronisation retire l'ancienne contribution
+    et ajoute la nouvelle : le tableau de bord ne relit jamais toute la base.
+    """
+
+    def __init__(self):
+        # id Access -> contribution : deux lignes au même Num_dossier comptent chacune
+        self.records = {}
+        # clé -> [nombre de dossiers, TTC, payé, reste]
+        self.by_month = {}
+        self.by_type = {}
+        self.by_donneur = {}
+        # jour du rendez-vous (ordinal, ou None) -> [dossiers avec un reste, reste]
+        self.receivables_by_day = {}
+
+    def _apply(self, record, sign):
+        type_, donneur, day, ttc, paye, reste = record
+        values = (1, ttc, paye, reste)
+        month = date.fromordinal(day).strftime("%Y-%m") if day is not None else NO_DATE_LABEL
+        _bump(self.by_month, month, values, sign)
+        _bump(self.by_type, type_, values, sign)
+        _bump(self.by_donneur, donneur, values, sign)
+        if reste > 0:
+            _bump(self.receivables_by_day, day, (1, reste), sign)
+
+    def set_row(self, dossier_id, row):
+        self.remove(dossier_id)
+        record = self.records[dossier_id] = stat_record(row)
+        self._apply(record, 1)
+
+    def remove(self, dossier_id):
+        record = self.records.pop(dossier_id, None)
+        if record is not None:
+            self._apply(record, -1)
+
+    def load_rows(self, rows):
+        for row in rows:
+            self.set_row(row["id"], row)
+
+    def apply_delta(self, delta):
+        for dossier_id in delta.removed:
+            self.remove(dossier_id)
+        for row in delta.added + delta.modified:
+            self.set_row(row["id"], row)
+
+    # --- Lecture des agrégats (tableau de bord) ---
+
+    def monthly_turnover(self):
+        # Mois les plus récents d'abord, dossiers sans date à la fin
+        return sorted(self.by_month.items(), key=lambda item: (item[0] != NO_DATE_LABEL, item[0]), reverse=True)
+
+    def per_type(self):
+        return sorted(self.by_type.items(), key=lambda item: item[1][0], reverse=True)
+
+    def per_donneur(self, limit=None):
+        items = sorted(self.by_donneur.items(), key=lambda item: item[1][1], reverse=True)
+        return items[:limit] if limit else items
+
+    def receivables_by_age(self, today=None):
+        """Créances (reste à payer) par tranche d'ancienneté du rendez-vous."""
+        today = (today or date.today()).toordinal()
+        buckets = {label: [0, 0.0] for _, label in AGEING_BUCKETS}
+        buckets[NO_DATE_LABEL] = [0, 0.0]
+        for day, (count, reste) in self.receivables_by_day.items():
+            if day is None:
+                label = NO_DATE_LABEL
+            else:
+                age = today - day
+                label = next(label for limit, label in AGEING_BUCKETS if limit is None or age <= limit)
+            buckets[label][0] += count
+            buckets[label][1] += reste
+        return list(buckets.items())
+
+    def totals(self):
+        total = [0, 0.0, 0.0, 0.0]
+        for values in self.by_month.values():
+            for i, value in enumerate(values):
+                total[i] += value
+        return total
+
+
+def build_engine(mirror):
+    """Thread de fond : agrégats initiaux depuis le miroir local."""
+    engine = StatistiquesEngine()
+    engine.load_rows(mirror.list_columns(STAT_COLUMNS))
+    return engine
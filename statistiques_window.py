@@ -0,0 +1,64 @@
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QLabel, QTabWidget, QTableWidget, QTableWidgetItem, QHeaderView
+)
+from PyQt5.QtCore import Qt
+
+
+# Nombre de donneurs d'ordre affichés (les plus gros chiffres d'affaires)
+MAX_DONNEURS = 50
+
+
+def _euros(value):
+    return f"{value:,.2f} €".replace(",", " ")
+
+
+def _table(headers, rows):
+    table = QTableWidget(len(rows), len(headers))
+    table.setHorizontalHeaderLabels(headers)
+    table.setEditTriggers(QTableWidget.NoEditTriggers)
+    table.verticalHeader().setVisible(False)
+    table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+    for i, row in enumerate(rows):
+        for j, value in enumerate(row):
+            item = QTableWidgetItem(value)
+            if j > 0:
+                item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+            table.setItem(i, j, item)
+    return table
+
+
+class StatistiquesWindow(QDialog):
+    """Tableau de bord : lit les agrégats déjà calculés par StatistiquesEngine."""
+
+    def __init__(self, engine, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Statistiques")
+        self.setMinimumSize(800, 550)
+
+        layout = QVBoxLayout()
+        nb, ttc, paye, reste = engine.totals()
+        resume = QLabel(
+            f"{nb} dossier(s) — CA TTC : {_euros(ttc)} — Encaissé : {_euros(paye)} — Reste à payer : {_euros(reste)}"
+        )
+        resume.setStyleSheet("font-weight: bold; padding: 6px;")
+        layout.addWidget(resume)
+
+        tabs = QTabWidget()
+        tabs.addTab(_table(
+            ["Mois", "Missions", "CA TTC", "Encaissé", "Reste à payer"],
+            [[mois, str(n), _euros(t), _euros(p), _euros(r)] for mois, (n, t, p, r) in engine.monthly_turnover()],
+        ), "CA mensuel")
+        tabs.addTab(_table(
+            ["Ancienneté", "Dossiers", "Reste à payer"],
+            [[tranche, str(n), _euros(r)] for tranche, (n, r) in engine.receivables_by_age()],
+        ), "Créances")
+        tabs.addTab(_table(
+            ["Type de mission", "Missions", "CA TTC", "Reste à payer"],
+            [[type_ or "(vide)", str(n), _euros(t), _euros(r)] for type_, (n, t, p, r) in engine.per_type()],
+        ), "Par type")
+        tabs.addTab(_table(
+            ["Donneur d'ordre", "Missions", "CA TTC", "Reste à payer"],
+            [[donneur or "(vide)", str(n), _euros(t), _euros(r)] for donneur, (n, t, p, r) in engine.per_donneur(MAX_DONNEURS)],
+        ), "Par donneur d'ordre")
+        layout.addWidget(tabs)
+        self.setLayout(layout)
@@ -0,0 +1,202 @@
+"""Ligne de commande de SuiviClientPro, sans interface graphique (tâches planifiées, scripts).
+
+    python suiviclientpro_cli.py sync [--complet]
+    python suiviclientpro_cli.py scan-ddt
+    python suiviclientpro_cli.py ddt [--manquants]
+    python suiviclientpro_cli.py export DOSSIER [--type T] [--paiement P] [--depuis JJ/MM/AAAA] [--jusqu-a JJ/MM/AAAA]
+    python suiviclientpro_cli.py stats [--vue totaux|mensuel|creances|types|donneurs]
+
+Résultats en texte, JSON (--format json) ou CSV (--format csv), sur la sortie
+standard ou dans un fichier (--sortie), options placées avant ou après la
+commande. Code de retour 1 en cas d'erreur.
+"""
+import argparse
+import csv
+import json
+import sys
+from datetime import datetime
+
+
+# Les modules de l'application sont importés dans chaque commande : « --help »
+# répond tout de suite, et une commande ne charge que ce dont elle a besoin.
+
+# Colonnes du résultat de chaque commande, connues même sans aucune ligne (en-tête CSV)
+COLUMNS = {
+    "sync": ("complet", "ajoutes", "modifies", "supprimes"),
+    "scan-ddt": ("fichier",),
+    "ddt": ("dossier", "type", "date", "paiement", "rapports_locaux", "ddt_envoye", "fichiers_envoyes"),
+    "export": ("selectionnes", "exportes", "echecs", "absents"),
+}
+STATS_COLUMNS = {
+    "totaux": ("dossiers", "ttc", "paye", "reste"),
+    "mensuel": ("mois", "missions", "ttc", "paye", "reste"),
+    "creances": ("anciennete", "dossiers", "reste"),
+    "types": ("type", "missions", "ttc", "paye", "reste"),
+    "donneurs": ("donneur_ordre", "missions", "ttc", "paye", "reste"),
+}
+
+
+def _date(text):
+    try:
+        return datetime.strptime(text, "%d/%m/%Y").date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"date attendue au format JJ/MM/AAAA : {text}")
+
+
+def _load_dossiers(mirror):
+    from services import dossiers_from_rows
+    return dossiers_from_rows(mirror.list_rows())
+
+
+def cmd_sync(args, config):
+    from services import sync_mirror
+    delta = sync_mirror(config, full=args.complet)
+    return [{
+        "complet": delta.full,
+        "ajoutes": len(delta.added),
+        "modifies": len(delta.modified),
+        "supprimes": len(delta.removed),
+    }]
+
+
+def cmd_scan_ddt(args, config):
+    from services import scan_ddt
+    return [{"fichier": fichier} for fichier in scan_ddt(config)]
+
+
+def cmd_ddt(args, config):
+    from gmail_scan_store import ScanStore
+    from local_mirror import LocalMirror
+    from services import ddt_reconciliation
+
+    rows = ddt_reconciliation(config, _load_dossiers(LocalMirror()), ScanStore().all_files())
+    if args.manquants:
+        rows = [row for row in rows if not row["rapports_locaux"] and not row["ddt_envoye"]]
+    return rows
+
+
+def cmd_export(args, config):
+    from local_mirror import LocalMirror
+    from services import export_fiches_pdf, load_manual_states, select_dossiers
+
+    mirror = LocalMirror()
+    dossiers = select_dossiers(_load_dossiers(mirror), args.type, args.paiement, args.depuis, args.jusqu_a)
+    done, errors, missing = export_fiches_pdf(
+        mirror, [d["id"] for d in dossiers], args.dossier, load_manual_states()
+    )
+    for error in errors:
+        print(f"Échec : {error}", file=sys.stderr)
+    return [{"selectionnes": len(dossiers), "exportes": done, "echecs": len(errors), "absents": missing}]
+
+
+def cmd_stats(args, config):
+    from local_mirror import LocalMirror
+    from statistiques import build_engine
+
+    engine = build_engine(LocalMirror())
+    if args.vue == "mensuel":
+        return [
+            {"mois": mois, "missions": n, "ttc": round(t, 2), "paye": round(p, 2), "reste": round(r, 2)}
+            for mois, (n, t, p, r) in engine.monthly_turnover()
+        ]
+    if args.vue == "creances":
+        return [{"anciennete": tranche, "dossiers": n, "reste": round(r, 2)} for tranche, (n, r) in engine.receivables_by_age()]
+    if args.vue in ("types", "donneurs"):
+        items = engine.per_type() if args.vue == "types" else engine.per_donneur()
+        key = "type" if args.vue == "types" else "donneur_ordre"
+        return [
+            {key: nom, "missions": n, "ttc": round(t, 2), "paye": round(p, 2), "reste": round(r, 2)}
+            for nom, (n, t, p, r) in items
+        ]
+    n, t, p, r = engine.totals()
+    return [{"dossiers": n, "ttc": round(t, 2), "paye": round(p, 2), "reste": round(r, 2)}]
+
+
+def result_columns(args):
+    if args.commande == "stats":
+        return STATS_COLUMNS[args.vue]
+    return COLUMNS[args.commande]
+
+
+def write_rows(rows, fmt, out, columns=()):
+    if fmt == "json":
+        json.dump(rows, out, ensure_ascii=False, indent=2)
+        out.write("\n")
+        return
+    columns = list(dict.fromkeys([*columns, *(key for row in rows for key in row)]))
+    if fmt == "csv":
+        # Point-virgule : le séparateur qu'Excel attend en français
+        writer = csv.DictWriter(out, columns, delimiter=";", lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(rows)
+        return
+    if not rows:
+        out.write("Aucun résultat.\n")
+        return
+    widths = {col: max(len(col), *(len(str(row.get(col, ""))) for row in rows)) for col in columns}
+    out.write("  ".join(col.ljust(widths[col]) for col in columns).rstrip() + "\n")
+    for row in rows:
+        out.write("  ".join(str(row.get(col, "")).ljust(widths[col]) for col in columns).rstrip() + "\n")
+
+
+def _output_options(parser):
+    parser.add_argument("--format", choices=("texte", "json", "csv"))
+    parser.add_argument("--sortie", help="fichier de résultat (sortie standard par défaut)")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="suiviclientpro", description="SuiviClientPro sans interface graphique.")
+    _output_options(parser)
+    parser.set_defaults(format="texte")
+    # Mêmes options après la commande. SUPPRESS : absentes, elles ne remplacent
+    # pas celles données avant
+    output = argparse.ArgumentParser(add_help=False, argument_default=argparse.SUPPRESS)
+    _output_options(output)
+    commands = parser.add_subparsers(dest="commande", required=True)
+
+    sync = commands.add_parser("sync", parents=[output], help="met le miroir local à jour depuis la base Access")
+    sync.add_argument("--complet", action="store_true", help="relecture complète de la base")
+    sync.set_defaults(func=cmd_sync)
+
+    scan = commands.add_parser("scan-ddt", parents=[output], help="cherche les nouveaux PDF envoyés par Gmail")
+    scan.set_defaults(func=cmd_scan_ddt)
+
+    ddt = commands.add_parser("ddt", parents=[output], help="rapprochement dossiers / rapports DDT (disque et Gmail)")
+    ddt.add_argument("--manquants", action="store_true", help="seulement les dossiers sans aucun rapport")
+    ddt.set_defaults(func=cmd_ddt)
+
+    export = commands.add_parser("export", parents=[output], help="exporte les fiches en PDF")
+    export.add_argument("dossier", help="dossier de destination")
+    export.add_argument("--type", help="type de mission")
+    export.add_argument("--paiement", help="statut de paiement")
+    export.add_argument("--depuis", type=_date, help="rendez-vous à partir du JJ/MM/AAAA")
+    export.add_argument("--jusqu-a", dest="jusqu_a", type=_date, help="rendez-vous jusqu'au JJ/MM/AAAA")
+    export.set_defaults(func=cmd_export)
+
+    stats = commands.add_parser("stats", parents=[output], help="chiffre d'affaires et créances")
+    stats.add_argument("--vue", choices=("totaux", "mensuel", "creances", "types", "donneurs"), default="totaux")
+    stats.set_defaults(func=cmd_stats)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        from services import load_config
+        rows = args.func(args, load_config())
+    except Exception as e:
+        print(f"Erreur : {e}", file=sys.stderr)
+        return 1
+    if args.sortie:
+        with open(args.sortie, "w", encoding="utf-8", newline="") as out:
+            write_rows(rows, args.format, out, result_columns(args))
+    else:
+        write_rows(rows, args.format, sys.stdout, result_columns(args))
+    return 0
+
+
+if __name__ == "__main__":
+    # Processus de l'export PDF dans l'exécutable Windows
+    from multiprocessing import freeze_support
+    freeze_support()
+    sys.exit(main())
@@ -0,0 +1,886 @@
+import sys
+
+from startup_profile import StartupProfile
+
+# Mesure du démarrage (--profile-startup) : installée avant les autres imports pour les chronométrer
+STARTUP = StartupProfile("--profile-startup" in sys.argv)
+STARTUP.track_imports()
+
+import os
+from PyQt5.QtWidgets import (
+    QMainWindow, QWidget, QPushButton, QVBoxLayout,
+    QHBoxLayout, QLabel, QTableView,
+    QHeaderView, QAbstractItemView, QSplitter, QMessageBox, QLineEdit, QComboBox, QFileDialog,
+    QProgressBar
+)
+from PyQt5.QtGui import QIcon
+from PyQt5.QtCore import Qt, QTimer
+from access_repository import get_repository, stats_summary, close_all
+from config_service import get_config_service
+from config_notifier import ConfigNotifier
+from local_mirror import LocalMirror, new_mirror_refresher, sync_from_access
+from workers import WriteBehindQueue, run_in_background
+from dossiers_model import PHOTO_COLUMN, DossiersTableModel
+from dossier_store import DossierStore
+from ddt_index import DdtIndex
+from ddt_watcher import DdtWatcher
+from ddt_matching import match_attachments
+from gmail_scan_store import ScanStore
+from manual_states_store import ManualStatesStore
+from search_index import SearchIndex, text_matches
+from filter_index import FilterIndex
+from fiche_cache import FicheCache
+from photos import resolve_photo_path
+from thumbnails import ThumbnailCache
+from statistiques import StatistiquesEngine, build_engine
+from services import (
+    MANUAL_STATES_PATH, ddt_base_path, dossiers_from_rows, export_fiches_pdf, fiche_data, scan_ddt
+)
+
+# Les fenêtres secondaires (fiche, paramétrage, statistiques, relances) et les
+# bibliothèques Google / ODBC ne sont importées qu'à leur première utilisation
+STARTUP.stop_imports()
+STARTUP.mark("imports")
+
+
+
+# Taille des miniatures de la colonne Photo du tableau
+TABLE_THUMBNAIL_SIZE = 22
+# Nombre de lignes lues d'avance de part et d'autre de la sélection
+PREFETCH_NEIGHBOURS = 5
+
+
+class SuiviClientPro(QMainWindow):
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("SuiviClientPro - Diagnostic Immobilier")
+        self.setMinimumSize(1200, 700)
+        self.setWindowIcon(QIcon("icons/app_icon.png"))
+
+        # Paramétrage en mémoire ; ses modifications invalident les caches concernés
+        self.config = get_config_service()
+        self.config_notifier = ConfigNotifier(self.config, self)
+        self.config_notifier.changed.connect(self.on_config_changed)
+        self.manual_states = {}
+        self.manual_states_store = ManualStatesStore(MANUAL_STATES_PATH)
+        self.compaction_task = None
+        # Dossiers du tableau en colonnes, saisies manuelles jointes
+        self.dossiers = DossierStore()
+        self.search_index = SearchIndex()
+        self.filter_index = FilterIndex(("type", "paiement", "assainissement", "dossier"))
+        self.mirror = LocalMirror()
+        self.fiche_cache = FicheCache()
+        # Agrégats du tableau de bord ; reconstruits depuis le miroir en arrière-plan
+        self.statistiques = StatistiquesEngine()
+        self.statistiques_task = None
+        self.statistiques_stale = False
+        self.thumbnails = ThumbnailCache(parent=self)
+        self.thumbnails.thumbnail_ready.connect(self.on_thumbnail_ready)
+        # (photo, taille) -> dossiers dont la ligne attend la miniature
+        self.photo_waiting = {}
+        self.mirror_refresher = new_mirror_refresher()
+        self.mirror_task = None
+        self.sync_task = None
+        self.ddt_scan_task = None
+        self.export_task = None
+        self.streaming = False
+        self.ddt_index = None
+        self.ddt_watcher = None
+        # PDF envoyés par Gmail, et dossier -> PDF envoyés qui le citent
+        self.fichiers_envoyes = []
+        self.ddt_envoyes = {}
+        # Saisies regroupées par dossier puis écrites par paquets dans Access
+        self.write_queue = WriteBehindQueue(self.write_manual_states, parent=self)
+        self.write_queue.failed.connect(self.on_write_failed)
+
+        self.load_manual_states()
+        self.init_ui()
+
+    def init_ui(self):
+        central_widget = QWidget()
+        self.setCentralWidget(central_widget)
+
+        self.btn_param = QPushButton("⚙️ Paramétrage")
+        self.btn_actualiser = QPushButton("🔄 Actualiser")
+        self.btn_statistiques = QPushButton("📊 Statistiques")
+        self.btn_relances = QPushButton("📧 Relances")
+        self.btn_ddt = QPushButton("📤 DDT envoyés")
+        self.btn_ddt.clicked.connect(self.actualiser_ddt_envoyes)
+        self.btn_statistiques.clicked.connect(self.open_statistiques)
+        self.btn_relances.clicked.connect(self.open_relances)
+        self.btn_export_pdf = QPushButton("📄 Export PDF")
+        self.btn_export_pdf.clicked.connect(self.export_selection_pdf)
+        self.btn_reset_sort = QPushButton("🔁 Réinitialiser tri")
+        self.btn_reset_sort.clicked.connect(self.reset_sort)
+
+        self.btn_param.clicked.connect(self.open_config)
+        self.btn_actualiser.clicked.connect(lambda: self.refresh_data())
+
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("🔍 Dossier, client, ville, adresse, commentaire...")
+        # Le filtre part quand la frappe s'arrête, pas à chaque caractère
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(200)
+        self.search_timer.timeout.connect(self.apply_filters)
+        self.search_input.textChanged.connect(self.search_timer.start)
+
+        # Listes de filtres : le texte affiche le nombre de dossiers, la valeur est en donnée
+        self.combo_type = QComboBox()
+        self.combo_type.addItem("Tous les types")
+        self.combo_paiement = QComboBox()
+        self.combo_paiement.addItem("Tous les paiements")
+        self.combo_assainissement = QComboBox()
+        self.combo_assainissement.addItem("Tous")
+        self.combo_statut_dossier = QComboBox()
+        self.combo_statut_dossier.addItem("Tous")
+        for combo in self.filter_combos().values():
+            combo.currentIndexChanged.connect(self.apply_filters)
+
+        filter_layout = QVBoxLayout()
+        filter_layout.addWidget(self.search_input)
+        filter_layout.addWidget(QLabel("Type de mission"))
+        filter_layout.addWidget(self.combo_type)
+        filter_layout.addWidget(QLabel("Statut paiement"))
+        filter_layout.addWidget(self.combo_paiement)
+        filter_layout.addWidget(QLabel("Assainissement"))
+        filter_layout.addWidget(self.combo_assainissement)
+        filter_layout.addWidget(QLabel("Dossier"))
+        filter_layout.addWidget(self.combo_statut_dossier)
+
+        left_layout = QVBoxLayout()
+        left_layout.addWidget(QLabel("📁 Menu"))
+        left_layout.addWidget(self.btn_param)
+        left_layout.addWidget(self.btn_actualiser)
+        left_layout.addWidget(self.btn_statistiques)
+        left_layout.addWidget(self.btn_relances)
+        left_layout.addWidget(self.btn_export_pdf)
+        left_layout.addWidget(self.btn_ddt)
+        left_layout.addWidget(self.btn_reset_sort)
+        left_layout.addStretch()
+        left_layout.addLayout(filter_layout)
+
+        menu_widget = QWidget()
+        menu_widget.setLayout(left_layout)
+
+        self.model = DossiersTableModel(
+            self.manual_states, ddt_lookup=self.ddt_envoye, photo_lookup=self.photo_thumbnail, parent=self
+        )
+        self.model.manual_state_changed.connect(self.save_manual_states)
+        self.write_queue.status_changed.connect(self.model.set_write_status)
+
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSortingEnabled(True)
+        self.table.sortByColumn(-1, Qt.AscendingOrder)
+        # Hauteur de ligne fixe : la vue n'a pas à mesurer chaque ligne
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(24)
+
+        self.table.setAlternatingRowColors(True)
+        self.table.setStyleSheet("""
+            QHeaderView::section {
+                background-color: #f2f2f2;
+                font-weight: bold;
+                padding: 6px;
+                border-bottom: 1px solid #aaa;
+            }
+            QTableView {
+                alternate-background-color: #fafafa;
+                background-color: #ffffff;
+                border-radius: 4px;
+                border: 1px solid #ccc;
+            }
+            QTableView::item:hover {
+                background-color: #e0f0ff;
+            }
+        """)
+
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table.horizontalHeader().setSectionResizeMode(PHOTO_COLUMN, QHeaderView.Fixed)
+        self.table.horizontalHeader().resizeSection(PHOTO_COLUMN, 48)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(
+            QAbstractItemView.SelectedClicked | QAbstractItemView.EditKeyPressed
+)
+        self.table.doubleClicked.connect(self.handle_double_click)
+        # Fiches de la ligne sélectionnée et de ses voisines lues d'avance
+        self.prefetch_timer = QTimer(self)
+        self.prefetch_timer.setSingleShot(True)
+        self.prefetch_timer.setInterval(150)
+        self.prefetch_timer.timeout.connect(self.prefetch_fiches)
+        self.table.selectionModel().currentRowChanged.connect(self.prefetch_timer.start)
+
+        split = QSplitter()
+        split.addWidget(menu_widget)
+        split.addWidget(self.table)
+        split.setSizes([300, 900])
+
+        layout = QHBoxLayout()
+        layout.addWidget(split)
+        central_widget.setLayout(layout)
+
+        # Progression / annulation des lectures en arrière-plan
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setMaximumWidth(200)
+        self.btn_cancel_sync = QPushButton("Annuler")
+        self.btn_cancel_sync.clicked.connect(self.cancel_sync)
+        self.statusBar().addPermanentWidget(self.progress_bar)
+        self.statusBar().addPermanentWidget(self.btn_cancel_sync)
+        self.show_sync_progress(False)
+
+        # Les données se chargent une fois la fenêtre affichée
+        QTimer.singleShot(0, self.start_loading)
+
+    def start_loading(self):
+        STARTUP.mark("premier affichage")
+        # Miroir local lu en fond et affiché, puis synchronisation Access en fond
+        self.start_ddt_index()
+        self.load_from_mirror()
+        run_in_background(lambda: ScanStore().all_files(), on_finished=self.on_fichiers_envoyes_loaded)
+
+    def load_manual_states(self):
+        # Instantané + journal des modifications depuis la dernière compaction
+        self.manual_states = self.manual_states_store.load()
+        if self.manual_states_store.recovered is not None:
+            QMessageBox.warning(
+                None,
+                "Erreur JSON",
+                f"{MANUAL_STATES_PATH} était endommagé : {self.manual_states_store.recovered} dossier(s) récupéré(s).\n"
+                f"L'original est conservé dans {MANUAL_STATES_PATH}.corrompu.",
+            )
+        if self.manual_states_store.needs_compaction():
+            self.compact_manual_states()
+
+    def compact_manual_states(self):
+        if self.compaction_task is not None:
+            return
+        # Copie et taille du journal prises ensemble ici, écriture de l'instantané en arrière-plan
+        snapshot = {nom: dict(state) for nom, state in self.manual_states.items()}
+        offset = self.manual_states_store.journal_offset()
+        self.compaction_task = run_in_background(
+            self.manual_states_store.compact, snapshot, offset,
+            on_finished=self.on_compaction_finished,
+            on_failed=self.on_compaction_failed,
+        )
+
+    def on_compaction_finished(self, _):
+        self.compaction_task = None
+
+    def on_compaction_failed(self, message):
+        # Le journal reste intact : rien n'est perdu, la compaction sera retentée
+        self.compaction_task = None
+        self.statusBar().showMessage(f"États manuels : compaction impossible ({message})", 5000)
+
+    def load_config(self):
+        if not self.config.exists():
+            QMessageBox.warning(self, "Configuration manquante", "Le fichier de configuration est introuvable.")
+        return self.config.snapshot()
+
+    def on_config_changed(self, keys):
+        # Caches qui dépendent du paramétrage : invalidés ici plutôt que relus à chaque appel
+        if keys & {"clients_parent_folder", "dossiers_path"}:
+            self.start_ddt_index()
+        if "access_path" in keys:
+            # Connexions ouvertes sur l'ancienne base
+            close_all()
+            self.fiche_cache.clear()
+            self.refresh_data(full=True)
+
+
+    def handle_double_click(self, index):
+        if index.column() == 0:  # Colonne "Nom du client"
+            nom_dossier = self.model.nom_at(index.row())
+            dossier_id = self.model.id_at(index.row())
+            row = self.fiche_cache.get(dossier_id)
+            if row is not None:
+                self.open_fiche_from_row((nom_dossier, row))
+                return
+            db_path = self.config.get("access_path", "")
+            self.statusBar().showMessage(f"Ouverture de la fiche {nom_dossier}…")
+            run_in_background(
+                self.load_fiche_row, dossier_id, nom_dossier, db_path,
+                on_finished=self.open_fiche_from_row,
+                on_failed=self.on_fiche_failed,
+            )
+
+    def load_fiche_row(self, dossier_id, nom_dossier, db_path):
+        # Thread de fond : miroir local d'abord, Access seulement si le dossier n'y est pas encore
+        version = self.fiche_cache.version(dossier_id)
+        row = self.mirror.get_row(dossier_id)
+        if row is None:
+            row = get_repository(db_path).fetch_one("fiche_dossier", (dossier_id,))
+        if row is not None:
+            self.fiche_cache.put(dossier_id, row, version)
+        return nom_dossier, row
+
+    def photo_thumbnail(self, nom, photo, chemin):
+        # Appelé par le modèle pour les seules lignes affichées ; jamais de décodage ici
+        path = resolve_photo_path(photo, chemin)
+        pixmap = self.thumbnails.get(path, TABLE_THUMBNAIL_SIZE)
+        if pixmap is None and self.thumbnails.is_pending(path, TABLE_THUMBNAIL_SIZE):
+            self.photo_waiting.setdefault((path, TABLE_THUMBNAIL_SIZE), set()).add(nom)
+        return pixmap
+
+    def on_thumbnail_ready(self, path, size):
+        for nom in self.photo_waiting.pop((path, size), ()):
+            self.model.refresh_row(nom)
+
+    def prefetch_fiches(self):
+        current = self.table.currentIndex()
+        if not current.isValid():
+            return
+        # Ligne sélectionnée d'abord, puis les voisines visibles à l'écran
+        first = max(self.table.rowAt(0), 0)
+        last = self.table.rowAt(self.table.viewport().height() - 1)
+        if last < 0:
+            last = self.model.rowCount() - 1
+        row = current.row()
+        rows = [row] + [
+            r for offset in range(1, PREFETCH_NEIGHBOURS + 1)
+            for r in (row - offset, row + offset) if first <= r <= last
+        ]
+        ids = [self.model.id_at(r) for r in rows]
+        ids = [dossier_id for dossier_id in ids if dossier_id not in self.fiche_cache]
+        if ids:
+            run_in_background(self.prefetch_fiche_rows, ids)
+
+    def prefetch_fiche_rows(self, ids):
+        # Thread de fond, miroir local seulement : pas de charge sur la base Access
+        versions = {dossier_id: self.fiche_cache.version(dossier_id) for dossier_id in ids}
+        for dossier_id, row in self.mirror.get_rows(ids).items():
+            self.fiche_cache.put(dossier_id, row, versions[dossier_id])
+
+    def open_fiche_from_row(self, result):
+        self.statusBar().clearMessage()
+        nom_dossier, row = result
+        if not row:
+            QMessageBox.warning(self, "Introuvable", f"Aucun dossier trouvé dans la base Access pour {nom_dossier}")
+            return
+        dossier_data = fiche_data(row, self.manual_states.get(nom_dossier), self.fichiers_ddt(nom_dossier))
+        from fiche_client_window import FicheClientWindow
+        fiche = FicheClientWindow(dossier_data, self, thumbnails=self.thumbnails)
+        fiche.exec_()
+
+    def on_fiche_failed(self, message):
+        self.statusBar().clearMessage()
+        QMessageBox.critical(self, "Erreur Base Access", message)
+
+    def start_ddt_index(self):
+        config = self.load_config()
+        base_path = ddt_base_path(config)
+        self.stop_ddt_watcher()
+        # L'index enregistré est utilisable tout de suite ; la mise à jour se fait en fond
+        index = self.ddt_index = DdtIndex(base_path)
+        run_in_background(index.build, on_finished=lambda _: self.on_ddt_index_built(index))
+
+    def stop_ddt_watcher(self):
+        if self.ddt_watcher is None:
+            return
+        self.ddt_watcher.stop()
+        self.ddt_watcher.ddt_changed.disconnect()
+        self.ddt_watcher.failed.disconnect()
+        self.ddt_watcher.deleteLater()
+        self.ddt_watcher = None
+
+    def on_ddt_index_built(self, index):
+        if index is not self.ddt_index:
+            # Un autre index a été lancé entre-temps (dossier parent modifié)
+            return
+        self.model.reset_ddt_statuses()
+        # Ensuite, seuls les dossiers touchés sur le disque sont mis à jour
+        self.stop_ddt_watcher()
+        self.ddt_watcher = DdtWatcher(index, self)
+        self.ddt_watcher.ddt_changed.connect(self.model.refresh_ddt_key)
+        self.ddt_watcher.failed.connect(self.on_ddt_watch_failed)
+        self.ddt_watcher.start()
+
+    def on_ddt_watch_failed(self, message):
+        # La surveillance continue : le prochain sondage retentera la relecture
+        self.statusBar().showMessage(f"Surveillance des rapports DDT : relecture impossible ({message})", 5000)
+
+    def verifier_ddt_local(self, nom_dossier):
+        if self.ddt_index is None:
+            return False
+        return self.ddt_index.has_report(nom_dossier)
+
+    def ddt_envoye(self, nom_dossier):
+        return nom_dossier in self.ddt_envoyes or self.verifier_ddt_local(nom_dossier)
+
+    def fichiers_ddt(self, nom_dossier):
+        """Rapports du dossier : PDF du dossier client et PDF envoyés par Gmail."""
+        locaux = self.ddt_index.reports(nom_dossier) if self.ddt_index is not None else []
+        return locaux + self.ddt_envoyes.get(nom_dossier, [])
+
+    def on_fichiers_envoyes_loaded(self, fichiers):
+        self.fichiers_envoyes = fichiers
+        self.update_ddt_envoyes()
+
+    def update_ddt_envoyes(self):
+        # Un seul passage sur les fichiers, quel que soit le nombre de dossiers
+        if not self.fichiers_envoyes and not self.ddt_envoyes:
+            return
+        self.ddt_envoyes = match_attachments(self.dossiers.column("nom"), self.fichiers_envoyes)
+        self.model.reset_ddt_statuses()
+
+    def load_from_mirror(self):
+        snapshot = {nom: dict(state) for nom, state in self.manual_states.items()}
+        self.mirror_task = run_in_background(
+            self.read_mirror, self.config.get("access_path", ""), snapshot,
+            on_finished=self.on_mirror_loaded,
+            on_failed=self.on_mirror_failed,
+        )
+
+    def read_mirror(self, db_path, manual_states):
+        # Thread de fond : état de synchronisation et dossiers du miroir local
+        self.mirror.load_refresher(self.mirror_refresher, db_path)
+        self.mirror.replace_manual_states(manual_states)
+        return DossierStore.from_dossiers(dossiers_from_rows(self.mirror.list_rows()), manual_states)
+
+    def on_mirror_loaded(self, dossiers):
+        self.mirror_task = None
+        self.dossiers = dossiers
+        self.reload_table()
+        self.report_startup(f"miroir affiché ({len(dossiers)} dossiers)")
+        self.refresh_data()
+
+    def on_mirror_failed(self, message):
+        # Miroir illisible : relecture complète depuis Access
+        self.mirror_task = None
+        self.refresh_data(full=True)
+        if self.sync_task is None:
+            # Pas de relecture Access (base non configurée) : rien d'autre à attendre
+            self.statusBar().showMessage(f"Miroir local illisible : {message}", 5000)
+            self.report_startup("miroir illisible")
+        else:
+            # Remplace le message de synchronisation, en indiquant pourquoi tout est relu
+            self.statusBar().showMessage(f"Miroir local illisible ({message}) : relecture complète de la base Access…")
+            STARTUP.mark("miroir illisible")
+
+    def report_startup(self, label):
+        """Dernière étape du démarrage (--profile-startup) : premiers dossiers affichés."""
+        if STARTUP.reported:
+            return
+        STARTUP.mark(label)
+        STARTUP.report()
+
+    def refresh_data(self, full=False):
+        # Pendant la lecture du miroir, l'état de synchronisation n'est pas encore connu
+        if self.sync_task is not None or self.mirror_task is not None:
+            return
+
+        config = self.load_config()
+        db_path = config.get("access_path", "")
+        if not os.path.exists(db_path):
+            QMessageBox.critical(self, "Erreur", f"Fichier introuvable : {db_path}")
+            return
+
+        # Actualisation incrémentale : seules les lignes modifiées sont relues
+        if full:
+            self.mirror_refresher.reset()
+        self.statusBar().showMessage("Synchronisation avec la base Access…")
+        self.streaming = False
+        self.show_sync_progress(True)
+        self.sync_task = run_in_background(
+            sync_from_access, self.mirror, self.mirror_refresher, db_path,
+            on_finished=self.on_sync_finished,
+            on_failed=self.on_sync_failed,
+            on_cancelled=self.on_sync_cancelled,
+            on_batch=self.on_sync_batch,
+            on_progress=self.on_sync_progress,
+        )
+
+    def show_sync_progress(self, visible):
+        # La barre reste affichée tant qu'une synchronisation, un scan Gmail ou un export tourne
+        visible = visible or any(task is not None for task in (self.sync_task, self.ddt_scan_task, self.export_task))
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.setVisible(visible)
+        self.btn_cancel_sync.setVisible(visible)
+
+    def cancel_sync(self):
+        for task in (self.sync_task, self.ddt_scan_task, self.export_task):
+            if task is not None:
+                task.cancel()
+
+    def on_sync_batch(self, rows):
+        # Relecture complète : les dossiers s'affichent au fur et à mesure des paquets
+        if not self.streaming:
+            self.streaming = True
+            self.dossiers = DossierStore()
+            # Index de recherche vidé : ses positions sont celles de l'ancien store
+            self.search_index.rebuild(())
+            # Critère lié au nouveau store : l'ancien testerait les positions de l'ancien
+            accepts, _ = self.current_filter()
+            self.model.set_dossiers(self.dossiers, accepts)
+        self.model.append_dossiers(dossiers_from_rows(rows))
+        # Sans miroir, le premier affichage est celui du premier paquet Access
+        self.report_startup(f"premier paquet Access affiché ({len(rows)} dossiers)")
+
+    def on_sync_progress(self, done, total):
+        self.progress_bar.setRange(0, max(total, done))
+        self.progress_bar.setValue(done)
+
+    def on_sync_finished(self, delta):
+        self.sync_task = None
+        self.show_sync_progress(False)
+        if delta.full:
+            if not self.streaming:
+                self.dossiers = DossierStore.from_dossiers(dossiers_from_rows(delta.added), self.manual_states)
+            self.streaming = False
+            self.reload_table()
+            self.update_ddt_envoyes()
+            self.report_startup(f"dossiers Access affichés ({len(self.dossiers)} dossiers)")
+            self.statusBar().showMessage(f"{len(self.dossiers)} dossier(s) chargé(s).", 5000)
+            return
+        self.merge_delta(delta)
+
+    def on_sync_failed(self, message):
+        self.sync_task = None
+        self.streaming = False
+        self.show_sync_progress(False)
+        self.report_startup("échec de la lecture Access")
+        self.statusBar().clearMessage()
+        QMessageBox.critical(self, "Erreur Base Access", message)
+
+    def on_sync_cancelled(self):
+        self.sync_task = None
+        self.streaming = False
+        self.show_sync_progress(False)
+        self.report_startup("lecture Access annulée")
+        self.statusBar().showMessage("Synchronisation annulée.", 5000)
+
+    def merge_delta(self, delta):
+        if delta.is_empty():
+            self.statusBar().showMessage("Aucune modification dans la base Access.", 3000)
+            return
+
+        positions = (self.dossiers.position_of_id(dossier_id) for dossier_id in delta.removed)
+        removed = {self.dossiers.nom(i) for i in positions if i is not None}
+        added = dossiers_from_rows(delta.added)
+
+        # Mise à jour en place, ligne par ligne (id Access) : le modèle affiche ce même store
+        updated = []
+        for dossier in dossiers_from_rows(delta.modified):
+            i = self.dossiers.position_of_id(dossier["id"])
+            if i is not None:
+                self.dossiers.update(i, dossier)
+                updated.append(dossier)
+        self.dossiers.remove(delta.removed)
+        self.dossiers.append(added, self.manual_states)
+        self.statistiques.apply_delta(delta)
+        if self.statistiques_task is not None:
+            # Reconstruction en cours sur un état antérieur du miroir : à refaire
+            self.statistiques_stale = True
+        for dossier_id in delta.removed:
+            self.fiche_cache.invalidate(dossier_id)
+        for dossier in updated + added:
+            self.fiche_cache.invalidate(dossier["id"])
+        if removed:
+            # Index de recherche par position : les lignes qui suivent ont été décalées
+            self.rebuild_search_index()
+        else:
+            for dossier in updated + added:
+                i = self.dossiers.position_of_id(dossier["id"])
+                self.search_index.update(i, dossier["nom"], self.search_text(i))
+
+        # Index de filtres reconstruit : les positions des dossiers ont pu changer
+        options = {name: set(bitmaps) for name, bitmaps in self.filter_index.bitmaps.items()}
+        self.filter_index.rebuild(self.dossiers)
+        options_changed = options != {name: set(bitmaps) for name, bitmaps in self.filter_index.bitmaps.items()}
+        if options_changed:
+            self.update_filter_options()
+        if added or removed or options_changed:
+            accepts, rows = self.current_filter()
+            self.model.set_dossiers(self.dossiers, accepts, rows)
+        else:
+            self.model.refresh_dossiers([self.dossiers.position_of_id(dossier["id"]) for dossier in updated])
+            self.update_filter_counts()
+        if added:
+            self.update_ddt_envoyes()
+
+        self.statusBar().showMessage(
+            f"{len(added)} ajouté(s), {len(updated)} modifié(s), {len(delta.removed)} supprimé(s).", 5000
+        )
+
+    def search_text(self, i):
+        return f"{self.dossiers.get(i, 'recherche')} {self.dossiers.get(i, 'commentaire')}"
+
+    def rebuild_search_index(self):
+        self.search_index.rebuild(
+            (nom, self.search_text(i)) for i, nom in enumerate(self.dossiers.column("nom"))
+        )
+
+    def reload_table(self):
+        """Nouvelle liste complète de dossiers : index reconstruits puis tableau."""
+        self.fiche_cache.clear()
+        self.rebuild_statistiques()
+        self.rebuild_search_index()
+        self.filter_index.rebuild(self.dossiers)
+        self.update_filter_options()
+        accepts, rows = self.current_filter()
+        self.model.set_dossiers(self.dossiers, accepts, rows)
+
+    def filter_combos(self):
+        return {
+            "type": self.combo_type,
+            "paiement": self.combo_paiement,
+            "assainissement": self.combo_assainissement,
+            "dossier": self.combo_statut_dossier,
+        }
+
+    def filter_criteria(self):
+        """Positions trouvées par la recherche (None sans recherche) et valeur choisie dans chaque liste."""
+        found = self.search_index.search(self.search_input.text())
+        selected = {name: combo.currentData() for name, combo in self.filter_combos().items()}
+        return found, selected
+
+    def current_filter(self):
+        """Renvoie (critère par position, positions des dossiers retenus ou None)."""
+        found, selected = self.filter_criteria()
+        query = self.search_input.text()
+
+        # Dossiers ajoutés au fil d'un chargement : testés un par un, dans le store
+        # courant (il est remplacé au début d'une relecture complète)
+        def matches_filters(i):
+            dossiers = self.dossiers
+            if found is not None:
+                if i < len(self.search_index):
+                    if i not in found:
+                        return False
+                elif not text_matches(query, dossiers.nom(i), self.search_text(i)):
+                    return False
+            return all(value is None or dossiers.get(i, name) == value for name, value in selected.items())
+
+        rows = None
+        if self.filter_index.is_current(self.dossiers):
+            rows, counts = self.filter_index.filter(found, selected)
+            self.show_filter_counts(counts)
+        return matches_filters, rows
+
+    def apply_filters(self):
+        accepts, rows = self.current_filter()
+        self.model.set_filter(accepts, rows)
+
+    def update_filter_counts(self):
+        self.show_filter_counts(self.filter_index.column_counts(self.filter_index.masks(*self.filter_criteria())))
+
+    def show_filter_counts(self, counts):
+        # Nombre de dossiers par valeur, compte tenu des autres critères
+        for name, combo in self.filter_combos().items():
+            for i in range(1, combo.count()):
+                value = combo.itemData(i)
+                combo.setItemText(i, f"{value or '(vide)'} ({counts[name].get(value, 0)})")
+
+    def update_filter_options(self):
+        for name, combo in self.filter_combos().items():
+            current = combo.currentData()
+            combo.blockSignals(True)
+            while combo.count() > 1:
+                combo.removeItem(1)
+            for value in sorted(self.filter_index.bitmaps[name]):
+                # Types et paiements vides ne sont pas proposés, comme avant
+                if value or name in ("assainissement", "dossier"):
+                    combo.addItem(value or "(vide)", value)
+            combo.setCurrentIndex(max(combo.findData(current), 0) if current is not None else 0)
+            combo.blockSignals(False)
+
+    def save_manual_states(self, dossier, field, value):
+        # Le modèle a déjà enregistré la valeur dans self.manual_states et le store :
+        # une ligne ajoutée au journal, pas de réécriture du fichier entier
+        self.manual_states_store.record(dossier, field, value)
+        # La ligne Access du dossier va changer (assainissement, statut, commentaires)
+        for i in self.dossiers.positions_of(dossier):
+            self.fiche_cache.invalidate(self.dossiers.ids[i])
+        if field in self.filter_index.columns:
+            # Valeur nouvelle, ou ancienne valeur qui n'est plus portée par aucun dossier
+            values = set(self.filter_index.bitmaps[field])
+            self.filter_index.update(dossier, field, value)
+            if values != set(self.filter_index.bitmaps[field]):
+                self.update_filter_options()
+            self.update_filter_counts()
+        if field == "commentaire":
+            for i in self.dossiers.positions_of(dossier):
+                self.search_index.update(i, dossier, self.search_text(i))
+        if self.manual_states_store.needs_compaction():
+            self.compact_manual_states()
+        self.mirror.save_manual_state(dossier, self.manual_states[dossier])
+
+        # Mise à jour dans la base Access en écriture différée : l'interface n'attend
+        # pas la base, et plusieurs saisies sur un même dossier ne font qu'un UPDATE
+        db_path = self.config.get("access_path", "")
+        state = self.manual_states[dossier]
+        self.write_queue.submit(
+            dossier,
+            (
+                db_path,
+                (state.get("assainissement", ""), state.get("dossier", ""), state.get("commentaire", ""), dossier),
+            ),
+        )
+
+    def write_manual_states(self, items):
+        # Thread d'écriture : un executemany par base, dans une seule transaction
+        by_db = {}
+        for _, (db_path, params) in items:
+            by_db.setdefault(db_path, []).append(params)
+        for db_path, params_seq in by_db.items():
+            get_repository(db_path).execute_many("maj_etats_manuels", params_seq)
+
+    def on_write_failed(self, message):
+        # Base verrouillée : la file retente seule, les lignes concernées restent marquées
+        self.statusBar().showMessage(f"Échec de l'écriture dans la base Access (nouvel essai automatique) : {message}", 10000)
+
+    def actualiser_ddt_envoyes(self):
+        if self.ddt_scan_task is not None:
+            return
+        # Scan Gmail en arrière-plan : progression et annulation dans la barre d'état
+        self.statusBar().showMessage("Analyse des messages Gmail en cours…")
+        self.btn_ddt.setEnabled(False)
+        self.show_sync_progress(True)
+        self.ddt_scan_task = run_in_background(
+            scan_ddt, self.load_config(),
+            on_finished=self.on_ddt_scan_finished,
+            on_failed=self.on_ddt_scan_failed,
+            on_cancelled=self.on_ddt_scan_cancelled,
+            on_progress=self.on_sync_progress,
+        )
+
+    def end_ddt_scan(self):
+        self.ddt_scan_task = None
+        self.btn_ddt.setEnabled(True)
+        self.show_sync_progress(False)
+
+    def on_ddt_scan_failed(self, message):
+        self.end_ddt_scan()
+        self.statusBar().clearMessage()
+        QMessageBox.critical(self, "Erreur Gmail", f"Erreur lors du scan Gmail : {message}")
+
+    def on_ddt_scan_cancelled(self):
+        self.end_ddt_scan()
+        self.statusBar().showMessage("Scan Gmail annulé.", 5000)
+
+    def on_ddt_scan_finished(self, fichiers_gmail):
+        self.end_ddt_scan()
+        self.statusBar().clearMessage()
+        self.fichiers_envoyes.extend(fichiers_gmail)
+        self.update_ddt_envoyes()
+        QMessageBox.information(
+            self,
+            "Scan terminé",
+            f"La mise à jour des DDT envoyés est terminée ({len(fichiers_gmail)} nouveau(x) PDF).",
+        )
+
+    def rebuild_statistiques(self):
+        if self.statistiques_task is not None:
+            self.statistiques_stale = True
+            return
+        self.statistiques_stale = False
+        self.statistiques_task = run_in_background(
+            build_engine, self.mirror,
+            on_finished=self.on_statistiques_built,
+            on_failed=self.on_statistiques_failed,
+        )
+
+    def on_statistiques_built(self, engine):
+        self.statistiques_task = None
+        self.statistiques = engine
+        if self.statistiques_stale:
+            self.rebuild_statistiques()
+
+    def on_statistiques_failed(self, message):
+        self.statistiques_task = None
+        self.statusBar().showMessage(f"Statistiques non calculées : {message}", 5000)
+
+    def open_statistiques(self):
+        # Les agrégats sont déjà à jour : aucune lecture de la base ici
+        from statistiques_window import StatistiquesWindow
+        StatistiquesWindow(self.statistiques, self).exec_()
+
+    def open_relances(self):
+        # Sélection sur le miroir local : la base Access n'est pas sollicitée
+        from relances_window import RelancesWindow
+        RelancesWindow(self.mirror, self.load_config(), self).exec_()
+
+    def export_selection_pdf(self):
+        if self.export_task is not None:
+            return
+        # Les dossiers affichés : filtres et recherche en cours
+        ids = self.model.visible_ids()
+        if not ids:
+            QMessageBox.information(self, "Export PDF", "Aucun dossier à exporter.")
+            return
+        folder = QFileDialog.getExistingDirectory(self, f"Dossier de destination des {len(ids)} fiche(s)")
+        if not folder:
+            return
+        self.statusBar().showMessage(f"Export PDF de {len(ids)} fiche(s)…")
+        self.btn_export_pdf.setEnabled(False)
+        self.show_sync_progress(True)
+        self.export_task = run_in_background(
+            export_fiches_pdf, self.mirror, ids, folder, self.manual_states, self.fichiers_ddt,
+            on_finished=self.on_export_finished,
+            on_failed=self.on_export_failed,
+            on_cancelled=self.on_export_cancelled,
+            on_progress=self.on_sync_progress,
+        )
+
+    def end_export(self):
+        self.export_task = None
+        self.btn_export_pdf.setEnabled(True)
+        self.show_sync_progress(False)
+
+    def on_export_finished(self, result):
+        self.end_export()
+        self.statusBar().clearMessage()
+        done, errors, missing = result
+        message = f"{done} fiche(s) exportée(s)."
+        if missing:
+            message += f"\n{missing} dossier(s) absent(s) du miroir local (synchronisation en cours ?)."
+        if errors:
+            message += f"\n\n{len(errors)} échec(s) :\n" + "\n".join(errors[:20])
+        QMessageBox.information(self, "Export PDF", message)
+
+    def on_export_failed(self, message):
+        self.end_export()
+        self.statusBar().clearMessage()
+        QMessageBox.critical(self, "Export PDF", f"Erreur lors de l'export : {message}")
+
+    def on_export_cancelled(self):
+        self.end_export()
+        self.statusBar().showMessage("Export PDF annulé.", 5000)
+
+    def open_config(self):
+        from config_window import ConfigWindow, GmailConfigDialog
+        # Index DDT et synchronisation sont relancés par on_config_changed si besoin
+        ConfigWindow(self).exec_()
+        gmail_dialog = GmailConfigDialog(self)
+        gmail_dialog.exec_()
+
+
+    def reset_sort(self):
+        header = self.table.horizontalHeader()
+        header.blockSignals(True)
+        header.setSortIndicator(-1, Qt.AscendingOrder)
+        header.blockSignals(False)
+        self.model.sort(-1)
+
+    def open_fiche_client(self, index):
+        dossier = self.dossiers.record(self.model.position_at(index.row()))
+        if dossier:
+            from fiche_client_window import FicheClientWindow
+            fiche = FicheClientWindow(dossier)
+            fiche.exec_()
+
+    def closeEvent(self, event):
+        self.config_notifier.close()
+        self.cancel_sync()
+        self.stop_ddt_watcher()
+        self.write_queue.stop()
+        self.thumbnails.stop()
+        self.manual_states_store.compact(self.manual_states, self.manual_states_store.journal_offset())
+        self.manual_states_store.close()
+        # Bilan des temps d'accès à la base (connexions, requêtes)
+        summary = stats_summary()
+        if summary:
+            print(summary)
+        close_all()
+        super().closeEvent(event)
+
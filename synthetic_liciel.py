@@ -0,0 +1,258 @@
+import os
+import random
+import re
+import sqlite3
+import zipfile
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta
+
+from access_repository import AccessRepository, register_repository
+
+
+# Jeu d'essai pour le banc de mesure : une table Donnees_Dossiers synthétique
+# dans une base SQLite (lue par AccessRepository comme la base Access) et
+# l'arborescence de dossiers clients correspondante.
+
+STRUCTURE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "structure_liciel.xlsx")
+TABLE = "Donnees_Dossiers"
+# Colonnes lues par l'application mais absentes de la structure LICIEL
+# (fiche, statistiques, relances et écriture des états manuels)
+APP_COLUMNS = (
+    "facturation_ttc", "facturation_paye", "client_nom", "client_prenom", "client_email",
+    "donneur_ordre", "assainissement", "statut_dossier", "commentaires",
+)
+INSERT_BATCH_SIZE = 5000
+
+_XLSX_NS = {"x": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+_CELL_COLUMN = re.compile(r"[A-Z]+")
+
+TYPES = ("Vente", "Location", "Avant travaux", "Vente + Gaz", "DPE seul", "Amiante avant démolition", "")
+PAIEMENTS = ("Payé", "Non payé", "Partiel", "")
+DONNEURS = ("RENAULT", "FONCIA", "CENTURY21", "ORPI", "LAFORET", "NOTAIRE", "PARTICULIER", "NEXITY")
+NOMS = (
+    "Martin", "Bernard", "Dubois", "Thomas", "Robert", "Richard", "Petit", "Durand", "Leroy",
+    "Moreau", "Simon", "Laurent", "Lefèvre", "Michel", "Garcia", "David", "Bertrand", "Roux",
+    "Vincent", "Fournier", "Morel", "Girard", "André", "Mercier", "Dupont", "Lambert", "Bonnet",
+)
+PRENOMS = ("Éric", "Marie", "Jean", "Nathalie", "Pierre", "Isabelle", "Luc", "Sophie", "Hélène", "Paul")
+VILLES = (
+    ("35000", "Rennes"), ("44000", "Nantes"), ("56000", "Vannes"), ("29200", "Brest"),
+    ("22000", "Saint-Brieuc"), ("35400", "Saint-Malo"), ("53000", "Laval"), ("49000", "Angers"),
+)
+RUES = ("rue de la Paix", "avenue Jean Jaurès", "boulevard de la Liberté", "place du Marché", "allée des Tilleuls")
+ASSAINISSEMENTS = ("Collectif", "Individuel", "Non concerné")
+STATUTS = ("En cours", "Terminé", "Archivé")
+
+
+def liciel_columns(structure_path=STRUCTURE_PATH):
+    """Colonnes de Donnees_Dossiers d'après structure_liciel.xlsx (colonne A : table, B : colonne)."""
+    with zipfile.ZipFile(structure_path) as z:
+        strings = [
+            "".join(t.text or "" for t in si.iter(f"{{{_XLSX_NS['x']}}}t"))
+            for si in ET.fromstring(z.read("xl/sharedStrings.xml")).findall("x:si", _XLSX_NS)
+        ]
+        sheet = ET.fromstring(z.read("xl/worksheets/sheet1.xml"))
+    columns = []
+    for row in sheet.iter(f"{{{_XLSX_NS['x']}}}row"):
+        values = {}
+        for cell in row.findall("x:c", _XLSX_NS):
+            v = cell.find("x:v", _XLSX_NS)
+            if v is None:
+                continue
+            text = strings[int(v.text)] if cell.get("t") == "s" else v.text
+            values[_CELL_COLUMN.match(cell.get("r")).group()] = text
+        if values.get("A") == TABLE and values.get("B"):
+            columns.append(values["B"])
+    return columns
+
+
+def _is_date_column(column):
+    return "date" in column.lower() or column == "Date_commande"
+
+
+def _sql_type(column):
+    if column == "id":
+        return "INTEGER PRIMARY KEY"
+    if _is_date_column(column):
+        # Converti en datetime à la lecture (detect_types), comme le renvoie pyodbc
+        return "TIMESTAMP"
+    if column.startswith("facturation_") and not _is_date_column(column):
+        return "REAL"
+    return "TEXT"
+
+
+def _quote(column):
+    return '"' + column.replace('"', '""') + '"'
+
+
+def num_dossier(i, rng):
+    return f"{20 + i % 6}/{rng.choice(DONNEURS)}/{i:06d}"
+
+
+def folder_name(nom):
+    # « 24/RENAULT/000063 » -> « 24_RENAULT_000063 » (même nom normalisé)
+    return nom.replace("/", "_")
+
+
+def generate_rows(count, columns, base_path, seed=0):
+    """Lignes synthétiques de Donnees_Dossiers, reproductibles pour un même ``seed``."""
+    rng = random.Random(seed)
+    start = datetime(2020, 1, 6, 8, 0)
+    for i in range(1, count + 1):
+        nom = num_dossier(i, rng)
+        cp, ville = rng.choice(VILLES)
+        proprietaire = rng.choice(NOMS)
+        donneur = nom.split("/")[1]
+        rdv = start + timedelta(days=rng.randrange(6 * 365), hours=rng.randrange(10))
+        ttc = round(rng.uniform(90, 900), 2)
+        paye = rng.choice((ttc, ttc, 0.0, round(ttc / 2, 2)))
+        values = {
+            "id": i,
+            "Num_dossier": nom,
+            "type_de_dossier": rng.choice(TYPES),
+            "dossier_etat_paie": "Payé" if paye == ttc else rng.choice(PAIEMENTS),
+            "rdv_date": rdv.replace(hour=0),
+            "rdv_heure": rng.choice(("{:02d} h 00", "{}h30", "{:02d}:15")).format(rdv.hour),
+            "date_modification": rdv + timedelta(days=rng.randrange(60)),
+            "dossier_Acces": os.path.join(base_path, f"dossiers_{rdv.year}", folder_name(nom)),
+            "photo_de_presentation": "photo.jpg" if rng.random() < 0.7 else "",
+            "proprietaire_nom": proprietaire,
+            "proprietaire_adresse": f"{rng.randrange(1, 120)} {rng.choice(RUES)}",
+            "proprietaire_cp": cp,
+            "proprietaire_ville": ville,
+            "proprietaire_mail": f"{proprietaire.lower()}{i}@example.fr" if rng.random() < 0.8 else "",
+            "bien_adresse": f"{rng.randrange(1, 120)} {rng.choice(RUES)}",
+            "bien_cp": cp,
+            "bien_ville": ville,
+            "dordre_nom": donneur.title(),
+            "dordre_mail": f"contact@{donneur.lower()}.example.fr",
+            "facturation_ttc": ttc,
+            "facturation_paye": paye,
+            "facturation_restante": round(ttc - paye, 2),
+            "client_nom": proprietaire,
+            "client_prenom": rng.choice(PRENOMS),
+            "donneur_ordre": donneur.title(),
+            "assainissement": rng.choice(ASSAINISSEMENTS) if rng.random() < 0.3 else "",
+            "statut_dossier": rng.choice(STATUTS) if rng.random() < 0.3 else "",
+            "commentaires": "",
+        }
+        row = []
+        for column in columns:
+            if column in values:
+                row.append(values[column])
+            elif _is_date_column(column):
+                row.append(rdv if rng.random() < 0.5 else None)
+            elif column.startswith("facturation_"):
+                row.append(None)
+            else:
+                # Champs libres de LICIEL : le plus souvent vides
+                row.append(f"{column} {i}" if rng.random() < 0.2 else None)
+        yield row
+
+
+def _register_sqlite_types():
+    sqlite3.register_adapter(datetime, lambda value: value.isoformat(sep=" "))
+    sqlite3.register_converter("TIMESTAMP", lambda value: datetime.fromisoformat(value.decode()))
+
+
+def create_database(db_path, count, base_path, seed=0, structure_path=STRUCTURE_PATH):
+    """Crée la base SQLite de ``count`` dossiers ; renvoie les noms des dossiers."""
+    _register_sqlite_types()
+    columns = liciel_columns(structure_path)
+    columns += [column for column in APP_COLUMNS if column not in columns]
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    noms = []
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute(
+            f"CREATE TABLE {TABLE} ({', '.join(f'{_quote(c)} {_sql_type(c)}' for c in columns)})"
+        )
+        insert = (
+            f"INSERT INTO {TABLE} ({', '.join(_quote(c) for c in columns)}) "
+            f"VALUES ({', '.join('?' for _ in columns)})"
+        )
+        name_index = columns.index("Num_dossier")
+        batch = []
+        for row in generate_rows(count, columns, base_path, seed):
+            noms.append(row[name_index])
+            batch.append(row)
+            if len(batch) >= INSERT_BATCH_SIZE:
+                conn.executemany(insert, batch)
+                batch = []
+        conn.executemany(insert, batch)
+        conn.commit()
+    finally:
+        conn.close()
+    return noms
+
+
+def touch_rows(db_path, fraction, seed=0):
+    """Modifie une fraction des dossiers (statut de paiement, date de modification) ; renvoie leur nombre."""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(db_path)
+    try:
+        ids = [row[0] for row in conn.execute(f"SELECT id FROM {TABLE}")]
+        chosen = rng.sample(ids, max(1, int(len(ids) * fraction)))
+        now = datetime.now().isoformat(sep=" ")
+        conn.executemany(
+            f"UPDATE {TABLE} SET dossier_etat_paie = ?, date_modification = ? WHERE id = ?",
+            ((rng.choice(PAIEMENTS), now, dossier_id) for dossier_id in chosen),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    return len(chosen)
+
+
+def sqlite_repository(db_path):
+    """AccessRepository branché sur la base SQLite, installé pour get_repository."""
+    _register_sqlite_types()
+
+    def connect():
+        return sqlite3.connect(db_path, detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+
+    repository = AccessRepository(db_path, connect=connect, errors=(sqlite3.OperationalError,))
+    register_repository(repository)
+    return repository
+
+
+def create_folder_tree(base_path, db_path, report_ratio=0.6, seed=0):
+    """Dossiers clients des lignes de la base, avec des rapports PDF pour ``report_ratio`` d'entre eux.
+
+    Renvoie le nombre de PDF de rapport créés.
+    """
+    rng = random.Random(seed)
+    conn = sqlite3.connect(db_path)
+    try:
+        paths = [row[0] for row in conn.execute(f"SELECT dossier_Acces FROM {TABLE}")]
+    finally:
+        conn.close()
+    reports = 0
+    for path in paths:
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, "photo.jpg"), "wb"):
+            pass
+        if rng.random() < report_ratio:
+            for name in rng.sample(("DPE.pdf", "rapport_amiante.pdf", "DDT_complet.pdf"), rng.randrange(1, 3)):
+                with open(os.path.join(path, name), "wb") as f:
+                    f.write(b"%PDF-1.4\n")
+                reports += 1
+        else:
+            # PDF qui ne sont pas des rapports (devis, plans)
+            with open(os.path.join(path, "devis.pdf"), "wb") as f:
+                f.write(b"%PDF-1.4\n")
+    return reports
+
+
+def gmail_messages(noms, ratio=0.3, per_message=2, seed=0):
+    """Résultat simulé d'un scan Gmail : {id du message: [noms de PDF]}."""
+    rng = random.Random(seed)
+    messages = {}
+    for i, nom in enumerate(noms):
+        if rng.random() >= ratio:
+            continue
+        files = [f"DDT_{folder_name(nom)}.pdf"]
+        files += [f"Annexe_{i}_{k}.pdf" for k in range(per_message - 1)]
+        messages[f"msg{i:08d}"] = files
+    return messages
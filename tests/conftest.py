@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+# Modules de l'application à la racine du dépôt
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from access_repository import close_all  # noqa: E402
+from synthetic_liciel import create_database, sqlite_repository  # noqa: E402
+
+
+@pytest.fixture
+def liciel_db(tmp_path):
+    """Base SQLite synthétique de 50 dossiers, servie par get_repository comme la base Access."""
+    db_path = str(tmp_path / "liciel.sqlite")
+    noms = create_database(db_path, 50, str(tmp_path / "clients"))
+    sqlite_repository(db_path)
+    yield db_path, noms
+    close_all()
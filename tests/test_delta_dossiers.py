@@ -0,0 +1,96 @@
+import sqlite3
+from datetime import datetime
+
+from access_repository import get_repository
+from local_mirror import LocalMirror, new_mirror_refresher, sync_from_access
+from synthetic_liciel import TABLE, touch_rows
+
+
+def _execute(db_path, sql, params=()):
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute(sql, params)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _now():
+    return datetime.now().isoformat(sep=" ")
+
+
+def test_first_refresh_is_full(liciel_db):
+    db_path, noms = liciel_db
+    refresher = new_mirror_refresher()
+    batches = []
+    delta = refresher.refresh(get_repository(db_path), db_path, lambda rows, done, total: batches.append(done))
+    assert delta.full
+    assert sorted(row["Num_dossier"] for row in delta.added) == sorted(noms)
+    assert batches[-1] == len(noms)
+
+
+def test_unchanged_base_gives_empty_delta(liciel_db):
+    db_path, _ = liciel_db
+    refresher = new_mirror_refresher()
+    refresher.refresh(get_repository(db_path), db_path)
+    delta = refresher.refresh(get_repository(db_path), db_path)
+    assert not delta.full
+    assert delta.is_empty()
+
+
+def test_modified_rows(liciel_db):
+    db_path, _ = liciel_db
+    refresher = new_mirror_refresher()
+    refresher.refresh(get_repository(db_path), db_path)
+    touched = touch_rows(db_path, 0.1, seed=1)
+    delta = refresher.refresh(get_repository(db_path), db_path)
+    assert len(delta.modified) == touched
+    assert not delta.added and not delta.removed
+
+
+def test_added_removed_and_renamed_rows(liciel_db):
+    db_path, _ = liciel_db
+    refresher = new_mirror_refresher()
+    refresher.refresh(get_repository(db_path), db_path)
+
+    _execute(db_path, f"INSERT INTO {TABLE} (id, Num_dossier, date_modification) VALUES (1000, 'NOUVEAU', ?)", (_now(),))
+    _execute(db_path, f"DELETE FROM {TABLE} WHERE id = 2")
+    _execute(db_path, f"UPDATE {TABLE} SET Num_dossier = 'RENOMME', date_modification = ? WHERE id = 3", (_now(),))
+    delta = refresher.refresh(get_repository(db_path), db_path)
+
+    assert sorted(row["Num_dossier"] for row in delta.added) == ["NOUVEAU", "RENOMME"]
+    # Ligne supprimée (id 2) et ligne renommée (id 3), qui revient parmi les ajouts
+    assert sorted(delta.removed) == [2, 3]
+    assert not delta.modified
+    assert refresher.refresh(get_repository(db_path), db_path).is_empty()
+
+
+def test_mirror_follows_access(liciel_db, tmp_path):
+    db_path, noms = liciel_db
+    mirror = LocalMirror(str(tmp_path / "miroir.sqlite"))
+    refresher = new_mirror_refresher()
+    sync_from_access(mirror, refresher, db_path)
+    assert len(mirror.list_rows()) == len(noms)
+
+    _execute(db_path, f"DELETE FROM {TABLE} WHERE id = 1")
+    sync_from_access(mirror, refresher, db_path)
+    assert noms[0] not in {row["Num_dossier"] for row in mirror.list_rows()}
+
+    # État de synchronisation relu depuis le miroir : pas de relecture complète
+    reloaded = new_mirror_refresher()
+    mirror.load_refresher(reloaded, db_path)
+    assert reloaded.refresh(get_repository(db_path), db_path).is_empty()
+
+
+def test_mirror_removes_one_of_two_rows_with_the_same_name(liciel_db, tmp_path):
+    db_path, noms = liciel_db
+    mirror = LocalMirror(str(tmp_path / "miroir.sqlite"))
+    refresher = new_mirror_refresher()
+    _execute(db_path, f"INSERT INTO {TABLE} (id, Num_dossier, date_modification) VALUES (1000, ?, ?)", (noms[0], _now()))
+    sync_from_access(mirror, refresher, db_path)
+
+    _execute(db_path, f"DELETE FROM {TABLE} WHERE id = 1")
+    sync_from_access(mirror, refresher, db_path)
+    assert mirror.get_row(1) is None
+    assert mirror.get_row(1000)["Num_dossier"] == noms[0]
+    assert set(mirror.get_rows([1, 1000, 2])) == {1000, 2}
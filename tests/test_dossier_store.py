@@ -0,0 +1,82 @@
+from itertools import count
+
+from dossier_store import NO_TIMESTAMP, DossierStore
+
+
+_ids = count(1)
+
+
+def _dossier(nom, type_="Vente", paiement="Payé", horodatage=None):
+    return {
+        "id": next(_ids), "nom": nom, "date": "", "photo": "photo.jpg", "chemin": f"C:/clients/{nom}", "recherche": nom,
+        "type": type_, "paiement": paiement, "horodatage": horodatage,
+    }
+
+
+def test_manual_states_are_joined():
+    store = DossierStore.from_dossiers(
+        [_dossier("A", horodatage=1000), _dossier("B")],
+        {"A": {"assainissement": "Collectif", "commentaire": "clés en agence"}},
+    )
+    assert len(store) == 2
+    record = store.record(0)
+    assert record["assainissement"] == "Collectif"
+    assert record["commentaire"] == "clés en agence"
+    assert record["dossier"] == ""
+    assert record["horodatage"] == 1000
+    assert store.get(1, "horodatage") is None
+    assert store.horodatage[1] == NO_TIMESTAMP
+
+
+def test_category_values_are_shared():
+    store = DossierStore.from_dossiers([_dossier("A"), _dossier("B"), _dossier("C", type_="Location")])
+    assert store.categories["type"].values == ["Vente", "Location"]
+    assert list(store.codes["type"]) == [0, 0, 1]
+    assert store.column("type") == ["Vente", "Vente", "Location"]
+
+
+def test_set_state_and_update():
+    store = DossierStore.from_dossiers([_dossier("A")])
+    assert store.set_state(0, "dossier", "Terminé")
+    assert not store.set_state(0, "dossier", "Terminé")
+    store.update(0, _dossier("A", paiement="Non payé", horodatage=5))
+    assert store.get(0, "paiement") == "Non payé"
+    assert store.get(0, "horodatage") == 5
+    # Les saisies manuelles ne viennent pas de la base
+    assert store.get(0, "dossier") == "Terminé"
+
+
+def test_duplicated_names_keep_every_position():
+    store = DossierStore.from_dossiers([_dossier("A"), _dossier("B"), _dossier("A")])
+    assert store.position("A") == 0
+    assert list(store.positions_of("A")) == [0, 2]
+    assert list(store.positions_of("B")) == [1]
+    assert list(store.positions_of("Z")) == []
+
+
+def test_remove_shifts_positions():
+    dossiers = [_dossier("A"), _dossier("B"), _dossier("A"), _dossier("C")]
+    store = DossierStore.from_dossiers(dossiers)
+    store.remove([dossiers[1]["id"]])
+    assert store.column("nom") == ["A", "A", "C"]
+    assert list(store.positions_of("A")) == [0, 1]
+    assert store.position("C") == 2
+    assert store.position_of_id(dossiers[3]["id"]) == 2
+    assert store.position_of_id(dossiers[1]["id"]) is None
+    assert len(store.codes["type"]) == len(store.horodatage) == len(store.ids) == 3
+
+
+def test_remove_one_of_two_duplicates():
+    dossiers = [_dossier("A"), _dossier("B"), _dossier("A")]
+    store = DossierStore.from_dossiers(dossiers)
+    store.remove([dossiers[0]["id"]])
+    assert store.column("nom") == ["B", "A"]
+    assert list(store.positions_of("A")) == [1]
+    assert store.duplicates == {}
+    assert store.record(1)["id"] == dossiers[2]["id"]
+
+
+def test_remove_unknown_id_is_a_no_op():
+    store = DossierStore.from_dossiers([_dossier("A")])
+    store.remove([-5])
+    assert store.column("nom") == ["A"]
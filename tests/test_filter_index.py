@@ -0,0 +1,104 @@
+from itertools import count
+
+from dossier_store import DossierStore
+from filter_index import FilterIndex, rows_of
+
+
+COLUMNS = ("type", "paiement", "assainissement", "dossier")
+_ids = count(1)
+
+
+def _dossier(nom, type_, paiement):
+    return {
+        "id": next(_ids), "nom": nom, "date": "", "photo": "", "chemin": "", "recherche": nom,
+        "type": type_, "paiement": paiement, "horodatage": None,
+    }
+
+
+def _index(store):
+    index = FilterIndex(COLUMNS)
+    index.rebuild(store)
+    return index
+
+
+def _store():
+    return DossierStore.from_dossiers(
+        [
+            _dossier("A", "Vente", "Payé"),
+            _dossier("B", "Location", "Non payé"),
+            _dossier("C", "Vente", "Non payé"),
+            _dossier("D", "Vente", "Payé"),
+        ],
+        {"B": {"dossier": "Terminé"}},
+    )
+
+
+def test_rows_of():
+    assert rows_of(0) == []
+    assert rows_of(0b10110) == [1, 2, 4]
+
+
+def test_masks_and_counts():
+    index = _index(_store())
+    assert rows_of(index.mask("type", "Vente")) == [0, 2, 3]
+    assert index.counts("paiement") == {"Payé": 2, "Non payé": 2}
+    assert index.counts("dossier") == {"": 3, "Terminé": 1}
+
+
+def test_filter_counts_each_column_with_the_other_criteria():
+    index = _index(_store())
+    rows, counts = index.filter(None, {"type": "Vente", "paiement": "Non payé", "dossier": None})
+    assert rows == [2]
+    # Nombres d'une liste : ceux que donnerait le choix de chacune de ses valeurs
+    assert counts["type"] == {"Vente": 1, "Location": 1}
+    assert counts["paiement"] == {"Payé": 2, "Non payé": 1}
+
+
+def test_filter_with_search():
+    index = _index(_store())
+    # Recherche : positions trouvées par SearchIndex
+    rows, counts = index.filter({0, 1}, {"type": "Vente"})
+    assert rows == [0]
+    assert counts["type"] == {"Vente": 1, "Location": 1}
+    assert index.filter(set(), {})[0] == []
+
+
+def test_update_moves_the_dossier_and_drops_empty_values():
+    store = _store()
+    index = _index(store)
+    index.update("B", "dossier", "Archivé")
+    assert index.counts("dossier") == {"": 3, "Archivé": 1}
+    assert set(index.bitmaps["dossier"]) == {"", "Archivé"}
+
+
+def test_duplicated_names_are_filtered_on_every_row():
+    store = DossierStore.from_dossiers([
+        _dossier("A", "Vente", "Payé"),
+        _dossier("B", "Location", "Payé"),
+        _dossier("A", "Vente", "Non payé"),
+    ])
+    index = _index(store)
+    assert rows_of(index.mask_of_names({"A"})) == [0, 2]
+    index.update("A", "assainissement", "Collectif")
+    assert rows_of(index.mask("assainissement", "Collectif")) == [0, 2]
+
+
+def test_positions_after_remove():
+    store = _store()
+    store.remove([store.ids[store.position("B")]])
+    index = _index(store)
+    assert rows_of(index.mask_of_names({"C", "D"})) == [1, 2]
+    assert rows_of(index.mask("paiement", "Non payé")) == [1]
+
+
+def test_rows_appended_after_rebuild_are_ignored():
+    store = _store()
+    index = _index(store)
+    store.append([_dossier("E", "Vente", "Payé")])
+    assert not index.is_current(store)
+    assert rows_of(index.mask_of_names({"E", "A"})) == [0]
+
+
+def test_search_positions_mask():
+    index = _index(_store())
+    assert rows_of(index.mask_of_positions({1, 3, 9})) == [1, 3]
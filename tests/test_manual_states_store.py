@@ -0,0 +1,86 @@
+import json
+
+from manual_states_store import COMPACT_THRESHOLD, ManualStatesStore
+
+
+def _store(tmp_path):
+    return ManualStatesStore(str(tmp_path / "manual_states.json"))
+
+
+def test_journal_is_replayed_on_snapshot(tmp_path):
+    store = _store(tmp_path)
+    with open(store.path, "w", encoding="utf-8") as f:
+        json.dump({"A": {"dossier": "En cours"}}, f)
+    store.record("A", "dossier", "Terminé")
+    store.record("B", "commentaire", "rappeler")
+    store.close()
+
+    reloaded = _store(tmp_path)
+    assert reloaded.load() == {"A": {"dossier": "Terminé"}, "B": {"commentaire": "rappeler"}}
+    assert reloaded.journal_entries == 2
+
+
+def test_damaged_journal_lines_are_skipped(tmp_path):
+    store = _store(tmp_path)
+    store.record("A", "dossier", "Terminé")
+    store.close()
+    with open(store.journal_path, "a", encoding="utf-8") as f:
+        f.write('{"nom": "B"}\n[1, 2]\n{"nom": "C", "field": "doss')
+
+    reloaded = _store(tmp_path)
+    assert reloaded.load() == {"A": {"dossier": "Terminé"}}
+    assert reloaded.journal_entries == 1
+
+
+def test_compaction_keeps_lines_written_after_the_snapshot(tmp_path):
+    store = _store(tmp_path)
+    states = store.load()
+    store.record("A", "dossier", "Terminé")
+    states["A"] = {"dossier": "Terminé"}
+    snapshot = {nom: dict(state) for nom, state in states.items()}
+    offset = store.journal_offset()
+    # Saisie arrivée pendant l'écriture de l'instantané en arrière-plan
+    store.record("B", "assainissement", "Collectif")
+    store.compact(snapshot, offset)
+    assert store.journal_entries == 1
+    store.close()
+
+    with open(store.path, encoding="utf-8") as f:
+        assert json.load(f) == {"A": {"dossier": "Terminé"}}
+    assert _store(tmp_path).load() == {"A": {"dossier": "Terminé"}, "B": {"assainissement": "Collectif"}}
+
+
+def test_stale_compaction_is_ignored(tmp_path):
+    store = _store(tmp_path)
+    store.load()
+    store.record("A", "dossier", "En cours")
+    old_snapshot, old_offset = {"A": {"dossier": "En cours"}}, store.journal_offset()
+    store.record("A", "dossier", "Terminé")
+    store.compact({"A": {"dossier": "Terminé"}}, store.journal_offset())
+    # Compaction lancée plus tôt, exécutée après la plus récente
+    store.compact(old_snapshot, old_offset)
+    store.close()
+    assert _store(tmp_path).load() == {"A": {"dossier": "Terminé"}}
+
+
+def test_needs_compaction(tmp_path):
+    store = _store(tmp_path)
+    store.load()
+    for i in range(COMPACT_THRESHOLD - 1):
+        store.record(f"D{i}", "dossier", "x")
+    assert not store.needs_compaction()
+    store.record("D", "dossier", "x")
+    assert store.needs_compaction()
+    store.close()
+
+
+def test_damaged_snapshot_is_salvaged(tmp_path):
+    store = _store(tmp_path)
+    with open(store.path, "w", encoding="utf-8") as f:
+        f.write('{"A": {"dossier": "Terminé"}, "B": {"commentaire": "tronq')
+
+    states = store.load()
+    assert states == {"A": {"dossier": "Terminé"}}
+    assert store.recovered == 1
+    assert store.needs_compaction()
+    assert (tmp_path / "manual_states.json.corrompu").exists()
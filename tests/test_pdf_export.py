@@ -0,0 +1,81 @@
+import os
+import re
+
+from pdf_export import PROCESS_THRESHOLD, export_fiches, fiche_filename, jpeg_info, write_fiche_pdf
+
+
+def _jpeg(width, height, components=3):
+    """En-têtes d'un JPEG (APP0 puis SOF0) : assez pour jpeg_info et l'intégration telle quelle."""
+    app0 = b"\xff\xe0" + (16).to_bytes(2, "big") + b"JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00"
+    sof = (
+        b"\xff\xc0" + (8 + 3 * components).to_bytes(2, "big") + b"\x08"
+        + height.to_bytes(2, "big") + width.to_bytes(2, "big") + bytes([components])
+        + b"\x01\x11\x00" * components
+    )
+    return b"\xff\xd8" + app0 + sof + b"\xff\xd9"
+
+
+def _fiche(nom, **values):
+    return dict({"nom_du_dossier": nom, "client_nom": "Dupré", "montant_ttc": "250,00 €"}, **values)
+
+
+def _check_xref(data):
+    """Chaque entrée de la table de références pointe sur son objet."""
+    xref = int(re.search(rb"startxref\n(\d+)\n%%EOF\n$", data).group(1))
+    size = int(re.match(rb"xref\n0 (\d+)\n", data[xref:]).group(1))
+    entries = data[xref:].split(b"\n")[2:2 + size]
+    for obj_id, entry in enumerate(entries[1:], 1):
+        offset = int(entry[:10])
+        assert data[offset:].startswith(b"%d 0 obj\n" % obj_id)
+
+
+def test_jpeg_info():
+    assert jpeg_info(_jpeg(640, 480)) == (640, 480, 3)
+    assert jpeg_info(_jpeg(10, 20, components=1)) == (10, 20, 1)
+    assert jpeg_info(b"\x89PNG\r\n\x1a\n") is None
+
+
+def test_fiche_filename():
+    assert fiche_filename(_fiche("24/RENAULT/000063")) == "fiche_24_RENAULT_000063.pdf"
+    assert fiche_filename({}) == "fiche_dossier.pdf"
+
+
+def test_fiche_pdf_structure(tmp_path):
+    photo = tmp_path / "photo.jpg"
+    photo.write_bytes(_jpeg(300, 200))
+    path = write_fiche_pdf(_fiche("24/A/1", photo_pdf=str(photo)), str(tmp_path / "fiche.pdf"))
+    data = open(path, "rb").read()
+    assert data.startswith(b"%PDF-1.4\n")
+    _check_xref(data)
+    assert b"/Count 1 " in data
+    assert b"/Subtype /Image /Width 300 /Height 200" in data
+    # Accents en WinAnsiEncoding (cp1252)
+    assert "(Dupré)".encode("cp1252") in data
+    assert not os.path.exists(path + ".tmp")
+
+
+def test_long_comments_continue_on_new_pages(tmp_path):
+    commentaires = "\n".join(f"Ligne {i} du commentaire" for i in range(120))
+    path = write_fiche_pdf(_fiche("24/A/2", commentaires=commentaires), str(tmp_path / "fiche.pdf"))
+    data = open(path, "rb").read()
+    _check_xref(data)
+    pages = int(re.search(rb"/Type /Pages /Kids \[[^\]]*\] /Count (\d+)", data).group(1))
+    assert pages >= 3
+    assert b"(Ligne 119 du commentaire)" in data
+
+
+def test_export_in_worker_processes(tmp_path):
+    fiches = [_fiche(f"24/A/{i}") for i in range(PROCESS_THRESHOLD + 5)]
+    done, errors = export_fiches(fiches, str(tmp_path / "export"), processes=2)
+    assert (done, errors) == (len(fiches), [])
+    assert sorted(os.listdir(tmp_path / "export")) == sorted(fiche_filename(fiche) for fiche in fiches)
+
+
+def test_export_reports_errors_per_fiche(tmp_path):
+    folder = tmp_path / "export"
+    folder.mkdir()
+    # Un dossier porte déjà le nom du PDF : l'écriture de cette fiche échoue, pas les autres
+    (folder / fiche_filename(_fiche("24/A/1"))).mkdir()
+    done, errors = export_fiches([_fiche("24/A/1"), _fiche("24/A/2")], str(folder))
+    assert done == 1
+    assert len(errors) == 1 and errors[0].startswith("24/A/1 : ")
@@ -0,0 +1,125 @@
+import email
+import os
+from email import policy
+
+import pytest
+
+from local_mirror import LocalMirror, new_mirror_refresher, sync_from_access
+from relances import (
+    DEFAULT_BODY, DEFAULT_SUBJECT, EmlWriter, RelanceHistory, SmtpSender,
+    generer_relances, relance_fields, select_relances,
+)
+
+
+ROW = {
+    "Num_dossier": "24/FONCIA/000012", "type_de_dossier": "Vente", "rdv_date": "2024-03-05 00:00:00",
+    "facturation_ttc": 250.0, "facturation_paye": 100.0, "facturation_restante": 150.0,
+    "client_nom": "", "proprietaire_nom": "Dupont", "client_prenom": "Éric",
+    "proprietaire_mail": "eric.dupont@example.fr", "dordre_nom": "Foncia",
+}
+
+
+class FakeSmtp:
+    """Remplace smtplib.SMTP : garde les messages envoyés."""
+
+    sent = []
+
+    def __init__(self, host, port, timeout=None):
+        self.host = host
+
+    def starttls(self):
+        pass
+
+    def login(self, user, password):
+        pass
+
+    def send_message(self, message):
+        FakeSmtp.sent.append(message)
+
+    def quit(self):
+        pass
+
+
+class Cancelled(Exception):
+    pass
+
+
+class CancelAfter:
+    """Contrôle d'une tâche de fond (voir workers.Task), annulée après ``count`` dossiers."""
+
+    def __init__(self, count):
+        self.count = count
+        self.progress = []
+
+    def check_cancelled(self):
+        if len(self.progress) >= self.count:
+            raise Cancelled()
+
+    def emit_progress(self, done, total):
+        self.progress.append(done)
+
+
+def test_relance_fields_fall_back_on_liciel_columns():
+    fields = relance_fields(ROW)
+    assert fields["client"] == "Éric Dupont"
+    assert fields["email"] == "eric.dupont@example.fr"
+    assert fields["donneur_ordre"] == "Foncia"
+    assert fields["date_rdv"] == "05/03/2024"
+    assert fields["reste"] == "150,00 €"
+    assert fields["montant_reste"] == 150.0
+
+
+def test_select_relances_from_mirror(liciel_db, tmp_path):
+    db_path, _ = liciel_db
+    mirror = LocalMirror(str(tmp_path / "miroir.sqlite"))
+    sync_from_access(mirror, new_mirror_refresher(), db_path)
+    candidates = select_relances(mirror)
+    assert candidates
+    restes = [fields["montant_reste"] for fields in candidates]
+    assert all(reste > 0 for reste in restes)
+    assert restes == sorted(restes, reverse=True)
+
+
+def test_eml_drafts_are_written_and_recorded(tmp_path):
+    history = RelanceHistory(str(tmp_path / "historique.sqlite"))
+    candidates = [relance_fields(dict(ROW, Num_dossier=f"24/FONCIA/{i}")) for i in range(3)]
+    done, errors = generer_relances(
+        candidates, DEFAULT_SUBJECT, DEFAULT_BODY, "cabinet@example.fr",
+        EmlWriter(str(tmp_path / "relances")), history,
+    )
+    assert (done, errors) == (3, [])
+    files = sorted(os.listdir(tmp_path / "relances"))
+    assert len(files) == 3
+    with open(tmp_path / "relances" / files[0], "rb") as f:
+        message = email.message_from_bytes(f.read(), policy=policy.default)
+    assert message["To"] == "eric.dupont@example.fr"
+    assert message["X-Unsent"] == "1"
+    assert "150,00 €" in message["Subject"]
+    assert set(history.last_sent()) == {fields["dossier"] for fields in candidates}
+
+
+def test_smtp_reports_missing_addresses(tmp_path):
+    FakeSmtp.sent = []
+    history = RelanceHistory(str(tmp_path / "historique.sqlite"))
+    candidates = [
+        relance_fields(ROW),
+        relance_fields(dict(ROW, Num_dossier="SANS_MAIL", proprietaire_mail="")),
+    ]
+    sender = SmtpSender("smtp.example.fr", interval=0, smtp_factory=FakeSmtp)
+    done, errors = generer_relances(candidates, DEFAULT_SUBJECT, DEFAULT_BODY, "", sender, history)
+    assert done == 1
+    assert errors == ["SANS_MAIL : aucune adresse e-mail"]
+    assert [message["To"] for message in FakeSmtp.sent] == ["eric.dupont@example.fr"]
+    assert list(history.last_sent()) == [ROW["Num_dossier"]]
+
+
+def test_cancel_keeps_the_history_of_sent_messages(tmp_path):
+    FakeSmtp.sent = []
+    history = RelanceHistory(str(tmp_path / "historique.sqlite"))
+    candidates = [relance_fields(dict(ROW, Num_dossier=f"D{i}")) for i in range(10)]
+    sender = SmtpSender("smtp.example.fr", interval=0, smtp_factory=FakeSmtp)
+    with pytest.raises(Cancelled):
+        generer_relances(candidates, DEFAULT_SUBJECT, DEFAULT_BODY, "", sender, history, CancelAfter(4))
+    assert len(FakeSmtp.sent) == 4
+    assert sorted(history.last_sent()) == ["D0", "D1", "D2", "D3"]
+
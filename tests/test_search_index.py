@@ -0,0 +1,68 @@
+from search_index import SearchIndex, normalize_words, text_matches
+
+
+def _index():
+    index = SearchIndex()
+    index.rebuild([
+        ("24/A/1", "Éric Dupont Rennes"),
+        ("24/A/2", "Marie Dupré Nantes"),
+        ("24/A/3", "Jean Martin Rennes clés en agence"),
+    ])
+    return index
+
+
+def test_normalize_words():
+    assert normalize_words("Éric DUPRÉ, 35000 Rennes") == ["eric", "dupre", "35000", "rennes"]
+    assert normalize_words(None) == []
+
+
+def test_empty_query_returns_none():
+    assert _index().search("  ") is None
+
+
+def test_terms_are_word_prefixes_and_all_required():
+    index = _index()
+    assert index.search("dup") == {0, 1}
+    assert index.search("dup ren") == {0}
+    assert index.search("eric") == {0}
+    assert index.search("pont") == set()
+
+
+def test_num_dossier_matches_anywhere():
+    index = SearchIndex()
+    index.rebuild([("24/RENAULT/000063", "Dupont"), ("24/FONCIA/000012", "Martin")])
+    assert index.search("ault") == {0}
+    assert index.search("0012") == {1}
+    assert index.search("ault dup") == {0}
+
+
+def test_duplicated_names_have_their_own_entry():
+    index = SearchIndex()
+    index.rebuild([("24/A/1", "Dupont"), ("24/A/1", "Martin")])
+    assert index.search("martin") == {1}
+    assert index.search("24") == {0, 1}
+
+
+def test_update_and_append():
+    index = _index()
+    assert index.search("cles") == {2}
+    index.update(2, "24/A/3", "Jean Martin Rennes")
+    assert index.search("cles") == set()
+    index.update(1, "24/A/2", "Marie Dupré Nantes clés chez le notaire")
+    assert index.search("cles") == {1}
+    index.update(3, "24/B/4", "Paul Durand Rennes")
+    assert len(index) == 4
+    assert index.search("rennes") == {0, 2, 3}
+
+
+def test_text_matches_follows_search():
+    assert text_matches("dup ren", "24/A/1", "Éric Dupont Rennes")
+    assert text_matches("ault", "24/RENAULT/000063", "")
+    assert not text_matches("pont", "24/A/1", "Éric Dupont Rennes")
+
+
+def test_results_are_not_shared_with_the_index():
+    index = _index()
+    found = index.search("rennes")
+    found.clear()
+    assert index.search("rennes") == {0, 2}
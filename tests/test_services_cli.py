@@ -0,0 +1,107 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+
+import pytest
+
+from services import dossier_from_row, parse_rdv, select_dossiers
+from suiviclientpro_cli import STATS_COLUMNS, main, write_rows
+from synthetic_liciel import create_folder_tree
+
+
+@pytest.fixture
+def workspace(liciel_db, tmp_path, monkeypatch):
+    """Dossier de travail de la ligne de commande : paramétrage, miroir et historiques."""
+    db_path, noms = liciel_db
+    base_path = str(tmp_path / "clients")
+    create_folder_tree(base_path, db_path)
+    monkeypatch.chdir(tmp_path)
+    with open("config_suiviclientpro.json", "w", encoding="utf-8") as f:
+        json.dump({"access_path": db_path, "clients_parent_folder": base_path}, f)
+    return noms
+
+
+def _run(tmp_path, *argv, fmt="json"):
+    out = tmp_path / "resultat.txt"
+    assert main(["--format", fmt, "--sortie", str(out), *argv]) == 0
+    with open(out, encoding="utf-8") as f:
+        return json.load(f) if fmt == "json" else list(csv.DictReader(f, delimiter=";"))
+
+
+def test_parse_rdv():
+    day = datetime(2024, 3, 5)
+    assert parse_rdv(day, "09 h 30") == day.toordinal() * 1440 + 9 * 60 + 30
+    assert parse_rdv("05/03/2024", "14:15") == day.toordinal() * 1440 + 14 * 60 + 15
+    assert parse_rdv("05/03/2024", "") == day.toordinal() * 1440
+    assert parse_rdv("bientôt", "9h") is None
+    assert parse_rdv(None, "9h") is None
+
+
+def test_select_dossiers():
+    rows = [
+        {"id": 1, "Num_dossier": "A", "type_de_dossier": "Vente", "rdv_date": datetime(2024, 3, 5), "rdv_heure": "9h",
+         "dossier_etat_paie": "Payé", "photo_de_presentation": "", "dossier_Acces": ""},
+        {"id": 2, "Num_dossier": "B", "type_de_dossier": "Vente", "rdv_date": None, "rdv_heure": "",
+         "dossier_etat_paie": "Non payé", "photo_de_presentation": "", "dossier_Acces": ""},
+        {"id": 3, "Num_dossier": "C", "type_de_dossier": "Location", "rdv_date": datetime(2024, 3, 6), "rdv_heure": "",
+         "dossier_etat_paie": "Payé", "photo_de_presentation": "", "dossier_Acces": ""},
+    ]
+    dossiers = [dossier_from_row(row) for row in rows]
+    assert [d["nom"] for d in select_dossiers(dossiers, type_="Vente")] == ["A", "B"]
+    assert [d["nom"] for d in select_dossiers(dossiers, paiement="Payé")] == ["A", "C"]
+    # Dates incluses ; un dossier sans rendez-vous n'est pas retenu
+    assert [d["nom"] for d in select_dossiers(dossiers, depuis=date(2024, 3, 5), jusqu_a=date(2024, 3, 5))] == ["A"]
+
+
+def test_sync_then_incremental_sync(workspace, tmp_path):
+    assert _run(tmp_path, "sync") == [{"complet": True, "ajoutes": len(workspace), "modifies": 0, "supprimes": 0}]
+    assert _run(tmp_path, "sync") == [{"complet": False, "ajoutes": 0, "modifies": 0, "supprimes": 0}]
+
+
+def test_stats_and_csv_output(workspace, tmp_path):
+    _run(tmp_path, "sync")
+    [totaux] = _run(tmp_path, "stats")
+    assert totaux["dossiers"] == len(workspace)
+    rows = _run(tmp_path, "stats", "--vue", "types", fmt="csv")
+    assert sum(int(row["missions"]) for row in rows) == len(workspace)
+
+
+def test_export_selected_fiches(workspace, tmp_path):
+    _run(tmp_path, "sync")
+    [result] = _run(tmp_path, "export", str(tmp_path / "fiches"), "--type", "Vente")
+    assert result["selectionnes"] > 0
+    assert result["exportes"] == result["selectionnes"]
+    assert result["echecs"] == result["absents"] == 0
+    assert len(list((tmp_path / "fiches").iterdir())) == result["exportes"]
+
+
+def test_ddt_reconciliation(workspace, tmp_path):
+    _run(tmp_path, "sync")
+    rows = _run(tmp_path, "ddt")
+    assert len(rows) == len(workspace)
+    assert any(row["rapports_locaux"] for row in rows)
+    manquants = _run(tmp_path, "ddt", "--manquants")
+    assert manquants and all(not row["rapports_locaux"] for row in manquants)
+    assert len(manquants) < len(rows)
+
+
+def test_missing_database_is_an_error(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    with open("config_suiviclientpro.json", "w", encoding="utf-8") as f:
+        json.dump({"access_path": str(tmp_path / "absente.accdb")}, f)
+    assert main(["sync"]) == 1
+    assert "Fichier introuvable" in capsys.readouterr().err
+
+
+def test_output_options_after_the_command(workspace, tmp_path):
+    out = tmp_path / "sync.json"
+    assert main(["sync", "--format", "json", "--sortie", str(out)]) == 0
+    with open(out, encoding="utf-8") as f:
+        assert json.load(f)[0]["ajoutes"] == len(workspace)
+
+
+def test_empty_csv_keeps_its_header():
+    out = io.StringIO()
+    write_rows([], "csv", out, STATS_COLUMNS["mensuel"])
+    assert out.getvalue() == "mois;missions;ttc;paye;reste\n"
@@ -0,0 +1,28 @@
+from local_mirror import LocalMirror, new_mirror_refresher, sync_from_access
+from statistiques import StatistiquesEngine, build_engine
+
+
+def _row(dossier_id, nom, ttc, reste=0.0):
+    return {
+        "id": dossier_id, "Num_dossier": nom, "type_de_dossier": "Vente", "rdv_date": "2024-03-05",
+        "facturation_ttc": ttc, "facturation_paye": ttc - reste, "facturation_restante": reste,
+        "dordre_nom": "Foncia",
+    }
+
+
+def test_rows_sharing_a_name_are_counted_separately():
+    engine = StatistiquesEngine()
+    engine.load_rows([_row(1, "24/A/1", 100.0), _row(2, "24/A/1", 50.0, reste=50.0)])
+    assert engine.totals() == [2, 150.0, 100.0, 50.0]
+    engine.remove(2)
+    assert engine.totals() == [1, 100.0, 100.0, 0.0]
+    assert engine.receivables_by_day == {}
+
+
+def test_engine_from_mirror(liciel_db, tmp_path):
+    db_path, noms = liciel_db
+    mirror = LocalMirror(str(tmp_path / "miroir.sqlite"))
+    sync_from_access(mirror, new_mirror_refresher(), db_path)
+    engine = build_engine(mirror)
+    assert engine.totals()[0] == len(noms)
+    assert sum(values[0] for _, values in engine.per_type()) == len(noms)
@@ -0,0 +1,13 @@
+import re
+import unicodedata
+
+
+def normalize_folder_name(name: str) -> str:
+    name = name.replace("/", "_")
+    name = name.replace("\\", "_")
+    name = name.replace(":", "")
+    name = re.sub(r"\s+", "_", name)
+    name = unicodedata.normalize("NFD", name)
+    name = name.encode("ascii", "ignore").decode("utf-8")
+    name = re.sub(r"[^a-zA-Z0-9_]+", "", name)
+    return name.strip().lower()
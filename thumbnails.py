@@ -0,0 +1,108 @@
+import os
+from collections import OrderedDict
+
+from PyQt5.QtCore import QObject, QSize, Qt, QThreadPool, pyqtSignal
+from PyQt5.QtGui import QImage, QImageReader, QPixmap
+
+from photos import THUMBNAILS_DIR, thumbnail_path
+from workers import Task
+
+
+MEMORY_CACHE_SIZE = 500
+MAX_THREADS = 4
+JPEG_QUALITY = 85
+
+
+def make_thumbnail(path, size, cache_dir=THUMBNAILS_DIR):
+    """Thread de fond : renvoie la miniature (QImage) depuis le cache disque ou la photo.
+
+    QImageReader décode directement à la taille réduite (les JPEG sont
+    réduits pendant le décodage) : l'image pleine taille n'est jamais en mémoire.
+    """
+    try:
+        cached = thumbnail_path(path, size, cache_dir)
+    except OSError:
+        return None
+    if os.path.exists(cached):
+        image = QImage(cached)
+        if not image.isNull():
+            return image
+
+    reader = QImageReader(path)
+    reader.setAutoTransform(True)
+    original = reader.size()
+    if original.isValid():
+        reader.setScaledSize(original.scaled(QSize(size, size), Qt.KeepAspectRatio))
+    image = reader.read()
+    if image.isNull():
+        return None
+    if image.width() > size or image.height() > size:
+        image = image.scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = cached + ".tmp"
+    if image.save(tmp_path, "JPG", JPEG_QUALITY):
+        os.replace(tmp_path, cached)
+    return image
+
+
+class ThumbnailCache(QObject):
+    """Miniatures des photos de présentation : mémoire (LRU), puis disque, puis décodage en fond.
+
+    ``get`` ne bloque jamais : s'il faut produire la miniature, il renvoie
+    None et ``thumbnail_ready(chemin, taille)`` est émis quand elle est prête.
+    """
+
+    thumbnail_ready = pyqtSignal(str, int)
+
+    def __init__(self, cache_dir=THUMBNAILS_DIR, capacity=MEMORY_CACHE_SIZE, parent=None):
+        super().__init__(parent)
+        self.cache_dir = cache_dir
+        self.capacity = capacity
+        # (chemin, taille, date de modification) -> QPixmap, ou None si la photo est illisible
+        self._pixmaps = OrderedDict()
+        self._pending = set()
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(MAX_THREADS)
+
+    @staticmethod
+    def _key(path, size):
+        # Photo remplacée sous le même nom : nouvelle entrée, comme pour le cache disque
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            mtime = None
+        return path, size, mtime
+
+    def get(self, path, size):
+        key = self._key(path, size)
+        if key in self._pixmaps:
+            self._pixmaps.move_to_end(key)
+            return self._pixmaps[key]
+        if key not in self._pending:
+            self._pending.add(key)
+            task = Task(make_thumbnail, path, size, self.cache_dir)
+            task.signals.finished.connect(lambda image, key=key: self._on_ready(key, image))
+            task.signals.failed.connect(lambda message, key=key: self._on_ready(key, None))
+            self._pool.start(task)
+        return None
+
+    def is_pending(self, path, size):
+        return self._key(path, size) in self._pending
+
+    def _on_ready(self, key, image):
+        self._pending.discard(key)
+        # QPixmap ne se crée que dans le thread de l'interface
+        self._pixmaps[key] = QPixmap.fromImage(image) if image is not None else None
+        while len(self._pixmaps) > self.capacity:
+            self._pixmaps.popitem(last=False)
+        self.thumbnail_ready.emit(*key[:2])
+
+    def clear(self):
+        self._pixmaps.clear()
+        self._pool.clear()
+        self._pending.clear()
+
+    def stop(self):
+        self._pool.clear()
+        self._pool.waitForDone(2000)
@@ -0,0 +1,157 @@
+import threading
+import time
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+
+class TaskCancelled(Exception):
+    pass
+
+
+class TaskSignals(QObject):
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+    batch = pyqtSignal(object)
+    progress = pyqtSignal(int, int)
+
+
+class Task(QRunnable):
+    """Exécute une fonction dans le pool de threads Qt et renvoie son résultat par signal.
+
+    Avec ``with_control=True`` la fonction reçoit la tâche en argument ``control``
+    pour publier des paquets (``emit_batch``), sa progression et tester l'annulation.
+    """
+
+    def __init__(self, fn, *args, with_control=False, **kwargs):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        if with_control:
+            self.kwargs["control"] = self
+        self.signals = TaskSignals()
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def check_cancelled(self):
+        if self._cancel_event.is_set():
+            raise TaskCancelled()
+
+    def emit_batch(self, rows):
+        self.signals.batch.emit(rows)
+
+    def emit_progress(self, done, total):
+        self.signals.progress.emit(done, total)
+
+    def run(self):
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except TaskCancelled:
+            self.signals.cancelled.emit()
+            return
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+            return
+        self.signals.finished.emit(result)
+
+
+def run_in_background(fn, *args, on_finished=None, on_failed=None, on_cancelled=None,
+                      on_batch=None, on_progress=None, **kwargs):
+    with_control = bool(on_batch or on_progress or on_cancelled)
+    task = Task(fn, *args, with_control=with_control, **kwargs)
+    for signal, slot in (
+        (task.signals.finished, on_finished),
+        (task.signals.failed, on_failed),
+        (task.signals.cancelled, on_cancelled),
+        (task.signals.batch, on_batch),
+        (task.signals.progress, on_progress),
+    ):
+        if slot:
+            signal.connect(slot)
+    QThreadPool.globalInstance().start(task)
+    return task
+
+
+class WriteBehindQueue(QObject):
+    """Écritures différées, regroupées par clé et envoyées par paquets dans un thread dédié.
+
+    Une nouvelle valeur pour une clé déjà en attente remplace l'ancienne et
+    repousse son envoi de ``delay`` secondes : une saisie au clavier ne
+    produit qu'une écriture. ``flush_fn`` reçoit la liste des (clé, valeur)
+    à écrire ensemble ; si elle échoue, le paquet est retenté avec une
+    attente croissante jusqu'à ``max_backoff`` secondes.
+    """
+
+    # clé, état : "pending", "failed" ou "" (écrit)
+    status_changed = pyqtSignal(str, str)
+    failed = pyqtSignal(str)
+
+    def __init__(self, flush_fn, delay=1.0, max_backoff=60.0, parent=None):
+        super().__init__(parent)
+        self.flush_fn = flush_fn
+        self.delay = delay
+        self.max_backoff = max_backoff
+        # clé -> (valeur, échéance, nombre d'échecs)
+        self._pending = {}
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="ecritures-access", daemon=True)
+        self._thread.start()
+
+    def submit(self, key, value):
+        with self._cond:
+            self._pending[key] = (value, time.monotonic() + self.delay, 0)
+            self._cond.notify()
+        self.status_changed.emit(key, "pending")
+
+    def _next_batch(self):
+        with self._cond:
+            while True:
+                if self._stopping:
+                    due = list(self._pending)
+                    break
+                now = time.monotonic()
+                due = [key for key, (_, when, _) in self._pending.items() if when <= now]
+                if due:
+                    break
+                timeout = min(when for _, when, _ in self._pending.values()) - now if self._pending else None
+                self._cond.wait(timeout)
+            return {key: self._pending.pop(key) for key in due}
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+            try:
+                self.flush_fn([(key, value) for key, (value, _, _) in batch.items()])
+            except Exception as e:
+                failed = []
+                with self._cond:
+                    for key, (value, _, failures) in batch.items():
+                        # Une saisie plus récente remplace la valeur en échec (et reste « pending »)
+                        if key not in self._pending:
+                            backoff = min(self.max_backoff, self.delay * 2 ** (failures + 1))
+                            self._pending[key] = (value, time.monotonic() + backoff, failures + 1)
+                            failed.append(key)
+                    stopping = self._stopping
+                for key in failed:
+                    self.status_changed.emit(key, "failed")
+                self.failed.emit(str(e))
+                if stopping:
+                    return
+                continue
+            with self._cond:
+                still_pending = [key in self._pending for key in batch]
+            for key, pending in zip(batch, still_pending):
+                self.status_changed.emit(key, "pending" if pending else "")
+
+    def stop(self, timeout=10.0):
+        # Tout ce qui attend encore est envoyé tout de suite, une dernière fois
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        self._thread.join(timeout)